@@ -1,6 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -13,20 +14,101 @@ class Settings(BaseSettings):
     mistral_api_key: str = os.getenv("MISTRAL_API_KEY", "")
     mistral_embed_model: str = "mistral-embed"
     mistral_chat_model: str = "mistral-large-latest"
+    mistral_server_url: Optional[str] = None  # override, e.g. a local fake server
+    mistral_max_connections: int = 100  # pooled connections shared by chat and embeddings
+    mistral_timeout_seconds: float = 60.0
+    
+    # Embedding Client Configuration
+    embed_request_max_items: int = 32  # texts per embeddings request
+    embed_request_max_tokens: int = 8000  # estimated tokens per embeddings request
+    embed_max_concurrency: int = 4  # embeddings requests in flight
+    embed_max_retries: int = 5  # retries for 429/5xx responses
+    embed_retry_base_delay: float = 0.5  # seconds, doubled per retry (with jitter)
+    query_embed_batch_window_ms: float = 5.0  # wait to batch concurrent question embeddings; 0 disables
+    query_embed_batch_max_items: int = 32  # send a question batch early once this many are waiting
+    
+    # Embedding Cache Configuration
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./cache/embeddings.sqlite"
+    embedding_cache_max_entries: int = 200_000  # ~800MB of 1024-dim float32 vectors
     
     # File Upload Configuration
     upload_dir: str = "./uploads"
     max_upload_size: int = 20 * 1024 * 1024  # 20MB
+    upload_block_size: int = 1024 * 1024  # bytes read per upload block
     allowed_extensions: set = {".pdf"}
     
+    # Ingestion Configuration
+    ingest_queue_size: int = 16  # queued uploads before new ones are rejected
+    ingest_workers: int = 2  # ingestion jobs processed concurrently
+    pdf_process_workers: int = 2  # processes used for PDF parsing
+    pdf_parallel_min_pages: int = 32  # smaller PDFs are parsed as one task
+    pdf_pages_per_task: int = 16  # pages per parallel extraction task
+    pdf_prefetch_tasks: int = 4  # page ranges parsed ahead of the pipeline
+    embed_batch_size: int = 64  # chunks embedded and indexed per batch
+    ingest_queue_path: str = "./chroma_db/ingest_queue.sqlite"  # shared queue with multi_worker
+    ingest_poll_interval_seconds: float = 0.5  # idle workers check the shared queue this often
+    ingest_stale_seconds: float = 60.0  # shared jobs without a progress heartbeat this long are failed
+    
+    # Vector Store Configuration
+    vector_store_backend: str = "chroma"  # "chroma" or "numpy" (exact per-resource search)
+    numpy_store_dir: str = "./vector_data"
+    vector_quantization: str = "none"  # numpy backend: "none", "float16", "int8" or "pq"
+    quantization_rerank_factor: int = 4  # quantized candidates re-scored in float32 per result
+    pq_subvectors: int = 64  # bytes per vector with "pq"
+    
     # ChromaDB Configuration
     chroma_persist_dir: str = "./chroma_db"
-    chroma_collection_name: str = "pdf_documents"
+    chroma_collection_name: str = "pdf_documents"  # shared collection / partition name prefix
+    chroma_partition_mode: str = "resource"  # "resource" (collection per resource) or "shared"
+    chroma_server_url: Optional[str] = None  # e.g. http://127.0.0.1:8001 (`chroma run`) instead of the embedded client
+    vector_store_workers: int = 8  # threads for blocking Chroma calls
+    vector_hot_resources: int = 128  # per-resource indexes kept loaded (LRU)
+    warm_resources_on_startup: int = 32  # most recently updated resources preloaded before /ready
+    catalog_path: str = "./chroma_db/catalog.sqlite"  # resource records and fingerprints
     
     # RAG Configuration
     chunk_size: int = 500  # tokens
     chunk_overlap: int = 50  # tokens
+    chunker: str = "structured"  # "structured" (sentences/headings, cross-page) or "words"
+    tokenizer_path: Optional[str] = None  # Hugging Face tokenizer.json for exact token counts
+    context_packing_enabled: bool = True  # merge overlapping chunks, fit prompt token budgets
+    context_token_budget: int = 3000  # retrieved context tokens per prompt
+    history_token_budget: int = 1000  # conversation history tokens per prompt
     top_k_results: int = 5  # number of chunks to retrieve
+    max_query_resources: int = 20  # resources one multi-resource question may span
+    search_timeout_seconds: float = 1.0  # slower per-resource searches are dropped
+    retrieval_mode: str = "hybrid"  # "vector", "hybrid" (BM25 + vector, RRF) or "lexical"
+    lexical_index_enabled: bool = True  # BM25 index kept next to the vector data
+    hybrid_candidates: int = 20  # results taken from each side before fusion
+    rrf_k: int = 60  # reciprocal rank fusion constant
+    rerank_enabled: bool = False  # over-fetch, rescore on CPU and keep the best few chunks
+    rerank_candidates: int = 20  # chunks retrieved for the reranker
+    rerank_top_k: int = 3  # chunks kept for the prompt after reranking
+    rerank_mmr_lambda: float = 0.7  # 1.0 = relevance only, lower = more diverse chunks
+    query_embed_timeout_seconds: float = 5.0  # then fall back to BM25 retrieval
+    embed_fallback_cooldown_seconds: float = 30.0  # BM25 only for this long after a failure
+    
+    # Batch Question Configuration
+    batch_max_questions: int = 500  # questions per /api/chat/batch request or job
+    batch_llm_concurrency: int = 8  # completions in flight per batch
+    batch_max_running_jobs: int = 4  # background batch jobs running at once
+    batch_max_finished_jobs: int = 100  # finished jobs whose results are kept in memory
+    
+    # Query / Answer Cache Configuration
+    query_cache_max_entries: int = 10_000  # question embeddings kept in memory
+    query_cache_ttl_seconds: int = 3600
+    answer_cache_enabled: bool = True
+    answer_cache_threshold: float = 0.95  # cosine similarity to reuse an answer
+    answer_cache_max_per_resource: int = 256
+    answer_cache_ttl_seconds: int = 86400
+    answer_cache_path: str = "./cache/answers.sqlite"  # shared answer cache with multi_worker
+    
+    # Multi-worker Deployment
+    multi_worker: bool = False  # running as several processes (uvicorn --workers N): share the ingest queue and answer cache
+    
+    # Observability
+    metrics_enabled: bool = True  # /metrics endpoint, stage timings and Server-Timing headers
     
     # CORS
     cors_origins: list = ["http://localhost:5173", "http://localhost:3000", "http://localhost:80", "*"]
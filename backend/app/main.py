@@ -1,20 +1,43 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
+import aiofiles
+import asyncio
+import hashlib
+import httpx
+import json
 import os
+import time
 import uuid
-from datetime import datetime
+from contextlib import aclosing
 from pathlib import Path
+from typing import List, Optional
 
 from .config import get_settings, Settings
 from .models import (
-    UploadResponse, ChatRequest, ChatResponse,
-    ResourceInfo, Citation
+    UploadResponse, ChatRequest, ChatResponse, ChatBatchRequest, BatchJobStatus,
+    ResourceInfo, ResourceList, Citation, ResourceStatus
 )
 from .services.pdf_processor import PDFProcessor
 from .services.embeddings import EmbeddingService
-from .services.vector_store import VectorStore
+from .services.embedding_cache import EmbeddingCache
+from .services.vector_store import VectorStore, ChromaVectorStore
+from .services.numpy_store import NumpyVectorStore
+from .services.lexical_index import LexicalIndex
+from .services.chunker import TokenCounter
+from .services.context_packer import ContextPacker
+from .services.reranker import Reranker
 from .services.rag_service import RAGService
+from .services.ingestion import IngestionManager, QueueFullError
+from .services.ingest_queue import SharedIngestQueue
+from .services.batch_jobs import BatchJobManager, BatchLimitError
+from .services.catalog import ResourceCatalog
+from .services.answer_cache import QueryEmbeddingCache, SemanticAnswerCache, SharedAnswerCache
+from .services.metrics import (
+    REGISTRY, HTTP_REQUESTS, HTTP_DURATION, HTTP_IN_FLIGHT,
+    span, start_trace, cache_families
+)
 
 # Load settings early (required for middleware)
 settings = get_settings()
@@ -37,46 +60,330 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# -------------------------
+# METRICS MIDDLEWARE
+# -------------------------
+class MetricsMiddleware:
+    """
+    Counts, times and gauges HTTP requests per route template, and reports
+    the pipeline stages of a request in a Server-Timing header (stages that
+    finish before the response starts, i.e. not the streamed LLM part)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _route(scope) -> str:
+        # Route templates keep label cardinality bounded (no resource ids)
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route(scope)
+        in_flight = HTTP_IN_FLIGHT.labels(method, route)
+        trace = start_trace()
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace:
+                    timing = ", ".join(
+                        f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in trace.items()
+                    )
+                    message = {
+                        **message,
+                        "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]
+                    }
+            await send(message)
+
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            in_flight.dec()
+            HTTP_DURATION.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Global service instances
 vector_store = None
 embedding_service = None
 rag_service = None
 pdf_processor = None
+ingestion_manager = None
+batch_manager = None
+catalog = None
+http_client = None
+warmup_task = None
+
+# Startup progress, reported by /ready
+startup_state = {"services": "starting", "warmup": "pending", "ready_seconds": None}
+
+def create_vector_store(settings: Settings) -> VectorStore:
+    """Open the configured vector store backend (and its lexical index) from disk"""
+    vector_dir = (
+        settings.numpy_store_dir if settings.vector_store_backend == "numpy"
+        else settings.chroma_persist_dir
+    )
+    lexical_index = None
+    if settings.lexical_index_enabled:
+        lexical_index = LexicalIndex(
+            os.path.join(vector_dir, "lexical"),
+            max_loaded=settings.vector_hot_resources
+        )
+
+    if settings.vector_store_backend == "numpy":
+        return NumpyVectorStore(
+            persist_directory=settings.numpy_store_dir,
+            max_workers=settings.vector_store_workers,
+            lexical_index=lexical_index,
+            max_loaded=settings.vector_hot_resources,
+            quantization=settings.vector_quantization,
+            rerank_factor=settings.quantization_rerank_factor,
+            pq_subvectors=settings.pq_subvectors
+        )
+    if settings.vector_quantization != "none":
+        print("⚠️ vector_quantization only applies to the numpy backend, ignoring it")
+    if settings.multi_worker and not settings.chroma_server_url:
+        # Each process would open its own embedded Chroma over the same files
+        raise ValueError(
+            "multi_worker with the chroma backend needs chroma_server_url "
+            "(a shared `chroma run` server), or use vector_store_backend=numpy"
+        )
+    return ChromaVectorStore(
+        persist_directory=settings.chroma_persist_dir,
+        collection_name=settings.chroma_collection_name,
+        max_workers=settings.vector_store_workers,
+        partition_mode=settings.chroma_partition_mode,
+        lexical_index=lexical_index,
+        max_loaded=settings.vector_hot_resources,
+        server_url=settings.chroma_server_url
+    )
+
+def create_embedding_cache(settings: Settings) -> Optional[EmbeddingCache]:
+    if not settings.embedding_cache_enabled:
+        return None
+    return EmbeddingCache(
+        path=settings.embedding_cache_path,
+        max_entries=settings.embedding_cache_max_entries
+    )
 
 # -------------------------
 # STARTUP INITIALIZATION
 # -------------------------
 @app.on_event("startup")
 async def startup_event():
-    global vector_store, embedding_service, rag_service, pdf_processor
+    global vector_store, embedding_service, rag_service, pdf_processor, ingestion_manager, catalog, http_client
+    global batch_manager, warmup_task
+
+    started = time.perf_counter()
 
     # Create directories
     Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.chroma_persist_dir).mkdir(parents=True, exist_ok=True)
 
+    # The on-disk stores are independent, so open them concurrently
+    vector_store, catalog, embedding_cache = await asyncio.gather(
+        asyncio.to_thread(create_vector_store, settings),
+        asyncio.to_thread(ResourceCatalog, settings.catalog_path),
+        asyncio.to_thread(create_embedding_cache, settings)
+    )
+
     pdf_processor = PDFProcessor(
         chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap
+        chunk_overlap=settings.chunk_overlap,
+        parallel_min_pages=settings.pdf_parallel_min_pages,
+        pages_per_task=settings.pdf_pages_per_task,
+        prefetch_tasks=settings.pdf_prefetch_tasks,
+        chunker=settings.chunker,
+        tokenizer_path=settings.tokenizer_path
+    )
+
+    # One pooled async HTTP client for every Mistral call
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.mistral_max_connections,
+            max_keepalive_connections=settings.mistral_max_connections
+        ),
+        timeout=settings.mistral_timeout_seconds
     )
 
     embedding_service = EmbeddingService(
         api_key=settings.mistral_api_key,
-        model=settings.mistral_embed_model
+        model=settings.mistral_embed_model,
+        server_url=settings.mistral_server_url,
+        http_client=http_client,
+        max_batch_items=settings.embed_request_max_items,
+        max_batch_tokens=settings.embed_request_max_tokens,
+        max_concurrency=settings.embed_max_concurrency,
+        max_retries=settings.embed_max_retries,
+        retry_base_delay=settings.embed_retry_base_delay,
+        cache=embedding_cache,
+        single_batch_window_ms=settings.query_embed_batch_window_ms,
+        single_batch_max_items=settings.query_embed_batch_max_items
     )
 
-    vector_store = VectorStore(
-        persist_directory=settings.chroma_persist_dir,
-        collection_name=settings.chroma_collection_name
+    query_cache = QueryEmbeddingCache(
+        max_entries=settings.query_cache_max_entries,
+        ttl_seconds=settings.query_cache_ttl_seconds
     )
 
+    answer_cache = None
+    if settings.answer_cache_enabled and settings.multi_worker:
+        # Answers (and invalidations) are seen by every worker process
+        answer_cache = SharedAnswerCache(
+            path=settings.answer_cache_path,
+            threshold=settings.answer_cache_threshold,
+            max_entries_per_resource=settings.answer_cache_max_per_resource,
+            ttl_seconds=settings.answer_cache_ttl_seconds
+        )
+    elif settings.answer_cache_enabled:
+        answer_cache = SemanticAnswerCache(
+            threshold=settings.answer_cache_threshold,
+            max_entries_per_resource=settings.answer_cache_max_per_resource,
+            ttl_seconds=settings.answer_cache_ttl_seconds
+        )
+
+    context_packer = None
+    if settings.context_packing_enabled:
+        context_packer = ContextPacker(
+            context_budget=settings.context_token_budget,
+            history_budget=settings.history_token_budget,
+            counter=TokenCounter(settings.tokenizer_path)
+        )
+
+    reranker = None
+    if settings.rerank_enabled:
+        reranker = Reranker(
+            candidates=settings.rerank_candidates,
+            keep=settings.rerank_top_k,
+            mmr_lambda=settings.rerank_mmr_lambda
+        )
+
     rag_service = RAGService(
         mistral_api_key=settings.mistral_api_key,
         vector_store=vector_store,
         embedding_service=embedding_service,
-        chat_model=settings.mistral_chat_model
+        chat_model=settings.mistral_chat_model,
+        server_url=settings.mistral_server_url,
+        http_client=http_client,
+        query_cache=query_cache,
+        answer_cache=answer_cache,
+        search_timeout=settings.search_timeout_seconds,
+        retrieval_mode=settings.retrieval_mode,
+        hybrid_candidates=settings.hybrid_candidates,
+        rrf_k=settings.rrf_k,
+        embed_timeout=settings.query_embed_timeout_seconds,
+        embed_cooldown=settings.embed_fallback_cooldown_seconds,
+        context_packer=context_packer,
+        reranker=reranker
+    )
+
+    ingestion_manager = IngestionManager(
+        pdf_processor=pdf_processor,
+        embedding_service=embedding_service,
+        vector_store=vector_store,
+        catalog=catalog,
+        answer_cache=answer_cache,
+        max_queue_size=settings.ingest_queue_size,
+        num_workers=settings.ingest_workers,
+        process_workers=settings.pdf_process_workers,
+        embed_batch_size=settings.embed_batch_size,
+        shared_queue=SharedIngestQueue(
+            settings.ingest_queue_path,
+            stale_seconds=settings.ingest_stale_seconds
+        ) if settings.multi_worker else None,
+        poll_interval=settings.ingest_poll_interval_seconds
     )
+    await ingestion_manager.start()
+
+    batch_manager = BatchJobManager(
+        rag_service=rag_service,
+        max_running=settings.batch_max_running_jobs,
+        max_finished_jobs=settings.batch_max_finished_jobs,
+        concurrency=settings.batch_llm_concurrency,
+        top_k=settings.top_k_results
+    )
+
+    REGISTRY.clear_callbacks()
+    REGISTRY.register_callback(lambda: service_metrics(embedding_cache))
+
+    startup_state["services"] = "ready"
+    print(f"✅ All services initialized successfully in {time.perf_counter() - started:.2f}s")
+
+    # Requests are served while recent resources are preloaded; /ready waits for it
+    warmup_task = asyncio.create_task(warm_hot_resources(started))
+
+async def warm_hot_resources(started: float):
+    """Load the indexes of the most recently updated resources, then report ready"""
+    limit = min(settings.warm_resources_on_startup, settings.vector_hot_resources)
+    try:
+        if limit > 0:
+            startup_state["warmup"] = "running"
+            records = await asyncio.to_thread(catalog.recently_updated, limit)
+            warmed = 0
+            for record in records:
+                warmed += await vector_store.warm_resource_async(record["resource_id"])
+            print(f"✅ Preloaded {warmed} of {len(records)} recent resources")
+        startup_state["warmup"] = "done"
+    except Exception as e:
+        startup_state["warmup"] = "failed"
+        print(f"⚠️ Warm-up failed, resources will load on first query: {e}")
+    startup_state["ready_seconds"] = round(time.perf_counter() - started, 3)
+
+def service_metrics(embedding_cache: Optional[EmbeddingCache]):
+    """Scrape-time metrics derived from the services' own counters"""
+    embedding_stats = embedding_service.stats
+    families = cache_families({
+        "query_embedding": rag_service.query_cache,
+        "answer": rag_service.answer_cache,
+        "embedding": embedding_cache,
+    })
+    families += [
+        ("embedding_requests_total", "counter", "Embeddings requests sent to the provider",
+         [({}, embedding_stats["requests"])]),
+        ("embedding_retries_total", "counter", "Embeddings requests retried",
+         [({}, embedding_stats["retries"])]),
+        ("ingestion_queue_depth", "gauge", "PDFs waiting for an ingestion worker",
+         [({}, ingestion_manager.queue_depth)]),
+    ]
+    if rag_service.context_packer is not None:
+        context_stats = rag_service.context_packer.get_stats()
+        families.append((
+            "rag_context_tokens_total", "counter",
+            "Prompt context tokens retrieved and kept after packing",
+            [({"kind": "retrieved"}, context_stats["tokens_in"]),
+             ({"kind": "packed"}, context_stats["tokens_out"])]
+        ))
+    return families
 
-    print("✅ All services initialized successfully")
+@app.on_event("shutdown")
+async def shutdown_event():
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if batch_manager is not None:
+        await batch_manager.stop()
+    if ingestion_manager is not None:
+        await ingestion_manager.stop()
+    if vector_store is not None:
+        vector_store.close()
+    if http_client is not None:
+        await http_client.aclose()
 
 # -------------------------
 # ROUTES
@@ -89,9 +396,70 @@ async def root():
         "version": "1.0.0"
     }
 
-@app.post("/api/resources/upload", response_model=UploadResponse)
+@app.get("/ready")
+async def readiness():
+    """503 until services are up and recent resources are preloaded, and while ingestion workers are down"""
+    workers = ingestion_manager.workers_alive if ingestion_manager is not None else 0
+    ready = (
+        startup_state["services"] == "ready"
+        and startup_state["warmup"] in ("done", "failed")
+        and workers == settings.ingest_workers
+    )
+    return JSONResponse(
+        {"status": "ready" if ready else "not_ready", **startup_state, "ingestion_workers": workers},
+        status_code=200 if ready else 503
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    # Read by the ingestion_queue_depth gauge while rendering
+    await ingestion_manager.refresh_queue_depth()
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/stats")
+async def get_stats():
+    return {
+        "embeddings": embedding_service.get_stats(),
+        "query_cache": rag_service.query_cache.get_stats(),
+        "answer_cache": rag_service.answer_cache.get_stats() if rag_service.answer_cache else None,
+        "context": rag_service.context_packer.get_stats() if rag_service.context_packer else None,
+        "ingestion_queue_depth": await ingestion_manager.refresh_queue_depth()
+    }
+
+async def save_upload(file: UploadFile, file_path: str, settings: Settings):
+    """
+    Stream an upload to disk and return its (size, SHA-256 fingerprint)
+
+    Raises a 400 (leaving nothing on disk) if it exceeds max_upload_size.
+    """
+    # Stream to disk in fixed-size blocks instead of buffering the whole file,
+    # fingerprinting the content on the way
+    size = 0
+    hasher = hashlib.sha256()
+    with span("upload_save"):
+        async with aiofiles.open(file_path, "wb") as out:
+            while block := await file.read(settings.upload_block_size):
+                size += len(block)
+                if size > settings.max_upload_size:
+                    break
+                hasher.update(block)
+                await out.write(block)
+
+    if size > settings.max_upload_size:
+        os.remove(file_path)
+        raise HTTPException(
+            status_code=400,
+            detail=f"File exceeds {settings.max_upload_size / (1024 * 1024)}MB"
+        )
+    return size, hasher.hexdigest()
+
+@app.post("/api/resources/upload", response_model=UploadResponse, status_code=202)
 async def upload_pdf(
     file: UploadFile = File(...),
+    force: bool = Query(False, description="Re-index even if this exact file was already uploaded"),
+    exam_tag: Optional[str] = Query(None, description="Group the resource for multi-resource questions"),
     settings: Settings = Depends(get_settings)
 ):
     if not file.filename.endswith(".pdf"):
@@ -100,52 +468,220 @@ async def upload_pdf(
     resource_id = str(uuid.uuid4())
     file_path = os.path.join(settings.upload_dir, f"{resource_id}.pdf")
 
-    content = await file.read()
-    if len(content) > settings.max_upload_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File exceeds {settings.max_upload_size / (1024 * 1024)}MB"
-        )
+    size, fingerprint = await save_upload(file, file_path, settings)
+    existing = await asyncio.to_thread(catalog.find_by_fingerprint, fingerprint)
+    replace = False
+    target_path = None
 
-    with open(file_path, "wb") as f:
-        f.write(content)
+    if existing is not None:
+        if not force:
+            # Same bytes already indexed (or in progress): alias the existing resource
+            os.remove(file_path)
+            if exam_tag and exam_tag != existing["exam_tag"]:
+                await asyncio.to_thread(catalog.update, existing["resource_id"], exam_tag=exam_tag)
+            return UploadResponse(
+                resource_id=existing["resource_id"],
+                filename=existing["filename"],
+                page_count=existing["page_count"],
+                status=existing["status"],
+                message="Identical PDF already uploaded, reusing existing resource",
+                upload_date=existing["created_at"]
+            )
 
-    page_texts = pdf_processor.extract_text_from_pdf(file_path)
-    if not page_texts:
-        raise HTTPException(status_code=400, detail="No text extracted")
+        if existing["status"] != "completed":
+            os.remove(file_path)
+            raise HTTPException(
+                status_code=409,
+                detail="This PDF is still being processed"
+            )
 
-    chunks = pdf_processor.chunk_text(page_texts)
-    embeddings = await embedding_service.generate_embeddings(
-        [c["text"] for c in chunks]
-    )
+        # Forced re-index keeps the existing resource id; the job moves the
+        # upload over the resource's PDF once it succeeds
+        resource_id = existing["resource_id"]
+        target_path = os.path.join(settings.upload_dir, f"{resource_id}.pdf")
+        exam_tag = exam_tag or existing["exam_tag"]
+        replace = True
 
-    metadata = {
-        "filename": file.filename,
-        "page_count": len(page_texts),
-        "upload_date": datetime.now().isoformat()
-    }
+    # Parsing, chunking, embedding and indexing run in the background
+    try:
+        job = await ingestion_manager.submit(
+            resource_id, file.filename, file_path,
+            fingerprint=fingerprint,
+            replace=replace,
+            exam_tag=exam_tag,
+            size_bytes=size,
+            target_path=target_path
+        )
+    except QueueFullError as e:
+        os.remove(file_path)
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "10"}
+        )
 
-    vector_store.add_document_chunks(
+    return UploadResponse(
         resource_id=resource_id,
-        chunks=chunks,
-        embeddings=embeddings,
-        metadata=metadata
+        filename=file.filename,
+        page_count=0,
+        status=job.status,
+        message="PDF queued for re-indexing" if replace else "PDF queued for processing",
+        upload_date=job.created_at
     )
 
+@app.put("/api/resources/{resource_id}", response_model=UploadResponse, status_code=202)
+async def replace_resource(
+    resource_id: str,
+    file: UploadFile = File(...),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Replace a resource's PDF with an updated version, keeping its id
+
+    Only chunks whose text changed are re-embedded; the job status reports
+    how many chunks were reused, added and deleted.
+    """
+    if not file.filename.endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    record = await asyncio.to_thread(catalog.get, resource_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    if record["status"] in ("queued", "processing"):
+        raise HTTPException(status_code=409, detail="This PDF is still being processed")
+
+    file_path = os.path.join(settings.upload_dir, f"{resource_id}.pdf")
+    upload_path = os.path.join(settings.upload_dir, f"{resource_id}.upload")
+    size, fingerprint = await save_upload(file, upload_path, settings)
+
+    if fingerprint == record["fingerprint"] and record["status"] == "completed":
+        os.remove(upload_path)
+        return UploadResponse(
+            resource_id=resource_id,
+            filename=record["filename"],
+            page_count=record["page_count"],
+            status=record["status"],
+            message="PDF unchanged, nothing to re-index",
+            upload_date=record["created_at"]
+        )
+
+    # The job reads the upload where it is and moves it over the resource's
+    # PDF once it succeeds, so the indexed PDF stays in place until then
+    try:
+        job = await ingestion_manager.submit(
+            resource_id, file.filename, upload_path,
+            fingerprint=fingerprint,
+            replace=True,
+            exam_tag=record["exam_tag"],
+            size_bytes=size,
+            target_path=file_path
+        )
+    except QueueFullError as e:
+        os.remove(upload_path)
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "10"}
+        )
+
     return UploadResponse(
         resource_id=resource_id,
         filename=file.filename,
-        page_count=len(page_texts),
-        status="success",
-        message="PDF processed successfully",
-        upload_date=datetime.now().isoformat()
+        page_count=0,
+        status=job.status,
+        message="PDF queued for re-indexing",
+        upload_date=job.created_at
     )
 
+def resource_info(record: dict) -> ResourceInfo:
+    return ResourceInfo(
+        resource_id=record["resource_id"],
+        filename=record["filename"],
+        page_count=record["page_count"],
+        upload_date=record["created_at"],
+        status=record["status"],
+        chunk_count=record["chunk_count"],
+        size_bytes=record["size_bytes"],
+        fingerprint=record["fingerprint"],
+        exam_tag=record["exam_tag"],
+        error=record["error"],
+        updated_at=record["updated_at"]
+    )
+
+@app.get("/api/resources", response_model=ResourceList)
+async def list_resources(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    status: Optional[str] = Query(None, description="Only resources in this ingestion state")
+):
+    # Served from the catalog alone; vector data is never touched
+    try:
+        records, next_cursor = await asyncio.to_thread(catalog.list_page, limit, cursor, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return ResourceList(
+        resources=[resource_info(record) for record in records],
+        next_cursor=next_cursor
+    )
+
+@app.get("/api/resources/{resource_id}", response_model=ResourceInfo)
+async def get_resource(resource_id: str):
+    record = await asyncio.to_thread(catalog.get, resource_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+
+    return resource_info(record)
+
+@app.delete("/api/resources/{resource_id}", status_code=204)
+async def delete_resource(resource_id: str):
+    record = await asyncio.to_thread(catalog.get, resource_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    if record["status"] in ("queued", "processing"):
+        raise HTTPException(status_code=409, detail="This PDF is still being processed")
+
+    await vector_store.delete_document_async(resource_id)
+    if rag_service.answer_cache is not None:
+        await rag_service.answer_cache.invalidate_async(resource_id)
+    file_path = os.path.join(settings.upload_dir, f"{resource_id}.pdf")
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    await asyncio.to_thread(catalog.delete, resource_id)
+    await ingestion_manager.forget(resource_id)
+
+@app.get("/api/resources/{resource_id}/status", response_model=ResourceStatus)
+async def get_resource_status(resource_id: str):
+    status = await asyncio.to_thread(ingestion_manager.get_status, resource_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+
+    return ResourceStatus(**status)
+
+async def resolve_resource_ids(request: ChatRequest) -> List[str]:
+    """Resources a chat request targets: one id, an explicit list, or an exam tag"""
+    if request.exam_tag is not None:
+        records = await asyncio.to_thread(catalog.find_by_exam_tag, request.exam_tag)
+        if not records:
+            raise HTTPException(status_code=404, detail="No processed resources with this exam tag")
+        resource_ids = [record["resource_id"] for record in records]
+    elif request.resource_ids is not None:
+        resource_ids = list(dict.fromkeys(request.resource_ids))
+    else:
+        resource_ids = [request.resource_id]
+
+    if len(resource_ids) > settings.max_query_resources:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A question can span at most {settings.max_query_resources} resources"
+        )
+    return resource_ids
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_with_pdf(request: ChatRequest):
+    resource_ids = await resolve_resource_ids(request)
     result = await rag_service.answer_question(
         question=request.question,
-        resource_id=request.resource_id,
+        resource_ids=resource_ids,
         conversation_history=request.conversation_history,
         top_k=settings.top_k_results
     )
@@ -155,18 +691,100 @@ async def chat_with_pdf(request: ChatRequest):
         citations=[
             Citation(**c) for c in result["citations"]
         ],
-        resource_id=request.resource_id
+        resource_id=request.resource_id,
+        resource_ids=resource_ids
     )
 
 @app.post("/api/chat/stream")
-async def chat_with_pdf_stream(request: ChatRequest):
-    async def generate():
-        async for chunk in rag_service.answer_question_stream(
+async def chat_with_pdf_stream(
+    request: ChatRequest,
+    format: str = Query("text", pattern="^(text|sse)$", description="text: answer text only; sse: Server-Sent Events")
+):
+    resource_ids = await resolve_resource_ids(request)
+
+    if format == "text":
+        async def generate():
+            async with aclosing(rag_service.answer_question_stream(
+                question=request.question,
+                resource_ids=resource_ids,
+                conversation_history=request.conversation_history,
+                top_k=settings.top_k_results
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+
+        return StreamingResponse(generate(), media_type="text/plain")
+
+    async def generate_events():
+        # Starlette cancels the response when the client disconnects; closing
+        # the event iterator then aborts the upstream generation
+        async with aclosing(rag_service.answer_question_events(
             question=request.question,
-            resource_id=request.resource_id,
+            resource_ids=resource_ids,
             conversation_history=request.conversation_history,
             top_k=settings.top_k_results
-        ):
-            yield chunk
+        )) as events:
+            async for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(
+        generate_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def check_batch(request: ChatBatchRequest):
+    """Reject batches that are too large or target an unknown resource"""
+    if len(request.questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can have at most {settings.batch_max_questions} questions"
+        )
+    if await asyncio.to_thread(catalog.get, request.resource_id) is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+
+@app.post("/api/chat/batch")
+async def chat_batch(request: ChatBatchRequest):
+    await check_batch(request)
+
+    async def generate():
+        # One JSON object per line, as each answer completes
+        try:
+            async for result in rag_service.answer_batch(
+                request.questions,
+                request.resource_id,
+                top_k=settings.top_k_results,
+                concurrency=settings.batch_llm_concurrency
+            ):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"RAG pipeline failed: {str(e)}"}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.post("/api/chat/batch/jobs", response_model=BatchJobStatus, status_code=202)
+async def create_batch_job(request: ChatBatchRequest):
+    await check_batch(request)
+    try:
+        job = batch_manager.submit(request.resource_id, request.questions)
+    except BatchLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+
+    return BatchJobStatus(**job.to_dict(include_results=False))
+
+@app.get("/api/chat/batch/jobs/{job_id}", response_model=BatchJobStatus)
+async def get_batch_job(job_id: str):
+    job = batch_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+
+    return BatchJobStatus(**job.to_dict())
+
+@app.delete("/api/chat/batch/jobs/{job_id}", response_model=BatchJobStatus)
+async def cancel_batch_job(job_id: str):
+    job = batch_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
 
-    return StreamingResponse(generate(), media_type="text/plain")
+    batch_manager.cancel(job_id)
+    return BatchJobStatus(**job.to_dict(include_results=False))
@@ -0,0 +1,36 @@
+"""
+Move chunks from the shared Chroma collection into per-resource collections
+
+Usage (from backend/, with the API stopped):
+    python -m app.migrate_partitions [--batch-size 1000]
+"""
+
+import argparse
+
+from .config import get_settings
+from .services.vector_store import ChromaVectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    store = ChromaVectorStore(
+        persist_directory=settings.chroma_persist_dir,
+        collection_name=settings.chroma_collection_name,
+        partition_mode="resource"
+    )
+    try:
+        moved = store.migrate_to_partitions(batch_size=args.batch_size)
+    finally:
+        store.close()
+
+    for resource_id, count in moved.items():
+        print(f"{resource_id}: {count} chunks")
+    print(f"✅ Migrated {sum(moved.values())} chunks across {len(moved)} resources")
+
+
+if __name__ == "__main__":
+    main()
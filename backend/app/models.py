@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class UploadResponse(BaseModel):
@@ -12,22 +12,48 @@ class UploadResponse(BaseModel):
     upload_date: str
 
 class ChatRequest(BaseModel):
-    """Request model for chat"""
+    """Request model for chat over one resource, a list of resources or an exam tag"""
     question: str = Field(..., min_length=1, max_length=1000)
-    resource_id: str
+    resource_id: Optional[str] = None
+    resource_ids: Optional[List[str]] = None
+    exam_tag: Optional[str] = None
     conversation_history: Optional[List[dict]] = []
 
+    @model_validator(mode="after")
+    def check_target(self):
+        targets = [self.resource_id, self.resource_ids, self.exam_tag]
+        if sum(target is not None for target in targets) != 1:
+            raise ValueError("Provide exactly one of resource_id, resource_ids or exam_tag")
+        if self.resource_ids is not None and not self.resource_ids:
+            raise ValueError("resource_ids must not be empty")
+        return self
+
+class ChatBatchRequest(BaseModel):
+    """Request model for answering a list of questions about one resource"""
+    resource_id: str
+    questions: List[str] = Field(..., min_length=1)
+
+    @model_validator(mode="after")
+    def check_questions(self):
+        if any(not question.strip() or len(question) > 1000 for question in self.questions):
+            raise ValueError("Each question must have 1 to 1000 characters")
+        return self
+
 class Citation(BaseModel):
-    """Citation with page number and text"""
+    """Citation with source resource, page range and text"""
     page: int
+    page_end: Optional[int] = None
     text: str
     relevance_score: float
+    resource_id: Optional[str] = None
+    filename: Optional[str] = None
 
 class ChatResponse(BaseModel):
     """Response model for chat"""
     answer: str
     citations: List[Citation]
-    resource_id: str
+    resource_id: Optional[str] = None
+    resource_ids: List[str] = []
 
 class ResourceInfo(BaseModel):
     """Resource metadata"""
@@ -37,6 +63,56 @@ class ResourceInfo(BaseModel):
     upload_date: str
     status: str
     chunk_count: int
+    size_bytes: int
+    fingerprint: str
+    exam_tag: Optional[str] = None
+    error: Optional[str] = None
+    updated_at: str
+
+class ResourceList(BaseModel):
+    """One page of resources, newest first"""
+    resources: List[ResourceInfo]
+    next_cursor: Optional[str] = None
+
+class StageProgress(BaseModel):
+    """Progress of a single ingestion stage"""
+    status: str
+    done: int
+    total: int
+
+class ResourceStatus(BaseModel):
+    """Ingestion status of a resource"""
+    resource_id: str
+    filename: str
+    status: str
+    stages: Dict[str, StageProgress]
+    page_count: int
+    chunk_count: int
+    changes: Optional[Dict[str, int]] = None  # reused/added/deleted chunks of a re-index
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+class BatchAnswer(BaseModel):
+    """Answer (or error) for one question of a batch"""
+    index: int
+    question: str
+    answer: Optional[str] = None
+    citations: List[Citation] = []
+    error: Optional[str] = None
+
+class BatchJobStatus(BaseModel):
+    """Progress of a background batch job; results are in question order"""
+    job_id: str
+    resource_id: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+    results: Optional[List[BatchAnswer]] = None
 
 class ErrorResponse(BaseModel):
     """Error response model"""
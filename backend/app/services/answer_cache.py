@@ -0,0 +1,336 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class QueryEmbeddingCache:
+    """Exact-match LRU cache with TTL for question embeddings"""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @staticmethod
+    def _key(question: str) -> str:
+        return re.sub(r"\s+", " ", question).strip().casefold()
+
+    def get(self, question: str) -> Optional[List[float]]:
+        key = self._key(question)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, question: str, embedding: List[float]):
+        key = self._key(question)
+        self._entries[key] = (embedding, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class _ResourceAnswers:
+    """Cached answers for one resource with a stacked matrix of unit question vectors"""
+
+    def __init__(self):
+        self.entries: List[Dict] = []
+        self.matrix: Optional[np.ndarray] = None
+
+    def rebuild(self):
+        self.matrix = (
+            np.stack([entry["vector"] for entry in self.entries])
+            if self.entries else None
+        )
+
+
+class SemanticAnswerCache:
+    """
+    Per-resource answer cache matched by question-embedding similarity
+
+    A lookup returns the stored answer and citations of the most similar
+    cached question when its cosine similarity reaches `threshold`.
+    Entries expire after ttl_seconds; the oldest are dropped once a
+    resource holds max_entries_per_resource answers.
+
+    Invalidating a resource bumps its generation. Callers take the
+    generation before retrieving and pass it to put, which drops the
+    answer if the resource changed in between.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries_per_resource: int = 256,
+        ttl_seconds: float = 86400
+    ):
+        self.threshold = threshold
+        self.max_entries_per_resource = max_entries_per_resource
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._resources: Dict[str, _ResourceAnswers] = {}
+        self._generations: Dict[str, int] = {}
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, resource_id: str, embedding: List[float]) -> Optional[Dict]:
+        """Cached {'answer', 'citations'} for a similar question, if any"""
+        answers = self._resources.get(resource_id)
+        if answers is None or answers.matrix is None:
+            self.misses += 1
+            return None
+
+        scores = answers.matrix @ self._normalize(embedding)
+        best = int(np.argmax(scores))
+        entry = answers.entries[best]
+
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+        if time.monotonic() - entry["created"] > self.ttl_seconds:
+            del answers.entries[best]
+            answers.rebuild()
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {"answer": entry["answer"], "citations": entry["citations"]}
+
+    def generation(self, resource_id: str) -> int:
+        """Current generation of a resource's answers, bumped by invalidate"""
+        return self._generations.get(resource_id, 0)
+
+    def put(
+        self,
+        resource_id: str,
+        embedding: List[float],
+        answer: str,
+        citations: List[Dict],
+        generation: Optional[int] = None
+    ) -> bool:
+        """Store an answer, unless the resource was invalidated since `generation`"""
+        if generation is not None and generation != self.generation(resource_id):
+            return False
+        answers = self._resources.setdefault(resource_id, _ResourceAnswers())
+        answers.entries.append({
+            "vector": self._normalize(embedding),
+            "answer": answer,
+            "citations": citations,
+            "created": time.monotonic(),
+        })
+        del answers.entries[:-self.max_entries_per_resource]
+        answers.rebuild()
+        return True
+
+    def invalidate(self, resource_id: str):
+        """Forget every cached answer for a resource (re-indexed or deleted)"""
+        self._resources.pop(resource_id, None)
+        self._generations[resource_id] = self.generation(resource_id) + 1
+
+    # In memory, so the async variants run inline on the event loop
+    async def get_async(self, *args, **kwargs) -> Optional[Dict]:
+        return self.get(*args, **kwargs)
+
+    async def generation_async(self, *args, **kwargs) -> int:
+        return self.generation(*args, **kwargs)
+
+    async def put_async(self, *args, **kwargs) -> bool:
+        return self.put(*args, **kwargs)
+
+    async def invalidate_async(self, *args, **kwargs):
+        self.invalidate(*args, **kwargs)
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "resources": len(self._resources),
+            "entries": sum(len(answers.entries) for answers in self._resources.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SharedAnswerCache(SemanticAnswerCache):
+    """
+    SemanticAnswerCache backed by SQLite, shared by the app's worker processes
+
+    Answers are stored in the database and every process keeps the
+    in-memory matrices of SemanticAnswerCache. Before a lookup, a process
+    pulls the answers stored for the resource since its last lookup (one
+    indexed query), so an answer generated by any worker serves all of
+    them. Invalidating a resource deletes its answers and bumps its
+    generation, and each process drops its copy on its next lookup.
+
+    The async variants run in a helper thread, keeping SQLite off the
+    event loop; the lock serializes them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.95,
+        max_entries_per_resource: int = 256,
+        ttl_seconds: float = 86400
+    ):
+        super().__init__(threshold, max_entries_per_resource, ttl_seconds)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " resource_id TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " citations TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_resource ON answers (resource_id, id)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answer_generations ("
+            " resource_id TEXT PRIMARY KEY,"
+            " generation INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+        # resource_id -> (generation, id of the last answer pulled)
+        self._synced: Dict[str, tuple] = {}
+
+    def _stored_generation(self, resource_id: str) -> int:
+        row = self._conn.execute(
+            "SELECT generation FROM answer_generations WHERE resource_id = ?", (resource_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _sync(self, resource_id: str):
+        """Pull answers other processes stored for a resource since the last sync (under the lock)"""
+        generation = self._stored_generation(resource_id)
+        synced_generation, last_id = self._synced.get(resource_id, (None, 0))
+        if generation != synced_generation:
+            self._resources.pop(resource_id, None)
+            last_id = 0
+        rows = self._conn.execute(
+            "SELECT id, vector, answer, citations, created FROM answers"
+            " WHERE resource_id = ? AND id > ? ORDER BY id",
+            (resource_id, last_id)
+        ).fetchall()
+        self._synced[resource_id] = (generation, rows[-1][0] if rows else last_id)
+
+        if not rows:
+            return
+        answers = self._resources.setdefault(resource_id, _ResourceAnswers())
+        # Stored times are wall-clock; entries expire on the monotonic clock
+        offset = time.monotonic() - time.time()
+        answers.entries.extend(
+            {
+                "vector": np.frombuffer(vector, dtype=np.float32),
+                "answer": answer,
+                "citations": json.loads(citations),
+                "created": created + offset,
+            }
+            for _, vector, answer, citations, created in rows
+        )
+        del answers.entries[:-self.max_entries_per_resource]
+        answers.rebuild()
+
+    def get(self, resource_id: str, embedding: List[float]) -> Optional[Dict]:
+        with self._lock:
+            self._sync(resource_id)
+            return super().get(resource_id, embedding)
+
+    def generation(self, resource_id: str) -> int:
+        with self._lock:
+            return self._stored_generation(resource_id)
+
+    def put(
+        self,
+        resource_id: str,
+        embedding: List[float],
+        answer: str,
+        citations: List[Dict],
+        generation: Optional[int] = None
+    ) -> bool:
+        now = time.time()
+        with self._lock:
+            # Holds the write lock from the generation check to the insert,
+            # so another process can't invalidate in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            if generation is not None and generation != self._stored_generation(resource_id):
+                self._conn.rollback()
+                return False
+            self._conn.execute(
+                "INSERT INTO answers (resource_id, vector, answer, citations, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (resource_id, self._normalize(embedding).tobytes(), answer, json.dumps(citations), now)
+            )
+            # Keep the newest max_entries_per_resource unexpired answers
+            self._conn.execute(
+                "DELETE FROM answers WHERE resource_id = ? AND (created < ? OR id <= ("
+                " SELECT id FROM answers WHERE resource_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?))",
+                (resource_id, now - self.ttl_seconds, resource_id, self.max_entries_per_resource)
+            )
+            self._conn.commit()
+            self._sync(resource_id)
+            return True
+
+    def invalidate(self, resource_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE resource_id = ?", (resource_id,))
+            self._conn.execute(
+                "INSERT INTO answer_generations (resource_id, generation) VALUES (?, 1)"
+                " ON CONFLICT (resource_id) DO UPDATE SET generation = generation + 1",
+                (resource_id,)
+            )
+            self._conn.commit()
+            self._synced.pop(resource_id, None)
+            super().invalidate(resource_id)
+
+    async def get_async(self, *args, **kwargs) -> Optional[Dict]:
+        return await asyncio.to_thread(self.get, *args, **kwargs)
+
+    async def generation_async(self, *args, **kwargs) -> int:
+        return await asyncio.to_thread(self.generation, *args, **kwargs)
+
+    async def put_async(self, *args, **kwargs) -> bool:
+        return await asyncio.to_thread(self.put, *args, **kwargs)
+
+    async def invalidate_async(self, *args, **kwargs):
+        await asyncio.to_thread(self.invalidate, *args, **kwargs)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
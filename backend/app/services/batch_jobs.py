@@ -0,0 +1,125 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .rag_service import RAGService
+
+
+class BatchLimitError(Exception):
+    """Raised when too many batch jobs are already running"""
+
+
+class BatchJob:
+    """Progress and results of one batch of questions about a resource"""
+
+    def __init__(self, resource_id: str, questions: List[str]):
+        self.job_id = str(uuid.uuid4())
+        self.resource_id = resource_id
+        self.questions = questions
+        self.status = "running"  # running | completed | failed | cancelled
+        self.results: List[Dict] = []
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.updated_at = self.created_at
+
+    def to_dict(self, include_results: bool = True) -> Dict:
+        job = {
+            "job_id": self.job_id,
+            "resource_id": self.resource_id,
+            "status": self.status,
+            "total": len(self.questions),
+            "completed": len(self.results),
+            "failed": sum("error" in result for result in self.results),
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if include_results:
+            job["results"] = sorted(self.results, key=lambda result: result["index"])
+        return job
+
+
+class BatchJobManager:
+    """Runs batch question jobs in the background and keeps their results in memory"""
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        max_running: int = 4,
+        max_finished_jobs: int = 100,
+        concurrency: int = 8,
+        top_k: int = 5
+    ):
+        self.rag_service = rag_service
+        self.max_running = max_running
+        self.max_finished_jobs = max_finished_jobs
+        self.concurrency = concurrency
+        self.top_k = top_k
+
+        self._jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, resource_id: str, questions: List[str]) -> BatchJob:
+        """
+        Start answering a batch of questions in the background
+
+        Raises:
+            BatchLimitError: If max_running jobs are already running
+        """
+        if len(self._tasks) >= self.max_running:
+            raise BatchLimitError("Too many batch jobs running, retry later")
+
+        job = BatchJob(resource_id, questions)
+        self._jobs[job.job_id] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        self._evict_finished_jobs()
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a running job; returns whether it was running"""
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    async def stop(self):
+        """Cancel running jobs"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: BatchJob):
+        try:
+            async for result in self.rag_service.answer_batch(
+                job.questions, job.resource_id, top_k=self.top_k, concurrency=self.concurrency
+            ):
+                job.results.append(result)
+                job.updated_at = datetime.now().isoformat()
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.updated_at = datetime.now().isoformat()
+
+    def _evict_finished_jobs(self):
+        """Forget the oldest finished jobs beyond the retention limit"""
+        finished = [job_id for job_id in self._jobs if job_id not in self._tasks]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
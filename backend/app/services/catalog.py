@@ -0,0 +1,194 @@
+import base64
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Resource lifecycle states that can serve a duplicate upload
+_LIVE_STATUSES = ("queued", "processing", "completed")
+
+
+class ResourceCatalog:
+    """SQLite record of ingested resources, indexed by file fingerprint"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Worker processes starting together would race on the column checks
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resources ("
+            " resource_id TEXT PRIMARY KEY,"
+            " filename TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " page_count INTEGER NOT NULL DEFAULT 0,"
+            " chunk_count INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " created_at TEXT NOT NULL,"
+            " updated_at TEXT NOT NULL)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(resources)")}
+        if "exam_tag" not in columns:
+            # Catalogs created before exam tags existed
+            self._conn.execute("ALTER TABLE resources ADD COLUMN exam_tag TEXT")
+        if "size_bytes" not in columns:
+            self._conn.execute("ALTER TABLE resources ADD COLUMN size_bytes INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_resources_fingerprint ON resources (fingerprint)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_resources_exam_tag ON resources (exam_tag)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_resources_created ON resources (created_at, resource_id)"
+        )
+        self._conn.commit()
+
+    def add(
+        self,
+        resource_id: str,
+        filename: str,
+        fingerprint: str,
+        status: str = "queued",
+        exam_tag: Optional[str] = None,
+        size_bytes: int = 0
+    ):
+        """Insert or reset a resource record"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resources"
+                " (resource_id, filename, fingerprint, status, exam_tag, size_bytes, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (resource_id, filename, fingerprint, status, exam_tag, size_bytes, now, now)
+            )
+            self._conn.commit()
+
+    def update(self, resource_id: str, **fields):
+        """Update status / page_count / chunk_count / error / exam_tag for a resource"""
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE resources SET {assignments} WHERE resource_id = ?",
+                (*fields.values(), resource_id)
+            )
+            self._conn.commit()
+
+    def fail_unfinished(self, error: str) -> int:
+        """Mark resources left queued or processing (e.g. by a restart) as failed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE resources SET status = 'failed', error = ?, updated_at = ?"
+                " WHERE status IN ('queued', 'processing')",
+                (error, datetime.now().isoformat())
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def get(self, resource_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM resources WHERE resource_id = ?", (resource_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_by_fingerprint(self, fingerprint: str) -> Optional[Dict]:
+        """Most recent queued, processing or completed resource with this fingerprint"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM resources WHERE fingerprint = ?"
+                f" AND status IN ({','.join('?' * len(_LIVE_STATUSES))})"
+                " ORDER BY created_at DESC LIMIT 1",
+                (fingerprint, *_LIVE_STATUSES)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_by_exam_tag(self, exam_tag: str) -> List[Dict]:
+        """Completed resources carrying an exam tag, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM resources WHERE exam_tag = ? AND status = 'completed'"
+                " ORDER BY created_at",
+                (exam_tag,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def recently_updated(self, limit: int) -> List[Dict]:
+        """Completed resources, most recently updated first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM resources WHERE status = 'completed'"
+                " ORDER BY updated_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of resources, newest first, and the cursor of the next page
+
+        Pages are keyed on (created_at, resource_id) rather than an offset,
+        so each page is one index range scan however deep it is.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        clauses, params = [], []
+        if cursor is not None:
+            clauses.append("(created_at, resource_id) < (?, ?)")
+            params.extend(self._decode_cursor(cursor))
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM resources{where}"
+                " ORDER BY created_at DESC, resource_id DESC LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+
+        records = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = records[-1]
+            next_cursor = self._encode_cursor(last["created_at"], last["resource_id"])
+        return records, next_cursor
+
+    @staticmethod
+    def _encode_cursor(created_at: str, resource_id: str) -> str:
+        return base64.urlsafe_b64encode(json.dumps([created_at, resource_id]).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, str]:
+        try:
+            created_at, resource_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return str(created_at), str(resource_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    def delete(self, resource_id: str) -> bool:
+        """Remove a resource record; returns whether it existed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM resources WHERE resource_id = ?", (resource_id,)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,201 @@
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:  # optional: only needed for exact token counts
+    Tokenizer = None
+
+# Approximates subword pieces: runs of up to 4 word characters, or one symbol
+_PIECE_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+# A sentence ends at . ! or ? followed by whitespace and an uppercase letter, digit or opening quote
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+
+_NUMBERED_HEADING_RE = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.|[A-Z]\.)\s+\S")
+_KEYWORD_HEADING_RE = re.compile(
+    r"^(?:chapter|section|part|unit|appendix|lesson|module)\s+\w+", re.IGNORECASE
+)
+
+
+class TokenCounter:
+    """
+    Counts tokens with a Hugging Face `tokenizer.json` (e.g. the embedding
+    model's) when one is given, otherwise with a regex estimate of subword
+    pieces that slightly overcounts English text.
+    """
+
+    def __init__(self, tokenizer_path: Optional[str] = None):
+        self.tokenizer = None
+        if tokenizer_path:
+            if Tokenizer is None:
+                raise ValueError("The tokenizers package is required for tokenizer_path")
+            self.tokenizer = Tokenizer.from_file(tokenizer_path)
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        if self.tokenizer is not None:
+            encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+            return [len(encoding.ids) for encoding in encodings]
+        return [len(_PIECE_RE.findall(text)) for text in texts]
+
+
+class _Unit(NamedTuple):
+    """A heading or sentence (or a piece of an overlong sentence)"""
+    text: str
+    page: int
+    tokens: int
+    heading: bool
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > 80 or line[-1] in ".,;":
+        return False
+    if _NUMBERED_HEADING_RE.match(line) or _KEYWORD_HEADING_RE.match(line):
+        return True
+    return len(line) >= 4 and line.isupper()
+
+
+class StructuredChunker:
+    """
+    Token-budgeted chunker that splits on sentences and headings
+
+    Pages are split into headings and sentences, counted in one batch per
+    page, and packed greedily into chunks of at most chunk_size tokens.
+    A heading starts a new chunk unless the current one is still small,
+    and consecutive chunks share up to chunk_overlap tokens of whole
+    sentences. Chunks run across page boundaries and record the pages
+    they span. Sentences longer than chunk_size are cut at word
+    boundaries. The whole pass is linear in the text length.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        counter: Optional[TokenCounter] = None,
+        min_chunk_tokens: Optional[int] = None
+    ):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.counter = counter or TokenCounter()
+        self.min_chunk_tokens = chunk_size // 4 if min_chunk_tokens is None else min_chunk_tokens
+
+    def _segments(self, text: str) -> Iterator[Tuple[str, bool]]:
+        """(text, is_heading) segments of a page in reading order"""
+        paragraph: List[str] = []
+
+        def flush():
+            if paragraph:
+                for sentence in _SENTENCE_SPLIT_RE.split(" ".join(paragraph)):
+                    yield sentence, False
+                paragraph.clear()
+
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line:
+                yield from flush()
+            elif _is_heading(line):
+                yield from flush()
+                yield line, True
+            else:
+                paragraph.append(line)
+        yield from flush()
+
+    def _units(self, page_num: int, text: str) -> List[_Unit]:
+        segments = list(self._segments(text))
+        counts = self.counter.count_many([segment for segment, _ in segments])
+
+        units = []
+        for (segment, heading), tokens in zip(segments, counts):
+            if tokens <= self.chunk_size:
+                units.append(_Unit(segment, page_num, tokens, heading))
+            else:
+                units.extend(self._split_long(segment, page_num))
+        return units
+
+    def _split_long(self, text: str, page_num: int) -> List[_Unit]:
+        """Cut an overlong sentence into word windows of at most chunk_size tokens"""
+        words = text.split()
+        ends = np.cumsum(self.counter.count_many(words))
+
+        pieces = []
+        start, consumed = 0, 0
+        while start < len(words):
+            # Last word that still fits in the budget (at least one word per piece)
+            end = max(int(np.searchsorted(ends, consumed + self.chunk_size, side="right")), start + 1)
+            pieces.append(_Unit(" ".join(words[start:end]), page_num, int(ends[end - 1] - consumed), False))
+            consumed = int(ends[end - 1])
+            start = end
+        return pieces
+
+    @staticmethod
+    def _join(units: List[_Unit]) -> str:
+        parts = []
+        for i, unit in enumerate(units):
+            if i:
+                parts.append("\n" if unit.heading or units[i - 1].heading else " ")
+            parts.append(unit.text)
+        return "".join(parts)
+
+    def iter_chunks(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Dict]:
+        """
+        Incrementally chunk (page_num, text) pairs, e.g. from iter_pages
+
+        Yields:
+            Chunk dictionaries with text, page (first page), page_end,
+            word_count and token_count
+        """
+        chunk_id = 0
+        current: List[_Unit] = []
+        tokens = 0
+        fresh = 0  # units not already emitted as overlap
+
+        def emit():
+            return {
+                'chunk_id': chunk_id,
+                'page': current[0].page,
+                'page_end': current[-1].page,
+                'text': self._join(current),
+                'word_count': sum(len(unit.text.split()) for unit in current),
+                'token_count': tokens,
+            }
+
+        for page_num, text in pages:
+            for unit in self._units(page_num, text):
+                if current and unit.heading and tokens >= self.min_chunk_tokens:
+                    if fresh:
+                        yield emit()
+                        chunk_id += 1
+                    current, tokens, fresh = [], 0, 0
+                elif current and tokens + unit.tokens > self.chunk_size:
+                    if fresh:
+                        yield emit()
+                        chunk_id += 1
+                    current, tokens = self._overlap(current, unit.tokens)
+                    fresh = 0
+
+                current.append(unit)
+                tokens += unit.tokens
+                fresh += 1
+
+        if fresh:
+            yield emit()
+
+    def _overlap(self, units: List[_Unit], incoming: int) -> Tuple[List[_Unit], int]:
+        """Trailing whole sentences (<= chunk_overlap tokens) to repeat in the next chunk"""
+        tail: List[_Unit] = []
+        tokens = 0
+        for unit in reversed(units):
+            if tokens + unit.tokens > self.chunk_overlap:
+                break
+            tail.append(unit)
+            tokens += unit.tokens
+
+        if tokens + incoming > self.chunk_size:
+            return [], 0
+        tail.reverse()
+        return tail, tokens
@@ -0,0 +1,155 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .chunker import TokenCounter
+
+# Longest chunk overlap looked for, in words (chunk_overlap is 50 tokens)
+_MAX_OVERLAP_WORDS = 200
+
+_WORD_RE = re.compile(r"\S+")
+
+
+def _overlap_words(left: List[str], right: List[str]) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`"""
+    for size in range(min(len(left), len(right), _MAX_OVERLAP_WORDS), 0, -1):
+        if left[-size:] == right[:size]:
+            return size
+    return 0
+
+
+class ContextPacker:
+    """
+    Fits retrieved chunks and conversation history into token budgets
+
+    Chunks that are neighbours in their document (consecutive chunk ids of
+    one resource) are merged into one passage with the repeated overlap
+    removed. Passages are then added in order of their best relevance
+    until context_budget tokens are used; the first passage that does not
+    fit is cut at a word boundary if enough budget is left. History keeps
+    the most recent messages that fit history_budget tokens.
+    """
+
+    def __init__(
+        self,
+        context_budget: int = 3000,
+        history_budget: int = 1000,
+        counter: Optional[TokenCounter] = None,
+        min_fragment_tokens: int = 64
+    ):
+        self.context_budget = context_budget
+        self.history_budget = history_budget
+        self.counter = counter or TokenCounter()
+        self.min_fragment_tokens = min_fragment_tokens
+        self.stats = {"requests": 0, "tokens_in": 0, "tokens_out": 0}
+
+    def _merge_neighbours(self, chunks: List[Dict]) -> List[Dict]:
+        """Passages of document-adjacent chunks, best relevance first"""
+        order = sorted(
+            range(len(chunks)),
+            key=lambda i: (str(chunks[i].get('resource_id')), chunks[i]['chunk_id'])
+        )
+
+        passages: List[Dict] = []
+        previous = None
+        for i in order:
+            chunk = chunks[i]
+            spans = list(_WORD_RE.finditer(chunk['text']))
+            words = [span.group() for span in spans]
+            adjacent = (
+                previous is not None
+                and chunk.get('resource_id') == previous.get('resource_id')
+                and chunk['chunk_id'] == previous['chunk_id'] + 1
+            )
+            if adjacent:
+                passage = passages[-1]
+                overlap = _overlap_words(passage['words'], words)
+                if overlap < len(words):
+                    rest = chunk['text'][spans[overlap].start():]
+                    passage['text'] = f"{passage['text']} {rest}"
+                    passage['words'].extend(words[overlap:])
+                passage['page_end'] = max(passage['page_end'], chunk.get('page_end', chunk['page']))
+                passage['relevance_score'] = max(passage['relevance_score'], chunk['relevance_score'])
+            else:
+                passages.append({
+                    **chunk,
+                    'page_end': chunk.get('page_end', chunk['page']),
+                    'words': words,
+                })
+            previous = chunk
+
+        passages.sort(key=lambda passage: passage['relevance_score'], reverse=True)
+        return passages
+
+    def pack_chunks(self, chunks: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """
+        Passages to put in the prompt, best first, and token accounting
+
+        Returns:
+            (passages, {"tokens_in", "tokens_out"}) where tokens_in counts
+            the chunks as retrieved
+        """
+        tokens_in = sum(self.counter.count_many([chunk['text'] for chunk in chunks]))
+
+        packed: List[Dict] = []
+        used = 0
+        for passage in self._merge_neighbours(chunks):
+            words = passage.pop('words')
+            text = passage['text']
+            tokens = self.counter.count_many([text])[0]
+
+            if used + tokens > self.context_budget:
+                remaining = self.context_budget - used
+                if remaining < self.min_fragment_tokens:
+                    break
+                # Keep the leading words that fit the remaining budget
+                ends = np.cumsum(self.counter.count_many(words))
+                keep = int(np.searchsorted(ends, remaining, side="right"))
+                if not keep:
+                    break
+                last_word = list(_WORD_RE.finditer(text))[keep - 1]
+                text = text[:last_word.end()] + " ..."
+                tokens = int(ends[keep - 1])
+
+            packed.append({**passage, 'text': text})
+            used += tokens
+            if used >= self.context_budget:
+                break
+
+        self.stats["requests"] += 1
+        self.stats["tokens_in"] += tokens_in
+        self.stats["tokens_out"] += used
+        return packed, {"tokens_in": tokens_in, "tokens_out": used}
+
+    def pack_history(self, history: Optional[List[Dict]]) -> Tuple[List[Dict], Dict]:
+        """
+        Most recent messages within history_budget tokens, oldest first
+
+        Returns:
+            (messages, {"tokens_in", "tokens_out"})
+        """
+        messages = [
+            {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+            for msg in history or []
+        ]
+        counts = self.counter.count_many([msg["content"] for msg in messages])
+
+        kept = []
+        used = 0
+        for msg, tokens in zip(reversed(messages), reversed(counts)):
+            if used + tokens > self.history_budget:
+                break
+            kept.append(msg)
+            used += tokens
+        kept.reverse()
+
+        self.stats["tokens_in"] += sum(counts)
+        self.stats["tokens_out"] += used
+        return kept, {"tokens_in": sum(counts), "tokens_out": used}
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "tokens_saved": self.stats["tokens_in"] - self.stats["tokens_out"],
+        }
@@ -1,45 +1,293 @@
-from mistralai import Mistral
-from typing import List
+from mistralai import Mistral, models
+from typing import Dict, List, Optional, Tuple
+from collections import Counter, deque
+from .embedding_cache import EmbeddingCache
+from .metrics import span, EMBEDDED_TEXTS, EMBED_BATCH_SIZE, EMBED_QUEUE_DELAY
+import asyncio
+import random
+import time
+import httpx
 import numpy as np
 
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
 class EmbeddingService:
     """Service for generating embeddings using Mistral AI"""
     
-    def __init__(self, api_key: str, model: str = "mistral-embed"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "mistral-embed",
+        server_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_batch_items: int = 32,
+        max_batch_tokens: int = 8000,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 20.0,
+        cache: Optional[EmbeddingCache] = None,
+        single_batch_window_ms: float = 0.0,
+        single_batch_max_items: int = 32
+    ):
         if not api_key:
             raise ValueError("Mistral API key is required")
         
-        self.client = Mistral(api_key=api_key)
+        self.client = Mistral(api_key=api_key, server_url=server_url, async_client=http_client)
         self.model = model
+        self.max_batch_items = max_batch_items
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.cache = cache
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # Throughput counters
+        self.stats = {
+            "texts": 0,
+            "requests": 0,
+            "retries": 0,
+            "busy_seconds": 0.0,
+            "tokens_saved": 0,
+        }
+        
+        # Micro-batching of concurrent generate_single_embedding calls
+        self.single_batch_window = single_batch_window_ms / 1000
+        self.single_batch_max_items = max(1, single_batch_max_items)
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks = set()
+        self._batch_sizes: Counter = Counter()
+        self._queue_delays = deque(maxlen=10_000)  # seconds, most recent calls
     
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for a list of texts
         
+        Texts found in the cache are served from it; only the remaining
+        (deduplicated) texts are sent to the provider, split into batches
+        by item count and estimated token budget, sent concurrently (at
+        most max_concurrency in flight) and returned in input order.
+        
         Args:
             texts: List of text strings to embed
             
         Returns:
             List of embedding vectors
         """
+        if not texts:
+            return []
+        
         try:
-            # Mistral AI embeddings API
-            response = self.client.embeddings.create(
-                model=self.model,
-                inputs=texts
-            )
+            if self.cache is not None:
+                cached = await asyncio.to_thread(self.cache.get_many, self.model, texts)
+            else:
+                cached = [None] * len(texts)
             
-            # Extract embeddings from response
-            embeddings = [item.embedding for item in response.data]
-            return embeddings
+            misses = list(dict.fromkeys(
+                text for text, vector in zip(texts, cached) if vector is None
+            ))
+            self.stats["tokens_saved"] += sum(
+                self.estimate_tokens(text)
+                for text, vector in zip(texts, cached) if vector is not None
+            )
+            EMBEDDED_TEXTS.labels("cache").inc(len(texts) - sum(vector is None for vector in cached))
+            EMBEDDED_TEXTS.labels("provider").inc(len(misses))
+            if not misses:
+                return cached
             
+            fresh = await self._embed_uncached(misses)
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.put_many, self.model, misses, fresh)
         except Exception as e:
             raise Exception(f"Failed to generate embeddings: {str(e)}")
+        
+        by_text = dict(zip(misses, fresh))
+        return [
+            vector if vector is not None else by_text[text]
+            for text, vector in zip(texts, cached)
+        ]
+    
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the provider in concurrent batches"""
+        started = time.perf_counter()
+        batches = self._split_batches(texts)
+        results = await asyncio.gather(*(
+            self._embed_batch(batch) for batch in batches
+        ))
+        
+        self.stats["texts"] += len(texts)
+        self.stats["busy_seconds"] += time.perf_counter() - started
+        
+        # gather preserves batch order and batches are contiguous slices
+        return [embedding for batch in results for embedding in batch]
     
     async def generate_single_embedding(self, text: str) -> List[float]:
-        """Generate embedding for a single text"""
-        embeddings = await self.generate_embeddings([text])
-        return embeddings[0]
+        """
+        Generate embedding for a single text
+        
+        With a micro-batch window, concurrent calls are queued for up to
+        single_batch_window_ms (or until single_batch_max_items are
+        waiting) and embedded together in one generate_embeddings call.
+        """
+        if self.single_batch_window <= 0:
+            embeddings = await self.generate_embeddings([text])
+            return embeddings[0]
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        if len(self._pending) >= self.single_batch_max_items:
+            self._dispatch_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.single_batch_window, self._dispatch_pending)
+        return await future
+    
+    def _dispatch_pending(self):
+        """Start embedding the queued single texts as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        
+        task = asyncio.get_running_loop().create_task(self._embed_pending(pending))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _embed_pending(self, pending: List[Tuple[str, asyncio.Future, float]]):
+        """Embed one micro-batch and resolve each caller's future"""
+        dispatched = time.perf_counter()
+        self._batch_sizes[len(pending)] += 1
+        EMBED_BATCH_SIZE.observe(len(pending))
+        for _, _, enqueued in pending:
+            self._queue_delays.append(dispatched - enqueued)
+            EMBED_QUEUE_DELAY.observe(dispatched - enqueued)
+        
+        try:
+            embeddings = await self.generate_embeddings([text for text, _, _ in pending])
+        except Exception as e:
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        # Callers that timed out or were cancelled have already given up
+        for (_, future, _), embedding in zip(pending, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+    
+    def micro_batch_stats(self) -> Dict:
+        """Batch size distribution and queueing delay of single-text calls"""
+        batches = sum(self._batch_sizes.values())
+        items = sum(size * count for size, count in self._batch_sizes.items())
+        stats = {
+            "window_ms": self.single_batch_window * 1000,
+            "max_items": self.single_batch_max_items,
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+            "batch_sizes": {str(size): self._batch_sizes[size] for size in sorted(self._batch_sizes)},
+            "queue_delay_ms": None,
+        }
+        if self._queue_delays:
+            delays = np.array(self._queue_delays) * 1000
+            stats["queue_delay_ms"] = {
+                "avg": round(float(delays.mean()), 2),
+                "p50": round(float(np.percentile(delays, 50)), 2),
+                "p95": round(float(np.percentile(delays, 95)), 2),
+                "max": round(float(delays.max()), 2),
+            }
+        return stats
+    
+    def throughput(self) -> float:
+        """Texts embedded by the provider per second of request time"""
+        if not self.stats["busy_seconds"]:
+            return 0.0
+        return self.stats["texts"] / self.stats["busy_seconds"]
+    
+    def get_stats(self) -> Dict:
+        """Counters plus derived throughput in texts/sec and cache hit rate"""
+        stats = {**self.stats, "texts_per_second": round(self.throughput(), 1)}
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        if self.single_batch_window > 0:
+            stats["micro_batching"] = self.micro_batch_stats()
+        return stats
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Cheap token estimate (~4 characters per token)"""
+        return len(text) // 4 + 1
+    
+    def _split_batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into contiguous batches within the count and token limits"""
+        batches = []
+        current: List[str] = []
+        current_tokens = 0
+        
+        for text in texts:
+            tokens = self.estimate_tokens(text)
+            if current and (
+                len(current) >= self.max_batch_items
+                or current_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, retrying rate limits and transient failures"""
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                try:
+                    self.stats["requests"] += 1
+                    with span("embed_request"):
+                        response = await self.client.embeddings.create_async(
+                            model=self.model,
+                            inputs=texts
+                        )
+                    # Items carry their index; sort in case the provider reorders
+                    data = sorted(response.data, key=lambda item: item.index or 0)
+                    return [item.embedding for item in data]
+                except (models.SDKError, httpx.TransportError) as e:
+                    if attempt >= self.max_retries or not self._is_retryable(e):
+                        raise
+                    delay = self._retry_delay(e, attempt)
+            
+            # Back off outside the semaphore so other batches can proceed
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, httpx.TransportError):
+            return True
+        return error.status_code in RETRYABLE_STATUS_CODES
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Exponential backoff with full jitter, honouring Retry-After"""
+        raw_response = getattr(error, "raw_response", None)
+        if raw_response is not None:
+            retry_after = raw_response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.retry_max_delay)
+                except ValueError:
+                    pass
+        
+        ceiling = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
     
     @staticmethod
     def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
@@ -55,4 +303,3 @@ class EmbeddingService:
             return 0.0
         
         return float(dot_product / (norm1 * norm2))
-
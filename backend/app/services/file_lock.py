@@ -0,0 +1,51 @@
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; locking is skipped there
+    fcntl = None
+
+
+class InterProcessLock:
+    """
+    Advisory lock (flock) on a file shared by the processes using a store
+
+    Writers hold it exclusively and readers shared, so a worker process
+    never reads a file another one is halfway through writing. Use it
+    under the store's own thread lock: nested holds in one process only
+    count depth, and the outermost hold's mode applies.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._fd = None
+        self._depth = 0
+
+    @contextmanager
+    def hold(self, exclusive: bool = True):
+        if fcntl is None:
+            yield
+            return
+        if self._depth == 0:
+            if self._fd is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+def file_signature(path: Path):
+    """(inode, size, mtime) of a file, or None if it does not exist; changes on append or replace"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
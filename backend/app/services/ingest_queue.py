@@ -0,0 +1,146 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class SharedIngestQueue:
+    """
+    SQLite-backed ingestion queue shared by the app's worker processes
+
+    Any worker can queue a job; idle ingestion workers in every process
+    claim the oldest queued job in a write transaction, so each job runs
+    exactly once. The worker running a job stores its progress (the job's
+    status dict) on the row and refreshes a heartbeat, so status can be
+    served by any process. Jobs whose heartbeat stops (their process
+    died) are failed by the other workers after stale_seconds.
+
+    One row is kept per resource and replaced when it is queued again.
+    """
+
+    def __init__(self, path: str, stale_seconds: float = 60.0):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.stale_seconds = stale_seconds
+        self._lock = threading.Lock()
+        # Autocommit, so claims can open their own write transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_jobs ("
+            " resource_id TEXT PRIMARY KEY,"
+            " filename TEXT NOT NULL,"
+            " file_path TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " replace INTEGER NOT NULL,"
+            " target_path TEXT,"
+            " state TEXT NOT NULL,"
+            " owner TEXT,"
+            " job TEXT,"
+            " created_at TEXT NOT NULL,"
+            " heartbeat REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ingest_jobs_state ON ingest_jobs (state, created_at)"
+        )
+
+    def put(
+        self,
+        status: Dict,
+        file_path: str,
+        fingerprint: str,
+        replace: bool,
+        target_path: Optional[str] = None
+    ):
+        """Queue a job, given its initial status dict"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingest_jobs"
+                " (resource_id, filename, file_path, fingerprint, replace, target_path,"
+                " state, job, created_at, heartbeat)"
+                " VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (
+                    status["resource_id"], status["filename"], file_path, fingerprint,
+                    int(replace), target_path, json.dumps(status), status["created_at"], time.time()
+                )
+            )
+
+    def claim(self, owner: str) -> Optional[Dict]:
+        """Mark the oldest queued job as processing by owner and return its row, if any"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM ingest_jobs WHERE state = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE ingest_jobs SET state = 'processing', owner = ?, heartbeat = ?"
+                        " WHERE resource_id = ?",
+                        (owner, time.time(), row["resource_id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dict(row) if row else None
+
+    def save(self, resource_id: str, owner: str, status: Dict):
+        """Store the progress of a job owner is running (also its heartbeat)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingest_jobs SET state = ?, job = ?, heartbeat = ?"
+                " WHERE resource_id = ? AND owner = ?",
+                (status["status"], json.dumps(status), time.time(), resource_id, owner)
+            )
+
+    def get(self, resource_id: str) -> Optional[Dict]:
+        """Last stored status dict of a resource's job"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job FROM ingest_jobs WHERE resource_id = ?", (resource_id,)
+            ).fetchone()
+        return json.loads(row["job"]) if row and row["job"] else None
+
+    def depth(self) -> int:
+        """Jobs waiting to be claimed"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM ingest_jobs WHERE state = 'queued'"
+            ).fetchone()[0]
+
+    def fail_stale(self, error: str) -> List[str]:
+        """Fail processing jobs whose owner stopped sending heartbeats; returns their resource ids"""
+        cutoff = time.time() - self.stale_seconds
+        failed = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT resource_id, job FROM ingest_jobs WHERE state = 'processing' AND heartbeat < ?",
+                (cutoff,)
+            ).fetchall()
+            for row in rows:
+                status = json.loads(row["job"])
+                status.update(status="failed", error=error)
+                # Skipped if the owner saved progress in the meantime
+                cursor = self._conn.execute(
+                    "UPDATE ingest_jobs SET state = 'failed', job = ?"
+                    " WHERE resource_id = ? AND state = 'processing' AND heartbeat < ?",
+                    (json.dumps(status), row["resource_id"], cutoff)
+                )
+                if cursor.rowcount:
+                    failed.append(row["resource_id"])
+        return failed
+
+    def forget(self, resource_id: str):
+        """Drop a finished job, e.g. once its resource is deleted"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM ingest_jobs WHERE resource_id = ? AND state IN ('completed', 'failed')",
+                (resource_id,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,639 @@
+import asyncio
+import os
+import socket
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from .pdf_processor import PDFProcessor
+from .embeddings import EmbeddingService
+from .vector_store import VectorStore, chunk_hash
+from .catalog import ResourceCatalog
+from .answer_cache import SemanticAnswerCache
+from .ingest_queue import SharedIngestQueue
+from .metrics import span, INGESTED_CHUNKS, INGESTED_PAGES, INGESTION_JOBS
+
+# Pipeline stages, in execution order
+STAGES = ("extract", "chunk", "embed", "index")
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept more jobs"""
+
+
+class IngestionJob:
+    """Progress and result of a single PDF ingestion"""
+
+    def __init__(
+        self,
+        resource_id: str,
+        filename: str,
+        file_path: str,
+        fingerprint: str = "",
+        replace: bool = False,
+        target_path: Optional[str] = None
+    ):
+        self.resource_id = resource_id
+        self.filename = filename
+        self.file_path = file_path
+        self.fingerprint = fingerprint
+        self.replace = replace  # re-index an existing resource in place
+        # Where file_path is moved once the job succeeds (a re-index reads the
+        # new PDF from a staging path, leaving the indexed one in place)
+        self.target_path = target_path
+        self.status = "queued"  # queued | processing | completed | failed
+        self.stages = {
+            name: {"status": "pending", "done": 0, "total": 0}
+            for name in STAGES
+        }
+        self.page_count = 0
+        self.chunk_count = 0
+        # Chunks reused, added (embedded) and deleted by an incremental re-index
+        self.changes: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.updated_at = self.created_at
+
+    def start_stage(self, stage: str, total: int = 0):
+        self.stages[stage].update(status="running", total=total)
+        self.updated_at = datetime.now().isoformat()
+
+    def advance_stage(self, stage: str, done: int):
+        self.stages[stage]["done"] = done
+        self.updated_at = datetime.now().isoformat()
+
+    def finish_stage(self, stage: str):
+        progress = self.stages[stage]
+        progress.update(status="completed", done=progress["total"])
+        self.updated_at = datetime.now().isoformat()
+
+    def fail(self, error: str):
+        for progress in self.stages.values():
+            if progress["status"] == "running":
+                progress["status"] = "failed"
+        self.status = "failed"
+        self.error = error
+        self.updated_at = datetime.now().isoformat()
+
+    def to_dict(self) -> Dict:
+        return {
+            "resource_id": self.resource_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stages": {name: dict(progress) for name, progress in self.stages.items()},
+            "page_count": self.page_count,
+            "chunk_count": self.chunk_count,
+            "changes": self.changes,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class IngestionManager:
+    """
+    Runs PDF ingestion jobs on a bounded pool of background workers
+
+    Jobs wait in an in-process queue, or with a SharedIngestQueue in one
+    queue shared by every app worker process: workers poll it for jobs
+    (every poll_interval seconds, or at once for jobs submitted in their
+    own process) and publish the progress of the jobs they run to it every
+    heartbeat_interval seconds.
+    """
+
+    def __init__(
+        self,
+        pdf_processor: PDFProcessor,
+        embedding_service: EmbeddingService,
+        vector_store: VectorStore,
+        catalog: Optional[ResourceCatalog] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        max_queue_size: int = 16,
+        num_workers: int = 2,
+        process_workers: int = 2,
+        embed_batch_size: int = 64,
+        max_finished_jobs: int = 1000,
+        shared_queue: Optional[SharedIngestQueue] = None,
+        poll_interval: float = 0.5,
+        heartbeat_interval: float = 2.0
+    ):
+        self.pdf_processor = pdf_processor
+        self.embedding_service = embedding_service
+        self.vector_store = vector_store
+        self.catalog = catalog
+        self.answer_cache = answer_cache
+        self.num_workers = num_workers
+        self.process_workers = process_workers
+        self.embed_batch_size = embed_batch_size
+        self.max_finished_jobs = max_finished_jobs
+        self.max_queue_size = max_queue_size
+        self.shared_queue = shared_queue
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        # Identifies this process's claims on the shared queue
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._workers = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._submitted = asyncio.Event()
+        self._swept_at = 0.0
+        # Shared queue depth as of the last refresh_queue_depth
+        self._shared_depth = 0
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    async def start(self):
+        """Start the process pool and worker tasks"""
+        if self.shared_queue is not None:
+            # Other processes may be running jobs; only fail those whose owner is gone
+            await self._fail_stale_jobs()
+        elif self.catalog is not None:
+            # Jobs lost in a restart are not resumed
+            await asyncio.to_thread(self.catalog.fail_unfinished, "Ingestion was interrupted")
+
+        self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.num_workers)
+        ]
+        if self.shared_queue is not None:
+            self._heartbeat = asyncio.create_task(self._publish_progress())
+
+    async def stop(self):
+        """Cancel workers and shut down the process pool"""
+        tasks = [*self._workers, *([self._heartbeat] if self._heartbeat else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    async def submit(
+        self,
+        resource_id: str,
+        filename: str,
+        file_path: str,
+        fingerprint: str = "",
+        replace: bool = False,
+        exam_tag: Optional[str] = None,
+        size_bytes: int = 0,
+        target_path: Optional[str] = None
+    ) -> IngestionJob:
+        """
+        Queue a PDF for ingestion
+
+        Args:
+            resource_id: Resource to ingest into
+            filename: Original upload filename
+            file_path: Path of the stored PDF
+            fingerprint: SHA-256 of the file, recorded in the catalog
+            replace: Re-index an existing resource, re-embedding only the
+                chunks whose text is not already stored
+            exam_tag: Optional group used to query several resources at once
+            size_bytes: Size of the stored PDF, recorded in the catalog
+            target_path: Where to move file_path once the job succeeds; a
+                failed job deletes file_path instead
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        job = IngestionJob(resource_id, filename, file_path, fingerprint, replace, target_path)
+
+        if self.shared_queue is not None:
+            # The bound is approximate across processes
+            if await asyncio.to_thread(self.shared_queue.depth) >= self.max_queue_size:
+                raise QueueFullError("Ingestion queue is full, retry later")
+            # Recorded first: a worker in another process may claim the job at once
+            await asyncio.to_thread(self._catalog_queued, job, exam_tag, size_bytes)
+            await asyncio.to_thread(
+                self.shared_queue.put, job.to_dict(), file_path, fingerprint, replace, target_path
+            )
+            self._submitted.set()
+            return job
+
+        if self._queue.full():
+            raise QueueFullError("Ingestion queue is full, retry later")
+        # Recorded first, so the worker's updates land after it
+        await asyncio.to_thread(self._catalog_queued, job, exam_tag, size_bytes)
+        self._jobs[resource_id] = job
+        self._evict_finished_jobs()
+        # Another submit may have taken the last slot meanwhile; wait for one
+        # rather than leave the catalog record queued without a job
+        await self._queue.put(job)
+        return job
+
+    def _catalog_queued(self, job: IngestionJob, exam_tag: Optional[str], size_bytes: int):
+        if self.catalog is None:
+            return
+        if job.replace:
+            # Filename, fingerprint and counts stay those of the indexed PDF
+            # until the re-index succeeds
+            self.catalog.update(job.resource_id, status="queued", error=None, exam_tag=exam_tag)
+        else:
+            self.catalog.add(job.resource_id, job.filename, job.fingerprint, exam_tag=exam_tag, size_bytes=size_bytes)
+
+    def get_job(self, resource_id: str) -> Optional[IngestionJob]:
+        """Get the ingestion job for a resource, if known"""
+        return self._jobs.get(resource_id)
+
+    async def forget(self, resource_id: str):
+        """Drop a finished job, e.g. once its resource is deleted"""
+        job = self._jobs.get(resource_id)
+        if job is not None and job.status in ("completed", "failed"):
+            del self._jobs[resource_id]
+        if self.shared_queue is not None:
+            await asyncio.to_thread(self.shared_queue.forget, resource_id)
+
+    def get_status(self, resource_id: str) -> Optional[Dict]:
+        """Live job status, falling back to the catalog for older resources"""
+        job = self._jobs.get(resource_id)
+        # With a shared queue, finished local jobs may since have been re-run elsewhere
+        if job is not None and (self.shared_queue is None or job.status == "processing"):
+            return job.to_dict()
+        if self.shared_queue is not None:
+            status = self.shared_queue.get(resource_id)
+            if status is not None:
+                return status
+        if self.catalog is None:
+            return None
+
+        record = self.catalog.get(resource_id)
+        if record is None:
+            return None
+
+        status = record["status"]
+        totals = {
+            "extract": record["page_count"],
+            "chunk": record["chunk_count"],
+            "embed": record["chunk_count"],
+            "index": record["chunk_count"],
+        }
+        return {
+            "resource_id": resource_id,
+            "filename": record["filename"],
+            "status": status,
+            "stages": {
+                name: {
+                    "status": status if status == "completed" else "pending",
+                    "done": totals[name] if status == "completed" else 0,
+                    "total": totals[name],
+                }
+                for name in STAGES
+            },
+            "page_count": record["page_count"],
+            "chunk_count": record["chunk_count"],
+            "error": record["error"],
+            "created_at": record["created_at"],
+            "updated_at": record["updated_at"],
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting; with a shared queue, as of the last refresh_queue_depth"""
+        if self.shared_queue is not None:
+            return self._shared_depth
+        return self._queue.qsize()
+
+    async def refresh_queue_depth(self) -> int:
+        """Count the jobs waiting (in a helper thread for the shared queue) and return queue_depth"""
+        if self.shared_queue is not None:
+            self._shared_depth = await asyncio.to_thread(self.shared_queue.depth)
+        return self.queue_depth
+
+    @property
+    def workers_alive(self) -> int:
+        return sum(not worker.done() for worker in self._workers)
+
+    def _evict_finished_jobs(self):
+        """Forget the oldest finished jobs beyond the retention limit"""
+        finished = [
+            resource_id for resource_id, job in self._jobs.items()
+            if job.status in ("completed", "failed")
+        ]
+        for resource_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[resource_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+            try:
+                with span("ingest_job"):
+                    await self._process(job)
+            except Exception as e:
+                job.fail(str(e))
+            INGESTION_JOBS.labels(job.status).inc()
+
+            try:
+                await self._record(job)
+            except Exception as e:
+                print(f"⚠️ Failed to record ingestion result for {job.resource_id}: {e}")
+            finally:
+                if self.shared_queue is None:
+                    self._queue.task_done()
+
+    async def _next_job(self) -> IngestionJob:
+        """Wait for the next job of the in-process queue, or claim one from the shared queue"""
+        if self.shared_queue is None:
+            return await self._queue.get()
+
+        while True:
+            if time.monotonic() - self._swept_at > self.shared_queue.stale_seconds / 2:
+                await self._fail_stale_jobs()
+            self._submitted.clear()
+            record = await asyncio.to_thread(self.shared_queue.claim, self.owner)
+            if record is not None:
+                break
+            try:
+                await asyncio.wait_for(self._submitted.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        job = IngestionJob(
+            record["resource_id"], record["filename"], record["file_path"],
+            record["fingerprint"], bool(record["replace"]), record["target_path"]
+        )
+        job.created_at = record["created_at"]
+        self._jobs[job.resource_id] = job
+        self._evict_finished_jobs()
+        return job
+
+    async def _fail_stale_jobs(self):
+        """Fail shared-queue jobs left running by a process that died"""
+        self._swept_at = time.monotonic()
+        error = "Ingestion was interrupted"
+        failed = await asyncio.to_thread(self.shared_queue.fail_stale, error)
+        if self.catalog is not None:
+            for resource_id in failed:
+                await asyncio.to_thread(self.catalog.update, resource_id, status="failed", error=error)
+        if failed:
+            print(f"⚠️ Failed {len(failed)} ingestion jobs abandoned by a stopped worker")
+
+    async def _publish_progress(self):
+        """Store the progress of running jobs in the shared queue (their heartbeat)"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            for job in [job for job in self._jobs.values() if job.status == "processing"]:
+                try:
+                    await asyncio.to_thread(self.shared_queue.save, job.resource_id, self.owner, job.to_dict())
+                except Exception as e:
+                    print(f"⚠️ Failed to publish ingestion progress for {job.resource_id}: {e}")
+
+    async def _record(self, job: IngestionJob):
+        """Persist the job outcome to the catalog (and then the shared queue)"""
+        if self.catalog is not None:
+            fields = {
+                "status": job.status,
+                "page_count": job.page_count,
+                "chunk_count": job.chunk_count,
+                "error": job.error,
+            }
+            if job.replace and job.status == "failed":
+                # Only the job failed: the previous index is still served
+                fields = {"status": "completed", "error": job.error}
+            elif job.status == "completed":
+                # A re-index records its new PDF only once it succeeds
+                fields.update(
+                    filename=job.filename,
+                    fingerprint=job.fingerprint,
+                    size_bytes=os.path.getsize(job.file_path)
+                )
+            await asyncio.to_thread(self.catalog.update, job.resource_id, **fields)
+        if self.shared_queue is not None:
+            await asyncio.to_thread(self.shared_queue.save, job.resource_id, self.owner, job.to_dict())
+
+    async def _process(self, job: IngestionJob):
+        job.status = "processing"
+        if self.shared_queue is not None:
+            await asyncio.to_thread(self.shared_queue.save, job.resource_id, self.owner, job.to_dict())
+        if self.catalog is not None:
+            await asyncio.to_thread(self.catalog.update, job.resource_id, status="processing")
+        try:
+            previous = []
+            if job.replace:
+                previous = await self.vector_store.get_chunk_hashes_async(job.resource_id)
+                # Nothing stored (e.g. its first ingestion failed): index from scratch
+                job.replace = bool(previous)
+            await self._run_pipeline(job, previous)
+        except Exception:
+            # Drop any batches that were indexed before the failure; a
+            # re-index writes nothing until it finishes, so the resource's
+            # previous index is kept
+            if not job.replace:
+                await self.vector_store.delete_document_async(job.resource_id)
+            if job.target_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            raise
+        finally:
+            # Answers cached against the old (or partial) index are stale
+            if job.replace and self.answer_cache is not None:
+                await self.answer_cache.invalidate_async(job.resource_id)
+
+        if job.target_path:
+            os.replace(job.file_path, job.target_path)
+            job.file_path = job.target_path
+
+        job.status = "completed"
+        job.updated_at = datetime.now().isoformat()
+
+    async def _run_pipeline(self, job: IngestionJob, previous: List[Optional[Dict]]):
+        """
+        Stream pages -> chunks -> embeddings -> index in bounded batches
+
+        Only one batch of chunks and embeddings is held at a time, so peak
+        memory depends on embed_batch_size rather than document size.
+        Page ranges are parsed on the process pool (CPU-bound); the
+        blocking generator steps run in helper threads and index writes on
+        the vector store's executor.
+
+        When re-indexing a resource (previous holds its stored chunk
+        hashes) the new chunks are diffed against the stored ones instead;
+        see _index_changes. The changed chunks and their vectors are held
+        until extraction ends and then applied in one step, so the stored
+        index is never left half re-indexed.
+        """
+        page_count = await asyncio.to_thread(self.pdf_processor.get_page_count, job.file_path)
+        job.start_stage("extract", total=page_count)
+        for stage in ("chunk", "embed", "index"):
+            job.start_stage(stage)
+
+        def on_extract_progress(pages_done: int, page_count: int):
+            job.advance_stage("extract", pages_done)
+
+        pages_with_text = 0
+
+        def count_pages(pages):
+            nonlocal pages_with_text
+            for page in pages:
+                pages_with_text += 1
+                yield page
+
+        chunks = self.pdf_processor.iter_chunks(count_pages(
+            self.pdf_processor.iter_pages(job.file_path, self._process_pool, on_extract_progress)
+        ))
+        metadata = {
+            "filename": job.filename,
+            "page_count": page_count,
+            "upload_date": job.created_at
+        }
+
+        diff = _ChunkDiff(previous) if previous else None
+
+        while True:
+            with span("pdf_extract_chunk"):
+                batch = await asyncio.to_thread(_take, chunks, self.embed_batch_size)
+            if not batch:
+                break
+            for chunk in batch:
+                chunk["hash"] = chunk_hash(chunk["text"])
+            # Chunk count is only known once extraction ends, so downstream
+            # totals track the chunks produced so far
+            produced = job.stages["chunk"]["done"] + len(batch)
+            for stage in ("chunk", "embed", "index"):
+                job.stages[stage]["total"] = produced
+            job.advance_stage("chunk", produced)
+
+            if diff is not None:
+                await self._index_changes(job, diff, batch, metadata)
+                continue
+
+            with span("embed_chunks"):
+                embeddings = await self.embedding_service.generate_embeddings([c["text"] for c in batch])
+            job.advance_stage("embed", job.stages["embed"]["done"] + len(batch))
+
+            job.chunk_count += await self.vector_store.add_document_chunks_async(
+                job.resource_id,
+                batch,
+                embeddings,
+                metadata
+            )
+            job.advance_stage("index", job.chunk_count)
+
+        if not pages_with_text:
+            raise Exception("No text extracted")
+        if diff is not None:
+            await self.vector_store.apply_reindex_async(
+                job.resource_id,
+                diff.changed,
+                diff.vectors,
+                job.chunk_count,
+                diff.chunks,
+                metadata
+            )
+            job.changes = diff.summary()
+            print(
+                f"📦 Re-indexed {job.resource_id}: {job.changes['reused']} chunks reused, "
+                f"{job.changes['added']} added, {job.changes['deleted']} deleted"
+            )
+        job.page_count = pages_with_text
+        INGESTED_PAGES.inc(pages_with_text)
+        INGESTED_CHUNKS.inc(job.chunk_count)
+
+        for stage in STAGES:
+            job.finish_stage(stage)
+
+
+    async def _index_changes(self, job: IngestionJob, diff: "_ChunkDiff", batch: List[Dict], metadata: Dict):
+        """
+        Stage one batch of a re-index, embedding only chunks with new text
+
+        Chunks stored at the same position with the same text and pages are
+        left alone. Chunks whose text is stored elsewhere (e.g. shifted by
+        an edit earlier in the document) are staged for their new position
+        with the stored vector.
+        """
+        changed, reused_from, new = diff.classify(batch)
+
+        vectors = {}
+        if reused_from:
+            stored = await self.vector_store.get_chunk_embeddings_async(
+                job.resource_id, list(reused_from.values())
+            )
+            vectors.update(zip(reused_from, stored))
+        if new:
+            with span("embed_chunks"):
+                embeddings = await self.embedding_service.generate_embeddings([c["text"] for c in new])
+            vectors.update(zip((c["chunk_id"] for c in new), embeddings))
+        job.advance_stage("embed", job.stages["embed"]["done"] + len(batch))
+
+        diff.stage(batch, changed, vectors)
+        job.chunk_count += len(batch)
+        job.advance_stage("index", job.chunk_count)
+
+
+class _ChunkDiff:
+    """Stored chunk hashes of a resource being re-indexed, and the changes staged so far"""
+
+    def __init__(self, previous: List[Optional[Dict]]):
+        self.previous = previous
+        self.old_hashes = Counter(entry["hash"] for entry in previous if entry)
+        self.new_hashes: Counter = Counter()
+        # Hash -> a stored chunk_id with that text (the store is not written
+        # until the re-index is applied)
+        self.stored_at = {}
+        for chunk_id, entry in enumerate(previous):
+            if entry:
+                self.stored_at.setdefault(entry["hash"], chunk_id)
+        # Hash -> vector of text first embedded by this re-index
+        self.embedded: Dict[str, List[float]] = {}
+        self.added = 0
+        # Chunks to write and their vectors
+        self.changed: List[Dict] = []
+        self.vectors: List[List[float]] = []
+        # Every new chunk, for the lexical index rebuilt at the end
+        self.chunks: List[Dict] = []
+
+    def classify(self, batch: List[Dict]):
+        """
+        Split a batch into (chunks to write, {chunk_id: stored chunk_id to
+        take the vector from}, chunks to embed)
+        """
+        changed, reused_from, new = [], {}, []
+        for chunk in batch:
+            chunk_id = chunk["chunk_id"]
+            entry = self.previous[chunk_id] if chunk_id < len(self.previous) else None
+            if entry and entry["hash"] == chunk["hash"] and (
+                entry["page"], entry["page_end"]
+            ) == (chunk["page"], chunk.get("page_end", chunk["page"])):
+                continue
+            changed.append(chunk)
+            if chunk["hash"] in self.stored_at:
+                reused_from[chunk_id] = self.stored_at[chunk["hash"]]
+            elif chunk["hash"] not in self.embedded:
+                new.append(chunk)
+        self.added += len(new)
+        return changed, reused_from, new
+
+    def stage(self, batch: List[Dict], changed: List[Dict], vectors: Dict[int, List[float]]):
+        """Hold a classified batch's changes, given the vectors of its reused and embedded chunks"""
+        for chunk in changed:
+            vector = vectors.get(chunk["chunk_id"])
+            if vector is None:
+                # Same text as a chunk embedded earlier in this re-index
+                vector = self.embedded[chunk["hash"]]
+            elif chunk["hash"] not in self.stored_at:
+                self.embedded.setdefault(chunk["hash"], vector)
+            self.changed.append(chunk)
+            self.vectors.append(vector)
+        for chunk in batch:
+            self.new_hashes[chunk["hash"]] += 1
+            self.chunks.append({key: chunk[key] for key in ("chunk_id", "page", "page_end", "text")})
+
+    def summary(self) -> Dict:
+        return {
+            "reused": len(self.chunks) - self.added,
+            "added": self.added,
+            "deleted": sum((self.old_hashes - self.new_hashes).values()),
+        }
+
+
+def _take(iterator: Iterator, n: int) -> List:
+    """Pull up to n items from an iterator"""
+    return list(islice(iterator, n))
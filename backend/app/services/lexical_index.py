@@ -0,0 +1,202 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .file_lock import InterProcessLock, file_signature
+
+# Keeps section numbers, formulas and hyphenated names ("4.2.1", "h2o", "x-ray") whole
+_TOKEN_RE = re.compile(r"\w+(?:[.\-]\w+)*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in is it of on or "
+    "that the this to was what when where which who why with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of a text, without stopwords"""
+    return [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], top_k: int, k: int = 60) -> List[Dict]:
+    """
+    Fuse ranked chunk lists with reciprocal rank fusion
+
+    A chunk scores sum(1 / (k + rank)) over the lists it appears in. The
+    fused relevance_score is scaled so a chunk ranked first in every list
+    scores 1.0. Chunk fields come from the first list that contains it.
+    """
+    fused: Dict[tuple, Dict] = {}
+    scores: Dict[tuple, float] = {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results, start=1):
+            key = (chunk.get('resource_id'), chunk['chunk_id'])
+            fused.setdefault(key, chunk)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+
+    best = len(result_lists) / (k + 1)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{**fused[key], 'relevance_score': scores[key] / best} for key in ranked]
+
+
+class _LoadedIndex:
+    """In-memory postings for one resource"""
+
+    def __init__(self, docs: List[Dict], signature: Optional[tuple] = None):
+        self.docs = docs
+        self.signature = signature  # of the resource's file when loaded
+        self.lengths = np.array([doc['length'] for doc in docs], dtype=np.float32)
+        self.avg_length = float(self.lengths.mean()) if docs else 0.0
+
+        postings: Dict[str, List[tuple]] = {}
+        for i, doc in enumerate(docs):
+            for term, count in doc['tf'].items():
+                postings.setdefault(term, []).append((i, count))
+        self.postings = {
+            term: (
+                np.array([i for i, _ in entries], dtype=np.int32),
+                np.array([count for _, count in entries], dtype=np.float32),
+            )
+            for term, entries in postings.items()
+        }
+
+
+class LexicalIndex:
+    """
+    Per-resource BM25 index
+
+    Each resource has an append-only `<resource_id>.jsonl` file holding,
+    per chunk, its text, page, filename and term frequencies. Postings are
+    built from that file the first time a resource is searched and kept
+    for the most recently used max_loaded resources, and rebuilt when the
+    file changes on disk (written by another worker process; writes and
+    loads are serialized across processes with a flock on `.lock`).
+    """
+
+    def __init__(self, directory: str, k1: float = 1.5, b: float = 0.75, max_loaded: int = 64):
+        self.root = Path(directory)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self.max_loaded = max_loaded
+        self._lock = threading.RLock()
+        self._file_lock = InterProcessLock(self.root / ".lock")
+        self._loaded: "OrderedDict[str, _LoadedIndex]" = OrderedDict()
+
+    def _path(self, resource_id: str) -> Path:
+        # Resource ids become file names; refuse anything path-like
+        if not resource_id or os.sep in resource_id or resource_id in (".", ".."):
+            raise ValueError(f"Invalid resource id: {resource_id!r}")
+        return self.root / f"{resource_id}.jsonl"
+
+    @staticmethod
+    def _lines(chunks: List[Dict], metadata: Dict) -> List[str]:
+        lines = []
+        for chunk in chunks:
+            terms = tokenize(chunk['text'])
+            lines.append(json.dumps({
+                'chunk_id': chunk['chunk_id'],
+                'page': chunk['page'],
+                'page_end': chunk.get('page_end', chunk['page']),
+                'filename': metadata.get('filename', ''),
+                'text': chunk['text'],
+                'length': len(terms),
+                'tf': Counter(terms),
+            }) + "\n")
+        return lines
+
+    def add(self, resource_id: str, chunks: List[Dict], metadata: Dict):
+        """Append chunks to a resource's index"""
+        lines = self._lines(chunks, metadata)
+        path = self._path(resource_id)
+        with self._lock, self._file_lock.hold():
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            self._loaded.pop(resource_id, None)
+
+    def replace(self, resource_id: str, chunks: List[Dict], metadata: Dict):
+        """Swap a resource's index for one of these chunks in a single rename"""
+        lines = self._lines(chunks, metadata)
+        path = self._path(resource_id)
+        tmp_path = path.with_suffix(".tmp")
+        with self._lock, self._file_lock.hold():
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(tmp_path, path)
+            self._loaded.pop(resource_id, None)
+
+    def _load(self, resource_id: str) -> Optional[_LoadedIndex]:
+        with self._lock:
+            path = self._path(resource_id)
+            index = self._loaded.get(resource_id)
+            if index is not None:
+                if index.signature == file_signature(path):
+                    self._loaded.move_to_end(resource_id)
+                    return index
+                del self._loaded[resource_id]
+
+            with self._file_lock.hold(exclusive=False):
+                signature = file_signature(path)
+                if signature is None:
+                    return None
+                with open(path, encoding="utf-8") as f:
+                    index = _LoadedIndex([json.loads(line) for line in f], signature)
+
+            self._loaded[resource_id] = index
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+            return index
+
+    def warm(self, resource_id: str) -> bool:
+        """Build a resource's postings ahead of its first search"""
+        return self._load(resource_id) is not None
+
+    def search(self, query: str, resource_id: str, top_k: int = 5) -> List[Dict]:
+        """BM25 top-k chunks of a resource, in the vector store's result format"""
+        index = self._load(resource_id)
+        terms = [term for term in set(tokenize(query)) if index and term in index.postings]
+        if not terms:
+            return []
+
+        count = len(index.docs)
+        scores = np.zeros(count, dtype=np.float32)
+        for term in terms:
+            rows, tf = index.postings[term]
+            idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * index.lengths[rows] / index.avg_length)
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        matched = np.flatnonzero(scores)
+        top = matched[np.argsort(-scores[matched], kind="stable")[:top_k]]
+        return [
+            {
+                'text': index.docs[i]['text'],
+                'page': index.docs[i]['page'],
+                'page_end': index.docs[i].get('page_end', index.docs[i]['page']),
+                'chunk_id': index.docs[i]['chunk_id'],
+                'resource_id': resource_id,
+                'filename': index.docs[i]['filename'],
+                'relevance_score': float(scores[i]),
+            }
+            for i in top
+        ]
+
+    def delete(self, resource_id: str) -> bool:
+        """Remove a resource's index"""
+        path = self._path(resource_id)
+        with self._lock, self._file_lock.hold():
+            self._loaded.pop(resource_id, None)
+            if not path.exists():
+                return False
+            path.unlink()
+            return True
@@ -0,0 +1,303 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; covers sub-millisecond index lookups up to minute-long ingestion steps
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# A callback returns (name, type, help, [(labels, value), ...]) families at scrape time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Metrics of the process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._callbacks: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_callback(self, callback: Callable[[], Iterable[Family]]):
+        """Add families computed at scrape time, e.g. from a service's get_stats()"""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def clear_callbacks(self):
+        with self._lock:
+            self._callbacks.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+
+        for callback in list(self._callbacks):
+            try:
+                families = list(callback())
+            except Exception as e:
+                print(f"⚠️ Metrics callback failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[MetricsRegistry] = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values: str):
+        """Child metric for one combination of label values"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            for suffix, extra, value in child.samples():
+                lines.append(f"{self.name}{suffix}{_format_labels({**labels, **extra})} {_format_value(value)}")
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self):
+        return [("", {}, self.value)]
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        samples = []
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            samples.append(("_bucket", {"le": _format_value(float(bound))}, cumulative))
+        samples.append(("_sum", {}, total))
+        samples.append(("_count", {}, count))
+        return samples
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[MetricsRegistry] = None
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+# -------------------------
+# Pipeline metrics
+# -------------------------
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request duration until the response body ends", ("method", "route")
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being handled", ("method", "route")
+)
+STAGE_DURATION = Histogram(
+    "rag_stage_duration_seconds", "Time spent in each pipeline stage", ("stage",)
+)
+STAGE_ERRORS = Counter(
+    "rag_stage_errors_total", "Pipeline stages that raised", ("stage",)
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "rag_time_to_first_token_seconds", "Streamed answers: time from the question to the first answer token"
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Chat completion tokens reported by the provider", ("kind",)
+)
+CONTEXT_TOKENS_SAVED = Histogram(
+    "rag_context_tokens_saved", "Prompt tokens removed by the context packer, per request",
+    buckets=(0, 100, 250, 500, 1000, 2000, 4000, 8000)
+)
+EMBEDDED_TEXTS = Counter(
+    "embedding_texts_total", "Texts embedded, by where the vector came from", ("source",)
+)
+EMBED_BATCH_SIZE = Histogram(
+    "embedding_microbatch_size", "Questions per micro-batched embeddings call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+EMBED_QUEUE_DELAY = Histogram(
+    "embedding_microbatch_queue_seconds", "Time a question waits for its micro-batch to be sent",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+INGESTED_PAGES = Counter("ingestion_pages_total", "PDF pages with text ingested")
+INGESTED_CHUNKS = Counter("ingestion_chunks_total", "Chunks indexed by ingestion")
+INGESTION_JOBS = Counter("ingestion_jobs_total", "Finished ingestion jobs by outcome", ("status",))
+
+# Stage durations of the current request, used for the Server-Timing header
+_trace: ContextVar[Optional[Dict[str, float]]] = ContextVar("trace", default=None)
+
+
+def start_trace() -> Dict[str, float]:
+    """Collect span durations for the current request (and tasks it starts)"""
+    trace: Dict[str, float] = {}
+    _trace.set(trace)
+    return trace
+
+
+class span:
+    """
+    Times a block as one pipeline stage
+
+        with span("retrieve"):
+            ...
+
+    The duration goes to rag_stage_duration_seconds{stage} and to the
+    current request's trace, if any; exceptions count in rag_stage_errors_total.
+    """
+
+    __slots__ = ("stage", "_histogram", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._histogram = STAGE_DURATION.labels(stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self._histogram.observe(elapsed)
+        if exc_type is not None and exc_type is not GeneratorExit:
+            STAGE_ERRORS.labels(self.stage).inc()
+        trace = _trace.get()
+        if trace is not None:
+            trace[self.stage] = trace.get(self.stage, 0.0) + elapsed
+        return False
+
+
+def cache_families(caches: Dict[str, Optional[object]]) -> List[Family]:
+    """Hit, miss and entry families for caches exposing get_stats()"""
+    stats = {name: cache.get_stats() for name, cache in caches.items() if cache is not None}
+    return [
+        ("cache_hits_total", "counter", "Cache lookups that hit",
+         [({"cache": name}, s["hits"]) for name, s in stats.items()]),
+        ("cache_misses_total", "counter", "Cache lookups that missed",
+         [({"cache": name}, s["misses"]) for name, s in stats.items()]),
+        ("cache_entries", "gauge", "Entries held in each cache",
+         [({"cache": name}, s["entries"]) for name, s in stats.items()]),
+    ]
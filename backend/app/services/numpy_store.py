@@ -0,0 +1,551 @@
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .file_lock import InterProcessLock, file_signature
+from .lexical_index import LexicalIndex
+from .quantization import QUANTIZERS, QuantizedVectors, quantization_kinds
+from .vector_store import VectorStore, chunk_hash
+
+
+def _normalized(embeddings: List[List[float]]) -> np.ndarray:
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    return vectors
+
+
+def _data_files(resource_dir: Path, meta: Dict):
+    """(vectors, chunks) paths of the version of a resource's files named in its meta.json"""
+    version = meta.get("version", 0)
+    suffix = f".{version}" if version else ""
+    return resource_dir / f"vectors{suffix}.f32", resource_dir / f"chunks{suffix}.jsonl"
+
+
+class _ResourceIndex:
+    """Loaded vectors and chunk metadata for one resource"""
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        chunks: List[Dict],
+        quantized: Optional[QuantizedVectors] = None,
+        signature: Optional[tuple] = None,
+        chunks_path: Optional[Path] = None
+    ):
+        self.matrix = matrix
+        self.chunks = chunks
+        self.quantized = quantized
+        self.signature = signature  # of meta.json and the chunks file when loaded
+        self.chunks_path = chunks_path
+        self.quantized_path: Optional[Path] = None
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact per-resource vector search with NumPy
+
+    Each resource is stored in its own directory as a contiguous float32
+    matrix of L2-normalized rows (`vectors.f32`, memory-mapped on load)
+    plus its chunk metadata (`chunks.jsonl`). Rewrites (re-indexing) write
+    a new numbered pair (`vectors.<n>.f32`, `chunks.<n>.jsonl`) and switch
+    to it by replacing `meta.json`, so the pair always changes together.
+    A query is one mat-vec
+    product over the resource's rows and an argpartition for top-k, which
+    is exact and for a few thousand chunks faster than a filtered HNSW
+    search on a shared collection. Resources are loaded on first query and
+    the max_loaded most recently used stay in memory.
+
+    With quantization ("float16", "int8" or "pq") a compact copy of the
+    vectors (`quantized-<kind>[.<n>].npz`, built on first load) is scanned
+    instead, and the best top_k * rerank_factor candidates are re-scored
+    against the float32 rows. Only those rows of the memory-mapped matrix
+    are read, so the float32 vectors stay on disk.
+
+    Several worker processes can share one store directory: writes hold an
+    exclusive flock on `.lock` and loads a shared one, and a loaded
+    resource is reloaded once its meta or chunks file has changed on disk
+    (another process appended to, rewrote or deleted it).
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        max_workers: int = 4,
+        lexical_index: Optional[LexicalIndex] = None,
+        max_loaded: int = 128,
+        quantization: str = "none",
+        rerank_factor: int = 4,
+        pq_subvectors: int = 64
+    ):
+        super().__init__(max_workers, lexical_index)
+        if quantization not in quantization_kinds():
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.root = Path(persist_directory)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_loaded = max_loaded
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self.pq_subvectors = pq_subvectors
+        self._lock = threading.RLock()
+        self._file_lock = InterProcessLock(self.root / ".lock")
+        self._loaded: "OrderedDict[str, _ResourceIndex]" = OrderedDict()
+        # Resource id -> lock held by the thread loading it
+        self._building: Dict[str, threading.Lock] = {}
+
+    def _resource_dir(self, resource_id: str) -> Path:
+        # Resource ids become directory names; refuse anything path-like
+        if not resource_id or os.sep in resource_id or resource_id in (".", ".."):
+            raise ValueError(f"Invalid resource id: {resource_id!r}")
+        return self.root / resource_id
+
+    def add_document_chunks(
+        self,
+        resource_id: str,
+        chunks: List[Dict],
+        embeddings: List[List[float]],
+        metadata: Dict
+    ) -> int:
+        """Append chunks and their normalized vectors to the resource's files"""
+        try:
+            self._append(resource_id, chunks, _normalized(embeddings), metadata)
+            self._index_lexical(resource_id, chunks, metadata)
+            return len(chunks)
+
+        except Exception as e:
+            raise Exception(f"Failed to add chunks to vector store: {str(e)}")
+
+    def _append(self, resource_id: str, chunks: List[Dict], vectors: np.ndarray, metadata: Dict):
+        resource_dir = self._resource_dir(resource_id)
+        with self._lock, self._file_lock.hold():
+            resource_dir.mkdir(parents=True, exist_ok=True)
+            meta_path = resource_dir / "meta.json"
+            if meta_path.exists():
+                meta = json.loads(meta_path.read_text())
+                if vectors.shape[1] != meta["dim"]:
+                    raise ValueError(f"Expected {meta['dim']}-dim vectors, got {vectors.shape[1]}")
+            else:
+                meta = {"dim": int(vectors.shape[1])}
+                meta_path.write_text(json.dumps(meta))
+
+            vectors_path, chunks_path = _data_files(resource_dir, meta)
+            with open(vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(chunks_path, "a", encoding="utf-8") as f:
+                for chunk in chunks:
+                    f.write(json.dumps(self._chunk_record(chunk, metadata)) + "\n")
+
+            self._loaded.pop(resource_id, None)
+
+    @staticmethod
+    def _chunk_record(chunk: Dict, metadata: Dict) -> Dict:
+        return {
+            'chunk_id': chunk['chunk_id'],
+            'page': chunk['page'],
+            'page_end': chunk.get('page_end', chunk['page']),
+            'word_count': chunk['word_count'],
+            'text': chunk['text'],
+            'filename': metadata.get('filename', ''),
+            'hash': chunk.get('hash') or chunk_hash(chunk['text']),
+        }
+
+    def _read(self, resource_dir: Path):
+        """(dim, chunks, vectors) read from disk, or None if the resource has no files"""
+        meta_path = resource_dir / "meta.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        vectors_path, chunks_path = _data_files(resource_dir, meta)
+        with open(chunks_path, encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+        vectors = np.fromfile(vectors_path, dtype=np.float32).reshape(-1, meta["dim"])
+        rows = min(len(chunks), vectors.shape[0])
+        return meta["dim"], chunks[:rows], vectors[:rows]
+
+    def _rewrite(self, resource_id: str, chunks: List[Dict], vectors: np.ndarray):
+        """
+        Replace a resource's chunk and vector files
+
+        The new pair is written under the next version number and made
+        current by a single rename of meta.json, so a crash leaves either
+        the old or the new pair in use. Indexes already loaded keep reading
+        the old, unlinked files until they are dropped here. Quantized
+        copies are stale and removed.
+        """
+        resource_dir = self._resource_dir(resource_id)
+        meta_path = resource_dir / "meta.json"
+        meta = json.loads(meta_path.read_text())
+        meta["version"] = meta.get("version", 0) + 1
+        vectors_path, chunks_path = _data_files(resource_dir, meta)
+        vectors_path.write_bytes(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        chunks_path.write_text("".join(json.dumps(chunk) + "\n" for chunk in chunks), encoding="utf-8")
+
+        tmp_path = resource_dir / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, meta_path)
+
+        # Earlier versions, including any left by an interrupted rewrite
+        current = {vectors_path.name, chunks_path.name}
+        for path in [*resource_dir.glob("vectors*.f32"), *resource_dir.glob("chunks*.jsonl")]:
+            if path.name not in current:
+                path.unlink()
+        for path in resource_dir.glob("quantized-*.npz"):
+            if ".tmp." not in path.name:
+                path.unlink()
+        self._loaded.pop(resource_id, None)
+
+    def get_chunk_hashes(self, resource_id: str) -> List[Optional[Dict]]:
+        """Hash, page and page_end of each stored chunk, by chunk_id"""
+        try:
+            index = self._load(resource_id)
+            if index is None:
+                return []
+            hashes: List[Optional[Dict]] = []
+            for chunk in index.chunks:
+                position = chunk['chunk_id']
+                hashes.extend([None] * (position + 1 - len(hashes)))
+                hashes[position] = {
+                    'hash': chunk.get('hash') or chunk_hash(chunk['text']),
+                    'page': chunk['page'],
+                    'page_end': chunk.get('page_end', chunk['page']),
+                }
+            return hashes
+
+        except Exception as e:
+            raise Exception(f"Failed to read chunk hashes: {str(e)}")
+
+    def get_chunk_embeddings(self, resource_id: str, chunk_ids: List[int]) -> List[List[float]]:
+        """Stored (normalized) vectors of a resource's chunks, in the order of chunk_ids"""
+        if not chunk_ids:
+            return []
+        try:
+            index = self._load(resource_id)
+            rows = {chunk['chunk_id']: row for row, chunk in enumerate(index.chunks)}
+            return np.asarray(index.matrix[[rows[chunk_id] for chunk_id in chunk_ids]]).tolist()
+
+        except Exception as e:
+            raise Exception(f"Failed to read chunk embeddings: {str(e)}")
+
+    def upsert_document_chunks(
+        self,
+        resource_id: str,
+        chunks: List[Dict],
+        embeddings: List[List[float]],
+        metadata: Dict
+    ) -> int:
+        """Overwrite the rows of chunks already stored and append the rest"""
+        if not chunks:
+            return 0
+        try:
+            vectors = _normalized(embeddings)
+            with self._lock, self._file_lock.hold():
+                stored = self._read(self._resource_dir(resource_id))
+                if stored is None:
+                    self._append(resource_id, chunks, vectors, metadata)
+                    return len(chunks)
+                self._rewrite(resource_id, *self._merged(stored, chunks, vectors, metadata))
+            return len(chunks)
+
+        except Exception as e:
+            raise Exception(f"Failed to upsert chunks: {str(e)}")
+
+    def truncate_document(self, resource_id: str, chunk_count: int) -> int:
+        """Delete a resource's chunks with chunk_id >= chunk_count"""
+        try:
+            with self._lock, self._file_lock.hold():
+                stored = self._read(self._resource_dir(resource_id))
+                if stored is None:
+                    return 0
+                _, stored_chunks, stored_vectors = stored
+                kept_chunks, kept_vectors = self._truncated(stored_chunks, stored_vectors, chunk_count)
+                removed = len(stored_chunks) - len(kept_chunks)
+                if removed:
+                    self._rewrite(resource_id, kept_chunks, kept_vectors)
+                return removed
+
+        except Exception as e:
+            raise Exception(f"Failed to delete chunks: {str(e)}")
+
+    def apply_reindex(
+        self,
+        resource_id: str,
+        chunks: List[Dict],
+        embeddings: List[List[float]],
+        chunk_count: int,
+        all_chunks: List[Dict],
+        metadata: Dict
+    ) -> int:
+        """Upsert and truncate in memory, then rewrite the resource's files once"""
+        try:
+            with self._lock, self._file_lock.hold():
+                stored = self._read(self._resource_dir(resource_id))
+                if stored is None:
+                    raise ValueError(f"Resource {resource_id} has no stored chunks")
+                _, stored_chunks, stored_vectors = stored
+                if chunks:
+                    stored_chunks, stored_vectors = self._merged(stored, chunks, _normalized(embeddings), metadata)
+                rows = len(stored_chunks)
+                stored_chunks, stored_vectors = self._truncated(stored_chunks, stored_vectors, chunk_count)
+                if chunks or len(stored_chunks) < rows:
+                    self._rewrite(resource_id, stored_chunks, stored_vectors)
+            self.reindex_lexical(resource_id, all_chunks, metadata)
+            return len(chunks)
+
+        except Exception as e:
+            raise Exception(f"Failed to apply re-index: {str(e)}")
+
+    def _merged(self, stored, chunks: List[Dict], vectors: np.ndarray, metadata: Dict):
+        """Stored (dim, chunks, vectors) with chunks written by chunk_id: (chunks, vectors)"""
+        dim, stored_chunks, stored_vectors = stored
+        if vectors.shape[1] != dim:
+            raise ValueError(f"Expected {dim}-dim vectors, got {vectors.shape[1]}")
+        rows = {chunk['chunk_id']: row for row, chunk in enumerate(stored_chunks)}
+        appended = []
+        for chunk, vector in zip(chunks, vectors):
+            record = self._chunk_record(chunk, metadata)
+            row = rows.get(chunk['chunk_id'])
+            if row is None:
+                rows[chunk['chunk_id']] = len(stored_chunks)
+                stored_chunks.append(record)
+                appended.append(vector)
+            else:
+                stored_chunks[row] = record
+                stored_vectors[row] = vector
+        if appended:
+            stored_vectors = np.vstack([stored_vectors, np.asarray(appended)])
+        return stored_chunks, stored_vectors
+
+    @staticmethod
+    def _truncated(chunks: List[Dict], vectors: np.ndarray, chunk_count: int):
+        """(chunks, vectors) without the rows of chunk_id >= chunk_count"""
+        keep = [row for row, chunk in enumerate(chunks) if chunk['chunk_id'] < chunk_count]
+        if len(keep) == len(chunks):
+            return chunks, vectors
+        return [chunks[row] for row in keep], vectors[keep]
+
+    def _load(self, resource_id: str) -> Optional[_ResourceIndex]:
+        resource_dir = self._resource_dir(resource_id)
+        with self._lock:
+            index = self._cached(resource_id, resource_dir)
+            if index is not None:
+                return index
+            build_lock = self._building.setdefault(resource_id, threading.Lock())
+
+        # One thread loads a resource while others asking for it wait; the
+        # store lock is only held to read the files, so building quantized
+        # vectors does not hold up queries on other resources
+        with build_lock:
+            with self._lock:
+                index = self._cached(resource_id, resource_dir)
+                if index is not None:
+                    return index
+                with self._file_lock.hold(exclusive=False):
+                    loaded = self._read_index(resource_dir)
+                if loaded is None:
+                    self._building.pop(resource_id, None)
+                    return None
+
+            index, vectors_file = loaded
+            if vectors_file is not None:
+                with vectors_file:
+                    index.quantized = self._build_quantized(resource_dir, vectors_file, index)
+
+            with self._lock:
+                self._loaded[resource_id] = index
+                while len(self._loaded) > self.max_loaded:
+                    self._loaded.popitem(last=False)
+                self._building.pop(resource_id, None)
+            return index
+
+    def _cached(self, resource_id: str, resource_dir: Path) -> Optional[_ResourceIndex]:
+        """The loaded index of a resource if still current (under the store lock)"""
+        index = self._loaded.get(resource_id)
+        if index is None:
+            return None
+        if index.signature != self._signature(resource_dir, index.chunks_path):
+            # Written by another process since it was loaded
+            del self._loaded[resource_id]
+            return None
+        self._loaded.move_to_end(resource_id)
+        return index
+
+    def _read_index(self, resource_dir: Path):
+        """
+        (index, open vectors file) of a resource, or None if it has no files
+
+        Runs under the shared file lock. The vectors file is only returned,
+        open, when the quantized copy must be (re)built: an open file stays
+        readable after a rewrite in another process unlinks it.
+        """
+        meta_path = resource_dir / "meta.json"
+        if not meta_path.exists():
+            return None
+
+        meta = json.loads(meta_path.read_text())
+        dim = meta["dim"]
+        vectors_path, chunks_path = _data_files(resource_dir, meta)
+        signature = self._signature(resource_dir, chunks_path)
+        with open(chunks_path, encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+        matrix = np.memmap(vectors_path, dtype=np.float32, mode="r").reshape(-1, dim)
+
+        # A write interrupted between the two files leaves them uneven
+        rows = min(len(chunks), matrix.shape[0])
+        index = _ResourceIndex(matrix[:rows], chunks[:rows], None, signature, chunks_path)
+        index.quantized_path = self._quantized_path(resource_dir, meta)
+        if self.quantization == "none" or not rows:
+            return index, None
+
+        codec = QUANTIZERS[self.quantization]
+        if index.quantized_path.exists():
+            with np.load(index.quantized_path) as stored:
+                quantized = codec({name: stored[name] for name in stored.files})
+            if quantized.rows == rows:
+                index.quantized = quantized
+                return index, None
+        return index, open(vectors_path, "rb")
+
+    @staticmethod
+    def _signature(resource_dir: Path, chunks_path: Path) -> tuple:
+        return file_signature(resource_dir / "meta.json"), file_signature(chunks_path)
+
+    def _quantized_path(self, resource_dir: Path, meta: Dict) -> Path:
+        """Quantized copy of the version of the files named in meta, so it never outlives them"""
+        version = meta.get("version", 0)
+        suffix = f".{version}" if version else ""
+        return resource_dir / f"quantized-{self.quantization}{suffix}.npz"
+
+    def _build_quantized(self, resource_dir: Path, vectors_file, index: _ResourceIndex) -> QuantizedVectors:
+        """Encode a resource's vectors and save the quantized copy (outside the store lock)"""
+        rows, dim = index.matrix.shape
+        # Read rather than map the float32 rows, so their pages are not left
+        # resident in this process after encoding
+        vectors = np.fromfile(vectors_file, dtype=np.float32, count=rows * dim).reshape(rows, dim)
+        quantized = QUANTIZERS[self.quantization].encode(vectors, subvectors=self.pq_subvectors)
+        # Per-process and thread temporary name: loads elsewhere may build it too
+        tmp_path = resource_dir / f"quantized-{self.quantization}.{os.getpid()}-{threading.get_ident()}.tmp.npz"
+        try:
+            np.savez(tmp_path, **quantized.arrays)
+            os.replace(tmp_path, index.quantized_path)
+        except OSError as e:
+            # E.g. the resource was deleted meanwhile; the copy is rebuilt on its next load
+            print(f"⚠️ Could not save quantized vectors for {resource_dir.name}: {e}")
+        return quantized
+
+    def warm_resource(self, resource_id: str) -> bool:
+        """Load a resource's matrix and chunks (and touch the mapped pages)"""
+        super().warm_resource(resource_id)
+        try:
+            index = self._load(resource_id)
+            if index is None:
+                return False
+            # Fault the mapped vectors into the page cache now rather than on the
+            # first query (quantized vectors are already in memory)
+            if index.quantized is None:
+                float(index.matrix.sum())
+            return True
+        except Exception as e:
+            raise Exception(f"Failed to warm resource: {str(e)}")
+
+    def search_similar_chunks(
+        self,
+        query_embedding: List[float],
+        resource_id: str,
+        top_k: int = 5
+    ) -> List[Dict]:
+        """Cosine top-k over the resource's chunks (exact, or re-ranked from quantized candidates)"""
+        return self.search_similar_chunks_batch([query_embedding], resource_id, top_k)[0]
+
+    def search_similar_chunks_batch(
+        self,
+        query_embeddings: List[List[float]],
+        resource_id: str,
+        top_k: int = 5
+    ) -> List[List[Dict]]:
+        """
+        Top-k for many queries at once
+
+        Without quantization all queries are scored with one mat-mat
+        product over the resource's rows.
+        """
+        try:
+            index = self._load(resource_id)
+            if index is None or not index.chunks or not query_embeddings:
+                return [[] for _ in query_embeddings]
+
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries /= np.where(norms == 0, 1, norms)
+
+            if index.quantized is None:
+                all_scores = queries @ index.matrix.T
+                return [
+                    self._top_k(index, resource_id, np.arange(len(scores)), scores, top_k)
+                    for scores in all_scores
+                ]
+
+            results = []
+            for query in queries:
+                approximate = index.quantized.scores(query)
+                n = min(top_k * self.rerank_factor, len(approximate))
+                candidates = np.sort(np.argpartition(-approximate, n - 1)[:n])
+                scores = index.matrix[candidates] @ query
+                results.append(self._top_k(index, resource_id, candidates, scores, top_k))
+            return results
+
+        except Exception as e:
+            raise Exception(f"Failed to search vector store: {str(e)}")
+
+    @staticmethod
+    def _top_k(
+        index: _ResourceIndex,
+        resource_id: str,
+        rows: np.ndarray,
+        scores: np.ndarray,
+        top_k: int
+    ) -> List[Dict]:
+        """Best top_k of the given rows and their scores, as result chunks"""
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            {
+                'text': index.chunks[i]['text'],
+                'page': index.chunks[i]['page'],
+                'page_end': index.chunks[i].get('page_end', index.chunks[i]['page']),
+                'chunk_id': index.chunks[i]['chunk_id'],
+                'resource_id': resource_id,
+                'filename': index.chunks[i]['filename'],
+                'relevance_score': float(score),
+            }
+            for i, score in zip(rows[best].tolist(), scores[best])
+        ]
+
+    def delete_document(self, resource_id: str) -> bool:
+        """Delete all chunks for a specific resource"""
+        try:
+            resource_dir = self._resource_dir(resource_id)
+            self._delete_lexical(resource_id)
+            with self._lock, self._file_lock.hold():
+                self._loaded.pop(resource_id, None)
+                if not resource_dir.exists():
+                    return False
+                shutil.rmtree(resource_dir)
+                return True
+
+        except Exception as e:
+            raise Exception(f"Failed to delete document: {str(e)}")
+
+    def get_resource_chunk_count(self, resource_id: str) -> int:
+        """Get the number of chunks for a specific resource"""
+        try:
+            index = self._load(resource_id)
+            return len(index.chunks) if index else 0
+        except Exception:
+            return 0
@@ -0,0 +1,106 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class PartitionRegistry:
+    """
+    SQLite registry mapping each resource to its own vector collection
+
+    Keeps the collection name and a running chunk count per resource so
+    lookups, counts and deletes never scan other resources' chunks.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS partitions ("
+            " resource_id TEXT PRIMARY KEY,"
+            " collection TEXT NOT NULL UNIQUE,"
+            " chunk_count INTEGER NOT NULL DEFAULT 0,"
+            " created_at TEXT NOT NULL,"
+            " updated_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def collection_name(prefix: str, resource_id: str) -> str:
+        """Collection name for a resource (hashed to satisfy Chroma's naming rules)"""
+        digest = hashlib.sha1(resource_id.encode("utf-8")).hexdigest()[:24]
+        return f"{prefix}-{digest}"
+
+    def get(self, resource_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM partitions WHERE resource_id = ?", (resource_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def register(self, resource_id: str, collection: str):
+        """Record a resource's collection if not already registered"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO partitions"
+                " (resource_id, collection, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (resource_id, collection, now, now)
+            )
+            self._conn.commit()
+
+    def add_chunks(self, resource_id: str, count: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE partitions SET chunk_count = chunk_count + ?, updated_at = ?"
+                " WHERE resource_id = ?",
+                (count, datetime.now().isoformat(), resource_id)
+            )
+            self._conn.commit()
+
+    def set_chunks(self, resource_id: str, count: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE partitions SET chunk_count = ?, updated_at = ? WHERE resource_id = ?",
+                (count, datetime.now().isoformat(), resource_id)
+            )
+            self._conn.commit()
+
+    def remove(self, resource_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM partitions WHERE resource_id = ?", (resource_id,)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def retain(self, collections: Iterable[str]) -> int:
+        """Drop entries whose collection no longer exists; returns how many"""
+        existing = set(collections)
+        with self._lock:
+            stale = [
+                row["resource_id"]
+                for row in self._conn.execute("SELECT resource_id, collection FROM partitions")
+                if row["collection"] not in existing
+            ]
+            self._conn.executemany(
+                "DELETE FROM partitions WHERE resource_id = ?", [(rid,) for rid in stale]
+            )
+            self._conn.commit()
+        return len(stale)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM partitions ORDER BY created_at"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,52 +1,164 @@
 import PyPDF2
-from typing import List, Dict
+from collections import deque
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from .chunker import StructuredChunker, TokenCounter
 import re
 
+
+def _clean_text(text: str) -> str:
+    """Clean extracted text"""
+    # Collapse whitespace within lines; line breaks mark headings and paragraphs
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    # Remove special characters that might cause issues
+    text = text.strip()
+    return text
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> Dict[int, str]:
+    """
+    Extract text for pages [start, end) of a PDF
+
+    Module-level so it can be shipped to a process pool; each worker
+    opens its own reader.
+    """
+    page_texts = {}
+    
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        
+        for page_num in range(start, min(end, len(pdf_reader.pages))):
+            page = pdf_reader.pages[page_num]
+            text = _clean_text(page.extract_text())
+            
+            if text.strip():
+                page_texts[page_num + 1] = text  # 1-indexed pages
+    
+    return page_texts
+
+
 class PDFProcessor:
-    """Service for extracting and chunking PDF text"""
+    """
+    Service for extracting and chunking PDF text
     
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+    chunker="structured" packs sentences and headings into token-budgeted
+    chunks that may span pages; chunker="words" is the original per-page
+    word-window chunker.
+    """
+    
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        parallel_min_pages: int = 32,
+        pages_per_task: int = 16,
+        prefetch_tasks: int = 4,
+        chunker: str = "structured",
+        tokenizer_path: Optional[str] = None
+    ):
+        if chunker not in ("structured", "words"):
+            raise ValueError(f"Unknown chunker: {chunker}")
+        
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.chunker = chunker
+        self.structured_chunker = StructuredChunker(
+            chunk_size, chunk_overlap, TokenCounter(tokenizer_path)
+        )
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_task = pages_per_task
+        self.prefetch_tasks = prefetch_tasks
     
-    def extract_text_from_pdf(self, pdf_path: str) -> Dict[int, str]:
+    def extract_text_from_pdf(
+        self,
+        pdf_path: str,
+        executor: Optional[Executor] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[int, str]:
         """
         Extract text from PDF with page numbers
         
         Args:
             pdf_path: Path to PDF file
+            executor: Optional process pool (see iter_pages)
+            on_progress: Optional callback receiving (pages_done, page_count)
             
         Returns:
             Dictionary mapping page numbers to text content
         """
-        page_texts = {}
+        return dict(self.iter_pages(pdf_path, executor, on_progress))
+    
+    def iter_pages(
+        self,
+        pdf_path: str,
+        executor: Optional[Executor] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (page_num, text) for each non-empty page, in page order
         
+        Args:
+            pdf_path: Path to PDF file
+            executor: Optional process pool; page ranges are extracted in
+                parallel on it with at most prefetch_tasks ranges in flight.
+                Documents shorter than parallel_min_pages are extracted as a
+                single task.
+            on_progress: Optional callback receiving (pages_done, page_count)
+        """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    
-                    # Clean up text
-                    text = self._clean_text(text)
-                    
-                    if text.strip():
-                        page_texts[page_num + 1] = text  # 1-indexed pages
+            page_count = self.get_page_count(pdf_path)
+            
+            if executor is None:
+                with open(pdf_path, 'rb') as file:
+                    pdf_reader = PyPDF2.PdfReader(file)
+                    for page_num in range(page_count):
+                        text = _clean_text(pdf_reader.pages[page_num].extract_text())
+                        if on_progress:
+                            on_progress(page_num + 1, page_count)
+                        if text.strip():
+                            yield page_num + 1, text  # 1-indexed pages
+                return
+            
+            # Bounded window of in-flight ranges keeps memory independent
+            # of document size; ranges are disjoint and consumed in order
+            pending = deque()
+            ranges = iter(self._page_ranges(page_count))
+            for start, end in islice(ranges, self.prefetch_tasks):
+                pending.append((end, executor.submit(_extract_page_range, pdf_path, start, end)))
+            
+            try:
+                while pending:
+                    range_end, future = pending.popleft()
+                    page_texts = future.result()
+                    for start, end in islice(ranges, 1):
+                        pending.append((end, executor.submit(_extract_page_range, pdf_path, start, end)))
+                    if on_progress:
+                        on_progress(range_end, page_count)
+                    yield from sorted(page_texts.items())
+            finally:
+                # Consumer stopped early or a range failed
+                for _, future in pending:
+                    future.cancel()
         
         except Exception as e:
             raise Exception(f"Failed to extract PDF text: {str(e)}")
+    
+    def _page_ranges(self, page_count: int) -> List[Tuple[int, int]]:
+        """Split [0, page_count) into ranges for parallel extraction"""
+        if page_count < self.parallel_min_pages:
+            return [(0, page_count)]
         
-        return page_texts
+        return [
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
     
     def _clean_text(self, text: str) -> str:
         """Clean extracted text"""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        # Remove special characters that might cause issues
-        text = text.strip()
-        return text
+        return _clean_text(text)
     
     def chunk_text(self, page_texts: Dict[int, str]) -> List[Dict]:
         """
@@ -58,21 +170,37 @@ class PDFProcessor:
         Returns:
             List of chunks with metadata
         """
-        chunks = []
+        return list(self.iter_chunks(page_texts.items()))
+    
+    def iter_chunks(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Dict]:
+        """
+        Incrementally chunk (page_num, text) pairs, e.g. from iter_pages
+        
+        Yields:
+            Chunk dictionaries with text and metadata (page is the first
+            page of the chunk, page_end the last)
+        """
+        if self.chunker == "structured":
+            return self.structured_chunker.iter_chunks(pages)
+        return self._iter_word_chunks(pages)
+    
+    def _iter_word_chunks(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Dict]:
+        """Per-page overlapping word windows (words approximate tokens)"""
         chunk_id = 0
         
-        for page_num, text in page_texts.items():
+        for page_num, text in pages:
             # Simple word-based chunking (approximation of token count)
             words = text.split()
             
             # If page is shorter than chunk size, keep it as one chunk
             if len(words) <= self.chunk_size:
-                chunks.append({
+                yield {
                     'chunk_id': chunk_id,
                     'page': page_num,
+                    'page_end': page_num,
                     'text': text,
                     'word_count': len(words)
-                })
+                }
                 chunk_id += 1
             else:
                 # Create overlapping chunks
@@ -82,12 +210,13 @@ class PDFProcessor:
                     chunk_words = words[start:end]
                     chunk_text = ' '.join(chunk_words)
                     
-                    chunks.append({
+                    yield {
                         'chunk_id': chunk_id,
                         'page': page_num,
+                        'page_end': page_num,
                         'text': chunk_text,
                         'word_count': len(chunk_words)
-                    })
+                    }
                     
                     chunk_id += 1
                     start += self.chunk_size - self.chunk_overlap
@@ -95,8 +224,6 @@ class PDFProcessor:
                     # Break if we've covered the text
                     if end >= len(words):
                         break
-        
-        return chunks
     
     def get_page_count(self, pdf_path: str) -> int:
         """Get the number of pages in a PDF"""
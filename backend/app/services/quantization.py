@@ -0,0 +1,152 @@
+from typing import Dict, List
+
+import numpy as np
+
+# Rows converted to float32 at a time when scoring scalar codes (small
+# enough for each block to stay in cache)
+_SCORE_BLOCK_ROWS = 256
+
+
+class QuantizedVectors:
+    """
+    Compact copy of a resource's L2-normalized float32 vectors
+
+    Scores are approximate inner products, used only to pick candidates
+    that are then re-ranked against the exact float32 vectors.
+    """
+
+    kind = ""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+
+    @classmethod
+    def encode(cls, vectors: np.ndarray, **options) -> "QuantizedVectors":
+        raise NotImplementedError
+
+    @property
+    def rows(self) -> int:
+        return len(self.arrays["codes"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class Float16Vectors(QuantizedVectors):
+    """Half-precision rows: 2 bytes per dimension"""
+
+    kind = "float16"
+
+    @classmethod
+    def encode(cls, vectors: np.ndarray, **options) -> "Float16Vectors":
+        return cls({"codes": vectors.astype(np.float16)})
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        return _blocked_scores(self.arrays["codes"], query)
+
+
+class Int8Vectors(QuantizedVectors):
+    """Symmetric int8 rows with one float32 scale per row: ~1 byte per dimension"""
+
+    kind = "int8"
+
+    @classmethod
+    def encode(cls, vectors: np.ndarray, **options) -> "Int8Vectors":
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return cls({"codes": codes, "scales": scales.astype(np.float32)})
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        return _blocked_scores(self.arrays["codes"], query) * self.arrays["scales"]
+
+
+class ProductQuantizedVectors(QuantizedVectors):
+    """
+    Product quantization: each row is split into `subvectors` slices and
+    every slice is stored as the uint8 id of its nearest of up to 256
+    k-means centroids, trained on the resource's own vectors. A query is
+    scored from a (subvectors x 256) table of slice-centroid products.
+    """
+
+    kind = "pq"
+
+    @classmethod
+    def encode(
+        cls,
+        vectors: np.ndarray,
+        subvectors: int = 64,
+        iterations: int = 10,
+        max_train_rows: int = 10_000,
+        seed: int = 0,
+        **options
+    ) -> "ProductQuantizedVectors":
+        rng = np.random.default_rng(seed)
+        rows, dim = vectors.shape
+        slices = np.array_split(np.arange(dim), min(subvectors, dim))
+        centroids = min(256, max(rows, 1))
+        train = vectors
+        if rows > max_train_rows:
+            train = vectors[rng.choice(rows, max_train_rows, replace=False)]
+
+        codebooks = np.zeros((len(slices), centroids, max(len(s) for s in slices)), dtype=np.float32)
+        codes = np.zeros((rows, len(slices)), dtype=np.uint8)
+        for i, columns in enumerate(slices):
+            book = _kmeans(train[:, columns], centroids, iterations, rng)
+            codebooks[i, :, :len(columns)] = book
+            codes[:, i] = _nearest(vectors[:, columns], book)
+
+        widths = np.array([len(s) for s in slices], dtype=np.int32)
+        return cls({"codes": codes, "codebooks": codebooks, "widths": widths})
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        codebooks, widths = self.arrays["codebooks"], self.arrays["widths"]
+        # Zero padding past each slice's width keeps the products exact
+        padded = np.zeros((len(widths), codebooks.shape[2]), dtype=np.float32)
+        offsets = np.concatenate([[0], np.cumsum(widths)])
+        for i, width in enumerate(widths):
+            padded[i, :width] = query[offsets[i]:offsets[i + 1]]
+        table = np.einsum("mkd,md->mk", codebooks, padded)
+        codes = self.arrays["codes"]
+        return table[np.arange(codes.shape[1]), codes].sum(axis=1)
+
+
+def _blocked_scores(codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """codes @ query in float32, converting a block of rows at a time"""
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), _SCORE_BLOCK_ROWS):
+        block = codes[start:start + _SCORE_BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32) @ query
+    return scores
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # ||c||^2 - 2 x.c ranks centroids like squared distance (||x||^2 is constant per row)
+    distances = vectors @ (centroids.T * -2)
+    distances += (centroids ** 2).sum(axis=1)
+    return distances.argmin(axis=1)
+
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        used, starts, counts = np.unique(assignment[order], return_index=True, return_counts=True)
+        centroids[used] = np.add.reduceat(vectors[order], starts) / counts[:, None]
+        empty = np.ones(k, dtype=bool)
+        empty[used] = False
+        # Re-seed empty clusters with random rows
+        centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+    return centroids
+
+
+QUANTIZERS = {cls.kind: cls for cls in (Float16Vectors, Int8Vectors, ProductQuantizedVectors)}
+
+
+def quantization_kinds() -> List[str]:
+    return ["none", *QUANTIZERS]
@@ -1,28 +1,325 @@
-from mistralai import Mistral
-from typing import List, Dict, AsyncIterator
+from mistralai import Mistral, models
+from contextlib import aclosing
+import asyncio
+import heapq
+import httpx
+import logging
+import time
+from typing import List, Dict, AsyncIterator, Optional, Tuple
 from .embeddings import EmbeddingService
 from .vector_store import VectorStore
-from .pdf_processor import PDFProcessor
+from .lexical_index import reciprocal_rank_fusion
+from .answer_cache import QueryEmbeddingCache, SemanticAnswerCache
+from .context_packer import ContextPacker
+from .reranker import Reranker
+from .metrics import span, CONTEXT_TOKENS_SAVED, LLM_TOKENS, TIME_TO_FIRST_TOKEN
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical")
+
+NO_CONTEXT_ANSWER = "I couldn't find relevant information in the uploaded PDF to answer your question."
 
 class RAGService:
-    """Retrieval Augmented Generation service"""
+    """
+    Retrieval Augmented Generation service
+    
+    retrieval_mode selects vector search, BM25 + vector fused with
+    reciprocal rank fusion ("hybrid"), or BM25 only ("lexical"). When the
+    question cannot be embedded within embed_timeout seconds, retrieval
+    falls back to BM25 for embed_cooldown seconds instead of waiting on
+    the embedding provider.
+    
+    With a reranker, reranker.candidates chunks are retrieved and rescored
+    and only the best reranker.keep of them go into the prompt.
+    """
     
     def __init__(
         self,
         mistral_api_key: str,
         vector_store: VectorStore,
         embedding_service: EmbeddingService,
-        chat_model: str = "mistral-large-latest"
+        chat_model: str = "mistral-large-latest",
+        server_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        search_timeout: float = 1.0,
+        retrieval_mode: str = "hybrid",
+        hybrid_candidates: int = 20,
+        rrf_k: int = 60,
+        embed_timeout: float = 5.0,
+        embed_cooldown: float = 30.0,
+        context_packer: Optional[ContextPacker] = None,
+        reranker: Optional[Reranker] = None
     ):
-        self.mistral_client = Mistral(api_key=mistral_api_key)
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval_mode}")
+        
+        # A shared async HTTP client lets chat and embeddings reuse connections
+        self.http_client = http_client or httpx.AsyncClient()
+        self.mistral_client = Mistral(
+            api_key=mistral_api_key,
+            server_url=server_url,
+            async_client=self.http_client
+        )
+        self.mistral_api_key = mistral_api_key
+        self.server_url = (server_url or "https://api.mistral.ai").rstrip("/")
         self.vector_store = vector_store
         self.embedding_service = embedding_service
         self.chat_model = chat_model
+        self.query_cache = query_cache
+        self.answer_cache = answer_cache
+        self.search_timeout = search_timeout
+        self.retrieval_mode = retrieval_mode
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.embed_timeout = embed_timeout
+        self.embed_cooldown = embed_cooldown
+        self._embed_retry_at = 0.0
+        self.context_packer = context_packer
+        self.reranker = reranker
     
-    async def answer_question(
+    async def _embed_question(self, question: str) -> List[float]:
+        """Question embedding, served from the exact-match cache when possible"""
+        if self.query_cache is not None:
+            embedding = self.query_cache.get(question)
+            if embedding is not None:
+                return embedding
+        
+        embedding = await self.embedding_service.generate_single_embedding(question)
+        if self.query_cache is not None:
+            self.query_cache.put(question, embedding)
+        return embedding
+    
+    async def _question_embedding(self, question: str) -> Optional[List[float]]:
+        """
+        Question embedding, or None when retrieval should use BM25 alone
+        
+        That is the case in lexical mode, and after the embedding provider
+        failed or timed out (for embed_cooldown seconds) if a lexical index
+        is available to fall back on.
+        """
+        if self.retrieval_mode == "lexical":
+            return None
+        if self.vector_store.lexical_index is None:
+            return await self._embed_question(question)
+        if time.monotonic() < self._embed_retry_at:
+            return None
+        
+        try:
+            return await asyncio.wait_for(self._embed_question(question), self.embed_timeout)
+        except Exception as e:
+            self._embed_retry_at = time.monotonic() + self.embed_cooldown
+            print(f"⚠️ Question embedding unavailable, using lexical search: {e!r}")
+            return None
+    
+    async def _cached_answer(
+        self,
+        resource_ids: List[str],
+        question_embedding: Optional[List[float]],
+        conversation_history: Optional[List[Dict]]
+    ) -> Tuple[Optional[Dict], Optional[int]]:
+        """
+        Semantic cache lookup, and the cache generation to store the answer under
+        
+        Only single-resource questions are cached (invalidation is per
+        resource); follow-up questions depend on history and bypass it.
+        The generation is taken before retrieval, so an answer built from
+        an index replaced meanwhile is not stored.
+        """
+        if (
+            self.answer_cache is None or question_embedding is None
+            or conversation_history or len(resource_ids) != 1
+        ):
+            return None, None
+        generation = await self.answer_cache.generation_async(resource_ids[0])
+        cached = await self.answer_cache.get_async(resource_ids[0], question_embedding)
+        return cached, generation
+    
+    async def _store_answer(
+        self,
+        resource_ids: List[str],
+        question_embedding: Optional[List[float]],
+        conversation_history: Optional[List[Dict]],
+        answer: str,
+        citations: List[Dict],
+        generation: Optional[int]
+    ):
+        if (
+            self.answer_cache is None or question_embedding is None
+            or conversation_history or len(resource_ids) != 1
+        ):
+            return
+        await self.answer_cache.put_async(
+            resource_ids[0], question_embedding, answer, citations, generation=generation
+        )
+    
+    def _search(
+        self,
+        resource_id: str,
+        question: str,
+        question_embedding: Optional[List[float]],
+        top_k: int
+    ):
+        """Search coroutine for one resource in the active retrieval mode"""
+        if question_embedding is None:
+            return self.vector_store.search_lexical_async(
+                query_text=question,
+                resource_id=resource_id,
+                top_k=top_k
+            )
+        if self.retrieval_mode == "hybrid":
+            return self.vector_store.search_hybrid_async(
+                query_embedding=question_embedding,
+                query_text=question,
+                resource_id=resource_id,
+                top_k=top_k,
+                candidates=max(top_k, self.hybrid_candidates),
+                rrf_k=self.rrf_k
+            )
+        return self.vector_store.search_similar_chunks_async(
+            query_embedding=question_embedding,
+            resource_id=resource_id,
+            top_k=top_k
+        )
+    
+    async def _retrieve(
         self,
+        resource_ids: List[str],
         question: str,
+        question_embedding: Optional[List[float]],
+        top_k: int
+    ) -> List[Dict]:
+        """
+        Top-k chunks across one or more resources
+        
+        Resources are searched concurrently. Searches still running after
+        search_timeout seconds are cancelled and those resources left out of
+        the answer. Vector scores are cosine similarities of normalized
+        embeddings, so they are merged across resources with a top-k heap
+        (BM25-only scores are merged the same way, as a rougher
+        approximation). Rank fusion scores are only comparable within one
+        fusion, so in hybrid mode each resource returns its vector and BM25
+        candidates, and both merged lists are fused once.
+        """
+        if len(resource_ids) == 1:
+            return await self._search(resource_ids[0], question, question_embedding, top_k)
+        
+        hybrid = self.retrieval_mode == "hybrid" and question_embedding is not None
+        candidates = max(top_k, self.hybrid_candidates)
+        tasks = [
+            asyncio.create_task(
+                self._hybrid_candidates(resource_id, question, question_embedding, candidates) if hybrid
+                else self._search(resource_id, question, question_embedding, top_k)
+            )
+            for resource_id in resource_ids
+        ]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.search_timeout)
+        finally:
+            # A search already running in a thread finishes there, but nothing waits on it
+            for task in tasks:
+                task.cancel()
+        
+        failed = [task for task in done if task.exception() is not None]
+        if pending or failed:
+            print(f"⚠️ Search skipped {len(pending)} slow and {len(failed)} failed of {len(tasks)} resources")
+        if len(failed) == len(tasks):
+            raise failed[0].exception()
+        
+        results = [task.result() for task in done if task.exception() is None]
+        if not hybrid:
+            return self._merge(results, top_k)
+        vector_results = self._merge([vectors for vectors, _ in results], candidates)
+        lexical_results = self._merge([lexical for _, lexical in results], candidates)
+        return reciprocal_rank_fusion([vector_results, lexical_results], top_k, self.rrf_k)
+    
+    async def _hybrid_candidates(
+        self,
         resource_id: str,
+        question: str,
+        question_embedding: List[float],
+        candidates: int
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """A resource's vector and BM25 candidates for hybrid search, not yet fused"""
+        return await asyncio.gather(
+            self.vector_store.search_similar_chunks_async(
+                query_embedding=question_embedding,
+                resource_id=resource_id,
+                top_k=candidates
+            ),
+            self.vector_store.search_lexical_async(
+                query_text=question,
+                resource_id=resource_id,
+                top_k=candidates
+            )
+        )
+    
+    @staticmethod
+    def _merge(result_lists: List[List[Dict]], top_k: int) -> List[Dict]:
+        """Best top_k chunks of several resources' results by relevance_score"""
+        return heapq.nlargest(
+            top_k,
+            (chunk for results in result_lists for chunk in results),
+            key=lambda chunk: chunk['relevance_score']
+        )
+    
+    def _fetch_k(self, top_k: int) -> int:
+        """Chunks to retrieve for top_k, over-fetching when they will be reranked"""
+        return max(top_k, self.reranker.candidates) if self.reranker is not None else top_k
+    
+    async def _rerank(
+        self,
+        questions: List[str],
+        retrieved: List[List[Dict]],
+        top_k: int
+    ) -> List[List[Dict]]:
+        """The chunks to build each question's prompt from, out of the retrieved ones"""
+        if self.reranker is None:
+            return retrieved
+        keep = min(top_k, self.reranker.keep)
+        with span("rerank"):
+            # Tokenizing candidates is CPU work; keep it off the event loop
+            return await asyncio.to_thread(lambda: [
+                self.reranker.rerank(question, chunks, keep=keep)
+                for question, chunks in zip(questions, retrieved)
+            ])
+    
+    def _pack(
+        self,
+        chunks: List[Dict],
+        conversation_history: Optional[List[Dict]]
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Passages for the context and history messages for the prompt
+        
+        With a context packer, overlapping neighbour chunks are merged and
+        both are fitted to token budgets; otherwise chunks are used as
+        retrieved with the last 3 exchanges of history.
+        """
+        if self.context_packer is None:
+            history = [
+                {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+                for msg in (conversation_history or [])[-6:]  # Last 3 exchanges
+            ]
+            return chunks, history
+        
+        passages, context_tokens = self.context_packer.pack_chunks(chunks)
+        history, history_tokens = self.context_packer.pack_history(conversation_history)
+        tokens_in = context_tokens["tokens_in"] + history_tokens["tokens_in"]
+        tokens_out = context_tokens["tokens_out"] + history_tokens["tokens_out"]
+        CONTEXT_TOKENS_SAVED.observe(tokens_in - tokens_out)
+        logger.debug(
+            "Packed prompt context: %d of %d tokens (%d saved, %d chunks -> %d passages)",
+            tokens_out, tokens_in, tokens_in - tokens_out, len(chunks), len(passages)
+        )
+        return passages, history
+    
+    async def answer_question(
+        self,
+        question: str,
+        resource_ids: List[str],
         conversation_history: List[Dict] = None,
         top_k: int = 5
     ) -> Dict:
@@ -31,7 +328,7 @@ class RAGService:
         
         Args:
             question: User's question
-            resource_id: ID of the PDF resource to query
+            resource_ids: IDs of the PDF resources to query
             conversation_history: Previous conversation messages
             top_k: Number of relevant chunks to retrieve
             
@@ -40,75 +337,207 @@ class RAGService:
         """
         try:
             # Step 1: Generate embedding for the question
-            question_embedding = await self.embedding_service.generate_single_embedding(question)
+            with span("embed_question"):
+                question_embedding = await self._question_embedding(question)
             
-            # Step 2: Retrieve relevant chunks
-            relevant_chunks = self.vector_store.search_similar_chunks(
-                query_embedding=question_embedding,
-                resource_id=resource_id,
-                top_k=top_k
+            cached, generation = await self._cached_answer(
+                resource_ids, question_embedding, conversation_history
             )
+            if cached is not None:
+                return cached
+            
+            # Step 2: Retrieve relevant chunks
+            with span("retrieve"):
+                relevant_chunks = await self._retrieve(
+                    resource_ids, question, question_embedding, self._fetch_k(top_k)
+                )
+            [relevant_chunks] = await self._rerank([question], [relevant_chunks], top_k)
             
             if not relevant_chunks:
                 return {
-                    'answer': "I couldn't find relevant information in the uploaded PDF to answer your question.",
+                    'answer': NO_CONTEXT_ANSWER,
                     'citations': []
                 }
             
-            # Step 3: Build context from retrieved chunks
-            context = self._build_context(relevant_chunks)
+            # Steps 3-7: Build the prompt, get the answer from Mistral, format citations
+            answer, citations = await self._generate(
+                question, resource_ids, relevant_chunks, conversation_history
+            )
+            
+            await self._store_answer(
+                resource_ids, question_embedding, conversation_history, answer, citations, generation
+            )
+            
+            return {
+                'answer': answer,
+                'citations': citations
+            }
+            
+        except Exception as e:
+            raise Exception(f"RAG pipeline failed: {str(e)}")
+    
+    async def _generate(
+        self,
+        question: str,
+        resource_ids: List[str],
+        relevant_chunks: List[Dict],
+        conversation_history: Optional[List[Dict]]
+    ) -> Tuple[str, List[Dict]]:
+        """Answer and citations for retrieved chunks, from one Mistral completion"""
+        with span("prompt_build"):
+            # Build context from retrieved chunks, within the token budget
+            passages, history = self._pack(relevant_chunks, conversation_history)
+            multiple_sources = len(resource_ids) > 1
+            context = self._build_context(passages, multiple_sources)
             
-            # Step 4: Create enhanced prompt
-            system_prompt = self._create_system_prompt(context)
+            # Create enhanced prompt
+            system_prompt = self._create_system_prompt(context, multiple_sources)
             
-            # Step 5: Prepare messages for Mistral
+            # Prepare messages for Mistral: system prompt, history, current question
             messages = [
                 {"role": "system", "content": system_prompt}
             ]
-            
-            # Add conversation history if provided
-            if conversation_history:
-                for msg in conversation_history[-6:]:  # Last 3 exchanges
-                    messages.append({
-                        "role": msg.get("role", "user"),
-                        "content": msg.get("content", "")
-                    })
-            
-            # Add current question
+            messages.extend(history)
             messages.append({"role": "user", "content": question})
-            
-            # Step 6: Get answer from Mistral
-            response = self.mistral_client.chat.complete(
+        
+        with span("llm_complete"):
+            response = await self.mistral_client.chat.complete_async(
                 model=self.chat_model,
                 messages=messages,
                 temperature=0.7,
                 max_tokens=1000
             )
-            
-            answer = response.choices[0].message.content
-            
-            # Step 7: Format citations
-            citations = [
-                {
-                    'page': chunk['page'],
-                    'text': chunk['text'][:200] + "..." if len(chunk['text']) > 200 else chunk['text'],
-                    'relevance_score': chunk['relevance_score']
-                }
-                for chunk in relevant_chunks[:3]  # Top 3 citations
-            ]
-            
-            return {
-                'answer': answer,
-                'citations': citations
-            }
-            
+        self._record_usage(response.usage)
+        
+        return response.choices[0].message.content, self._format_citations(passages)
+    
+    async def _question_embeddings(self, questions: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embeddings for many questions in batched provider calls
+        
+        Falls back to BM25 for all of them (None) like _question_embedding.
+        """
+        if self.retrieval_mode == "lexical" or (
+            self.vector_store.lexical_index is not None and time.monotonic() < self._embed_retry_at
+        ):
+            return [None] * len(questions)
+        
+        embeddings = [
+            self.query_cache.get(question) if self.query_cache is not None else None
+            for question in questions
+        ]
+        missing = list(dict.fromkeys(q for q, e in zip(questions, embeddings) if e is None))
+        if not missing:
+            return embeddings
+        
+        try:
+            fresh = dict(zip(missing, await self.embedding_service.generate_embeddings(missing)))
         except Exception as e:
-            raise Exception(f"RAG pipeline failed: {str(e)}")
+            if self.vector_store.lexical_index is None:
+                raise
+            self._embed_retry_at = time.monotonic() + self.embed_cooldown
+            print(f"⚠️ Question embeddings unavailable, using lexical search: {e!r}")
+            return [None] * len(questions)
+        
+        if self.query_cache is not None:
+            for question, embedding in fresh.items():
+                self.query_cache.put(question, embedding)
+        return [e if e is not None else fresh[q] for q, e in zip(questions, embeddings)]
+    
+    async def _retrieve_batch(
+        self,
+        resource_id: str,
+        questions: List[str],
+        question_embeddings: List[Optional[List[float]]],
+        top_k: int
+    ) -> List[List[Dict]]:
+        """Top-k chunks of one resource for many questions, vector-scored as one batch"""
+        if not questions:
+            return []
+        if question_embeddings[0] is None:
+            return await asyncio.gather(*(
+                self.vector_store.search_lexical_async(query_text=q, resource_id=resource_id, top_k=top_k)
+                for q in questions
+            ))
+        if self.retrieval_mode == "hybrid":
+            return await self.vector_store.search_hybrid_batch_async(
+                query_embeddings=question_embeddings,
+                query_texts=questions,
+                resource_id=resource_id,
+                top_k=top_k,
+                candidates=max(top_k, self.hybrid_candidates),
+                rrf_k=self.rrf_k
+            )
+        return await self.vector_store.search_similar_chunks_batch_async(
+            query_embeddings=question_embeddings,
+            resource_id=resource_id,
+            top_k=top_k
+        )
+    
+    async def answer_batch(
+        self,
+        questions: List[str],
+        resource_id: str,
+        top_k: int = 5,
+        concurrency: int = 8
+    ) -> AsyncIterator[Dict]:
+        """
+        Answer a list of questions about one resource
+        
+        All questions are embedded in batched provider calls and retrieved
+        in one batched search; the completions then run with at most
+        `concurrency` in flight. Yields one result per question, in
+        completion order: index, question and either answer and citations
+        or error. Closing the iterator cancels the remaining completions.
+        """
+        resource_ids = [resource_id]
+        with span("embed_question"):
+            embeddings = await self._question_embeddings(questions)
+        
+        pending = []
+        generations = {}
+        for i, (question, embedding) in enumerate(zip(questions, embeddings)):
+            cached, generations[i] = await self._cached_answer(resource_ids, embedding, None)
+            if cached is not None:
+                yield {"index": i, "question": question, **cached}
+            else:
+                pending.append(i)
+        
+        with span("retrieve"):
+            retrieved = await self._retrieve_batch(
+                resource_id,
+                [questions[i] for i in pending],
+                [embeddings[i] for i in pending],
+                self._fetch_k(top_k)
+            )
+        retrieved = await self._rerank([questions[i] for i in pending], retrieved, top_k)
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def complete(i: int, chunks: List[Dict]) -> Dict:
+            result = {"index": i, "question": questions[i]}
+            if not chunks:
+                return {**result, "answer": NO_CONTEXT_ANSWER, "citations": []}
+            try:
+                async with semaphore:
+                    answer, citations = await self._generate(questions[i], resource_ids, chunks, None)
+            except Exception as e:
+                return {**result, "error": f"RAG pipeline failed: {str(e)}"}
+            await self._store_answer(resource_ids, embeddings[i], None, answer, citations, generations[i])
+            return {**result, "answer": answer, "citations": citations}
+        
+        tasks = [asyncio.create_task(complete(i, chunks)) for i, chunks in zip(pending, retrieved)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
     
     async def answer_question_stream(
         self,
         question: str,
-        resource_id: str,
+        resource_ids: List[str],
         conversation_history: List[Dict] = None,
         top_k: int = 5
     ) -> AsyncIterator[str]:
@@ -118,65 +547,193 @@ class RAGService:
         Yields:
             Chunks of the answer text
         """
+        async with aclosing(self.answer_question_events(
+            question, resource_ids, conversation_history, top_k
+        )) as events:
+            async for event in events:
+                if event["event"] == "token":
+                    yield event["data"]["text"]
+                elif event["event"] == "error":
+                    yield f"Error: {event['data']['detail']}"
+    
+    async def answer_question_events(
+        self,
+        question: str,
+        resource_ids: List[str],
+        conversation_history: List[Dict] = None,
+        top_k: int = 5
+    ) -> AsyncIterator[Dict]:
+        """
+        Answer question as a sequence of events
+        
+        Yields dicts of event and data, in this order:
+            citations: {"citations": [...]} as soon as the prompt is built
+            token: {"text": "..."} for each piece of the answer
+            done: {"usage": {...} or None, "cached": bool}
+        or an error event ({"detail": "..."}) in place of the rest. Closing
+        the iterator (e.g. when the client disconnects) closes the upstream
+        Mistral stream, so generation stops there too.
+        """
+        started = time.perf_counter()
         try:
             # Retrieve context (same as non-streaming)
-            question_embedding = await self.embedding_service.generate_single_embedding(question)
-            relevant_chunks = self.vector_store.search_similar_chunks(
-                query_embedding=question_embedding,
-                resource_id=resource_id,
-                top_k=top_k
-            )
+            with span("embed_question"):
+                question_embedding = await self._question_embedding(question)
             
-            if not relevant_chunks:
-                yield "I couldn't find relevant information in the uploaded PDF to answer your question."
+            cached, generation = await self._cached_answer(
+                resource_ids, question_embedding, conversation_history
+            )
+            if cached is not None:
+                TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started)
+                yield {"event": "citations", "data": {"citations": cached['citations']}}
+                yield {"event": "token", "data": {"text": cached['answer']}}
+                yield {"event": "done", "data": {"usage": None, "cached": True}}
                 return
             
-            context = self._build_context(relevant_chunks)
-            system_prompt = self._create_system_prompt(context)
+            with span("retrieve"):
+                relevant_chunks = await self._retrieve(
+                    resource_ids, question, question_embedding, self._fetch_k(top_k)
+                )
+            [relevant_chunks] = await self._rerank([question], [relevant_chunks], top_k)
             
-            messages = [{"role": "system", "content": system_prompt}]
+            if not relevant_chunks:
+                yield {"event": "citations", "data": {"citations": []}}
+                yield {"event": "token", "data": {"text": NO_CONTEXT_ANSWER}}
+                yield {"event": "done", "data": {"usage": None, "cached": False}}
+                return
             
-            if conversation_history:
-                for msg in conversation_history[-6:]:
-                    messages.append({
-                        "role": msg.get("role", "user"),
-                        "content": msg.get("content", "")
-                    })
+            with span("prompt_build"):
+                passages, history = self._pack(relevant_chunks, conversation_history)
+                multiple_sources = len(resource_ids) > 1
+                context = self._build_context(passages, multiple_sources)
+                system_prompt = self._create_system_prompt(context, multiple_sources)
+                
+                messages = [{"role": "system", "content": system_prompt}]
+                messages.extend(history)
+                
+                messages.append({"role": "user", "content": question})
             
-            messages.append({"role": "user", "content": question})
+            citations = self._format_citations(passages)
+            yield {"event": "citations", "data": {"citations": citations}}
             
             # Stream response from Mistral
-            stream = self.mistral_client.chat.stream(
-                model=self.chat_model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1000
-            )
+            answer_parts = []
+            usage = None
+            with span("llm_stream"):
+                async with aclosing(self._stream_chat(messages)) as stream:
+                    async for chunk in stream:
+                        self._record_usage(chunk.usage)
+                        usage = chunk.usage or usage
+                        if chunk.choices[0].delta.content:
+                            if not answer_parts:
+                                TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started)
+                            answer_parts.append(chunk.choices[0].delta.content)
+                            yield {"event": "token", "data": {"text": chunk.choices[0].delta.content}}
             
-            for chunk in stream:
-                if chunk.data.choices[0].delta.content:
-                    yield chunk.data.choices[0].delta.content
+            await self._store_answer(
+                resource_ids, question_embedding, conversation_history,
+                "".join(answer_parts), citations, generation
+            )
+            yield {
+                "event": "done",
+                "data": {
+                    "usage": {
+                        "prompt_tokens": usage.prompt_tokens,
+                        "completion_tokens": usage.completion_tokens,
+                        "total_tokens": usage.total_tokens,
+                    } if usage is not None else None,
+                    "cached": False,
+                },
+            }
             
         except Exception as e:
-            yield f"Error: {str(e)}"
+            yield {"event": "error", "data": {"detail": str(e)}}
+    
+    async def _stream_chat(self, messages: List[Dict]) -> AsyncIterator[models.CompletionChunk]:
+        """
+        Stream completion chunks from Mistral over a response held here
+
+        The SDK's event stream keeps its httpx response out of reach, so an
+        abandoned stream would leave the connection open (and the provider
+        generating tokens) until garbage collection. Opening the request
+        ourselves means closing this generator closes the response.
+        """
+        request = {
+            "model": self.chat_model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 1000,
+            "stream": True,
+        }
+        headers = {
+            "Authorization": f"Bearer {self.mistral_api_key}",
+            "Accept": "text/event-stream",
+        }
+        async with self.http_client.stream(
+            "POST", f"{self.server_url}/v1/chat/completions", json=request, headers=headers
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(f"Mistral API error (status {response.status_code}): {response.text}")
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                yield models.CompletionChunk.model_validate_json(data)
+    
+    @staticmethod
+    def _record_usage(usage):
+        """Count provider-reported prompt and completion tokens"""
+        if usage is None:
+            return
+        LLM_TOKENS.labels("prompt").inc(usage.prompt_tokens)
+        LLM_TOKENS.labels("completion").inc(usage.completion_tokens)
     
-    def _build_context(self, chunks: List[Dict]) -> str:
-        """Build context string from retrieved chunks"""
+    def _format_citations(self, chunks: List[Dict]) -> List[Dict]:
+        """Citations for the top 3 chunks"""
+        return [
+            {
+                'page': chunk['page'],
+                'page_end': chunk.get('page_end', chunk['page']),
+                'text': chunk['text'][:200] + "..." if len(chunk['text']) > 200 else chunk['text'],
+                'relevance_score': chunk['relevance_score'],
+                'resource_id': chunk.get('resource_id'),
+                'filename': chunk.get('filename')
+            }
+            for chunk in chunks[:3]
+        ]
+    
+    def _build_context(self, chunks: List[Dict], multiple_sources: bool = False) -> str:
+        """Build context string from retrieved chunks, labelled by file when several are queried"""
         context_parts = []
         
         for chunk in chunks:
-            context_parts.append(f"[Page {chunk['page']}]: {chunk['text']}")
+            page_end = chunk.get('page_end', chunk['page'])
+            pages = f"Page {chunk['page']}" if page_end == chunk['page'] else f"Pages {chunk['page']}-{page_end}"
+            if multiple_sources:
+                context_parts.append(f"[{chunk.get('filename', '')}, {pages}]: {chunk['text']}")
+            else:
+                context_parts.append(f"[{pages}]: {chunk['text']}")
         
         return "\n\n".join(context_parts)
     
-    def _create_system_prompt(self, context: str) -> str:
+    def _create_system_prompt(self, context: str, multiple_sources: bool = False) -> str:
         """Create system prompt with context"""
+        if multiple_sources:
+            source = "several PDF documents"
+            citation_rule = "mention the document and page number in square brackets like [filename.pdf, Page X]"
+        else:
+            source = "a PDF document"
+            citation_rule = "mention the page number in square brackets like [Page X]"
+        
         return f"""You are an AI study assistant helping students learn from their study materials. 
-You have access to content from a PDF document uploaded by the student.
+You have access to content from {source} uploaded by the student.
 
 Answer questions based ONLY on the provided context from the PDF. If the answer is not in the context, say so clearly.
 
-When you reference information, mention the page number in square brackets like [Page X].
+When you reference information, {citation_rule}.
 
 CONTEXT FROM PDF:
 {context}
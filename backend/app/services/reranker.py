@@ -0,0 +1,145 @@
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .lexical_index import tokenize
+
+
+class Reranker:
+    """
+    Rescores over-fetched candidate chunks on the CPU and keeps the best few
+
+    Each candidate gets a base score mixing three features, all scaled to
+    0..1 across the candidates of one query:
+
+    - relevance: the retrieval score (cosine, fused rank or BM25)
+    - term overlap: IDF-weighted share of the question's terms in the chunk
+    - page proximity: closeness to other strong candidates of the same
+      resource (answers tend to sit in one section)
+
+    Chunks are then picked greedily by maximal marginal relevance:
+    mmr_lambda * base - (1 - mmr_lambda) * (highest term-vector cosine
+    similarity to a chunk already picked), so near-duplicate chunks do not
+    fill the prompt.
+
+    Term counts of the cache_size most recently seen chunk texts are kept,
+    since the same chunks come back for many questions about a resource.
+    """
+
+    def __init__(
+        self,
+        candidates: int = 20,
+        keep: int = 3,
+        mmr_lambda: float = 0.7,
+        relevance_weight: float = 0.6,
+        overlap_weight: float = 0.3,
+        proximity_weight: float = 0.1,
+        page_scale: float = 2.0,
+        cache_size: int = 4096
+    ):
+        self.candidates = candidates
+        self.keep = keep
+        self.mmr_lambda = mmr_lambda
+        self.relevance_weight = relevance_weight
+        self.overlap_weight = overlap_weight
+        self.proximity_weight = proximity_weight
+        self.page_scale = page_scale
+        self.cache_size = cache_size
+        self._terms: "OrderedDict[str, Counter]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rerank(self, question: str, chunks: List[Dict], keep: Optional[int] = None) -> List[Dict]:
+        """The `keep` best chunks (default self.keep), in pick order, with a rerank_score"""
+        keep = self.keep if keep is None else keep
+        if len(chunks) <= 1:
+            return chunks[:keep]
+
+        counts, idf, question_terms = self._term_matrix(question, chunks)
+        base = (
+            self.relevance_weight * self._relevance(chunks)
+            + self.overlap_weight * self._overlap(counts, idf, question_terms)
+            + self.proximity_weight * self._proximity(chunks)
+        )
+
+        rows = np.log1p(counts) * idf
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        rows /= np.where(norms == 0, 1, norms)
+        similarity = rows @ rows.T
+
+        picked = []
+        redundancy = np.zeros(len(chunks), dtype=np.float32)
+        available = np.ones(len(chunks), dtype=bool)
+        for _ in range(min(keep, len(chunks))):
+            scores = self.mmr_lambda * base - (1 - self.mmr_lambda) * redundancy
+            best = int(np.argmax(np.where(available, scores, -np.inf)))
+            picked.append((best, float(scores[best])))
+            available[best] = False
+            np.maximum(redundancy, similarity[best], out=redundancy)
+
+        return [{**chunks[i], 'rerank_score': score} for i, score in picked]
+
+    def _term_counts(self, text: str) -> Counter:
+        with self._lock:
+            counts = self._terms.get(text)
+            if counts is not None:
+                self._terms.move_to_end(text)
+                return counts
+        counts = Counter(tokenize(text))
+        with self._lock:
+            self._terms[text] = counts
+            while len(self._terms) > self.cache_size:
+                self._terms.popitem(last=False)
+        return counts
+
+    def _term_matrix(self, question: str, chunks: List[Dict]):
+        """
+        (counts, idf, question_terms): term counts of each candidate over
+        the candidates' vocabulary, whose first question_terms columns are
+        the question's terms, and IDF within the candidates
+        """
+        documents = [self._term_counts(chunk['text']) for chunk in chunks]
+        vocabulary: Dict[str, int] = {}
+        for term in dict.fromkeys(tokenize(question)):
+            vocabulary[term] = len(vocabulary)
+        question_terms = len(vocabulary)
+        for document in documents:
+            for term in document:
+                vocabulary.setdefault(term, len(vocabulary))
+
+        counts = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+        for row, document in enumerate(documents):
+            counts[row, [vocabulary[term] for term in document]] = list(document.values())
+
+        df = (counts > 0).sum(axis=0)
+        idf = np.log1p(len(documents) / np.maximum(df, 1)).astype(np.float32)
+        # Question terms no candidate contains say nothing about the ranking
+        idf[:question_terms][df[:question_terms] == 0] = 0
+        return counts, idf, question_terms
+
+    @staticmethod
+    def _relevance(chunks: List[Dict]) -> np.ndarray:
+        scores = np.array([chunk['relevance_score'] for chunk in chunks], dtype=np.float32)
+        spread = scores.max() - scores.min()
+        return (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+    @staticmethod
+    def _overlap(counts: np.ndarray, idf: np.ndarray, question_terms: int) -> np.ndarray:
+        weights = idf[:question_terms]
+        if not weights.sum():
+            return np.zeros(len(counts), dtype=np.float32)
+        return (counts[:, :question_terms] > 0) @ weights / weights.sum()
+
+    def _proximity(self, chunks: List[Dict]) -> np.ndarray:
+        """Best relevance-weighted closeness (in pages) to another candidate of the same resource"""
+        relevance = self._relevance(chunks)
+        pages = np.array(
+            [(chunk['page'] + chunk.get('page_end', chunk['page'])) / 2 for chunk in chunks],
+            dtype=np.float32
+        )
+        resources = np.array([str(chunk.get('resource_id')) for chunk in chunks])
+        closeness = np.exp(-np.abs(pages[:, None] - pages[None, :]) / self.page_scale)
+        closeness *= resources[:, None] == resources[None, :]
+        np.fill_diagonal(closeness, 0)
+        return (closeness * relevance[None, :]).max(axis=1)
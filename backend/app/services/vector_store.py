@@ -1,24 +1,425 @@
 import chromadb
+from chromadb.api.client import SharedSystemClient
 from chromadb.config import Settings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from typing import List, Dict, Optional
-import uuid
+from urllib.parse import urlparse
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .partitions import PartitionRegistry
+from .metrics import span
+import asyncio
+import hashlib
+import os
+import threading
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash of a chunk's text, used to find unchanged chunks on re-index"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
 
 class VectorStore:
-    """Service for storing and retrieving document chunks using ChromaDB"""
-    
-    def __init__(self, persist_directory: str, collection_name: str):
-        # Initialize ChromaDB with persistence
-        self.client = chromadb.Client(Settings(
-            persist_directory=persist_directory,
-            anonymized_telemetry=False
-        ))
+    """
+    Interface for storing and retrieving document chunks
+    
+    Backends implement the blocking methods; async callers use the *_async
+    wrappers, which run them on a bounded thread pool. With a lexical index
+    attached, backends also index chunk text for BM25 and hybrid search.
+    """
+    
+    def __init__(self, max_workers: int = 4, lexical_index: Optional[LexicalIndex] = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="vector-store"
+        )
+        self.lexical_index = lexical_index
+    
+    def add_document_chunks(
+        self,
+        resource_id: str,
+        chunks: List[Dict],
+        embeddings: List[List[float]],
+        metadata: Dict
+    ) -> int:
+        """Add chunks with their embeddings; returns the number added"""
+        raise NotImplementedError
+    
+    def search_similar_chunks(
+        self,
+        query_embedding: List[float],
+        resource_id: str,
+        top_k: int = 5
+    ) -> List[Dict]:
+        """
+        Most similar chunks of a resource, best first
+        
+        Each result has text, page, page_end, chunk_id, resource_id,
+        filename and a cosine-similarity relevance_score.
+        """
+        raise NotImplementedError
+    
+    def search_similar_chunks_batch(
+        self,
+        query_embeddings: List[List[float]],
+        resource_id: str,
+        top_k: int = 5
+    ) -> List[List[Dict]]:
+        """search_similar_chunks for many queries; backends override this to score them together"""
+        return [
+            self.search_similar_chunks(query_embedding, resource_id, top_k)
+            for query_embedding in query_embeddings
+        ]
+    
+    def delete_document(self, resource_id: str) -> bool:
+        """Delete all chunks for a resource; returns whether any existed"""
+        raise NotImplementedError
+    
+    def get_resource_chunk_count(self, resource_id: str) -> int:
+        """Number of chunks stored for a resource"""
+        raise NotImplementedError
+    
+    def get_chunk_hashes(self, resource_id: str) -> List[Optional[Dict]]:
+        """
+        Stored chunks of a resource indexed by chunk_id: each is a dict of
+        hash, page and page_end (None where no chunk has that id)
+        """
+        raise NotImplementedError
+    
+    def get_chunk_embeddings(self, resource_id: str, chunk_ids: List[int]) -> List[List[float]]:
+        """Stored vectors of a resource's chunks, in the order of chunk_ids"""
+        raise NotImplementedError
+    
+    def upsert_document_chunks(
+        self,
+        resource_id: str,
+        chunks: List[Dict],
+        embeddings: List[List[float]],
+        metadata: Dict
+    ) -> int:
+        """
+        Write chunks by chunk_id, replacing any stored chunk with the same id
+        
+        Unlike add_document_chunks this leaves the lexical index alone; see
+        reindex_lexical. Returns the number written.
+        """
+        raise NotImplementedError
+    
+    def truncate_document(self, resource_id: str, chunk_count: int) -> int:
+        """Delete a resource's chunks with chunk_id >= chunk_count; returns how many"""
+        raise NotImplementedError
+    
+    def apply_reindex(
+        self,
+        resource_id: str,
+        chunks: List[Dict],
+        embeddings: List[List[float]],
+        chunk_count: int,
+        all_chunks: List[Dict],
+        metadata: Dict
+    ) -> int:
+        """
+        Apply the changes of a finished re-index in one call: upsert chunks,
+        truncate to chunk_count and rebuild the BM25 postings from all_chunks
+
+        Nothing is written before this, so a re-index that fails earlier
+        leaves the stored index as it was. Returns the number upserted.
+        """
+        written = self.upsert_document_chunks(resource_id, chunks, embeddings, metadata)
+        self.truncate_document(resource_id, chunk_count)
+        self.reindex_lexical(resource_id, all_chunks, metadata)
+        return written
+    
+    def reindex_lexical(self, resource_id: str, chunks: List[Dict], metadata: Dict):
+        """Replace a resource's BM25 postings with these chunks"""
+        if self.lexical_index is not None:
+            self.lexical_index.replace(resource_id, chunks, metadata)
+    
+    def warm_resource(self, resource_id: str) -> bool:
+        """Load a resource's indexes into memory ahead of its first query; returns whether it exists"""
+        if self.lexical_index is not None:
+            self.lexical_index.warm(resource_id)
+        return False
+    
+    def _index_lexical(self, resource_id: str, chunks: List[Dict], metadata: Dict):
+        if self.lexical_index is not None:
+            self.lexical_index.add(resource_id, chunks, metadata)
+    
+    def _delete_lexical(self, resource_id: str):
+        if self.lexical_index is not None:
+            self.lexical_index.delete(resource_id)
+    
+    def search_lexical(self, query_text: str, resource_id: str, top_k: int = 5) -> List[Dict]:
+        """BM25 top-k chunks of a resource (empty without a lexical index)"""
+        try:
+            if self.lexical_index is None:
+                return []
+            return self.lexical_index.search(query_text, resource_id, top_k)
+        except Exception as e:
+            raise Exception(f"Failed to search lexical index: {str(e)}")
+    
+    def search_hybrid(
+        self,
+        query_embedding: List[float],
+        query_text: str,
+        resource_id: str,
+        top_k: int = 5,
+        candidates: int = 20,
+        rrf_k: int = 60
+    ) -> List[Dict]:
+        """
+        Vector and BM25 results fused with reciprocal rank fusion
+        
+        Each side contributes its best `candidates` chunks; the fused
+        relevance_score is 1.0 for a chunk ranked first by both.
+        """
+        vector_results = self.search_similar_chunks(query_embedding, resource_id, candidates)
+        lexical_results = self.search_lexical(query_text, resource_id, candidates)
+        return reciprocal_rank_fusion([vector_results, lexical_results], top_k, rrf_k)
+    
+    def search_hybrid_batch(
+        self,
+        query_embeddings: List[List[float]],
+        query_texts: List[str],
+        resource_id: str,
+        top_k: int = 5,
+        candidates: int = 20,
+        rrf_k: int = 60
+    ) -> List[List[Dict]]:
+        """search_hybrid for many queries, with the vector side scored as one batch"""
+        vector_results = self.search_similar_chunks_batch(query_embeddings, resource_id, candidates)
+        return [
+            reciprocal_rank_fusion(
+                [vectors, self.search_lexical(query_text, resource_id, candidates)], top_k, rrf_k
+            )
+            for vectors, query_text in zip(vector_results, query_texts)
+        ]
+    
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+    
+    async def add_document_chunks_async(self, *args, **kwargs) -> int:
+        """add_document_chunks on the vector store executor"""
+        with span("vector_add"):
+            return await self._run(self.add_document_chunks, *args, **kwargs)
+    
+    async def search_similar_chunks_async(self, *args, **kwargs) -> List[Dict]:
+        """search_similar_chunks on the vector store executor"""
+        with span("vector_search"):
+            return await self._run(self.search_similar_chunks, *args, **kwargs)
+    
+    async def search_similar_chunks_batch_async(self, *args, **kwargs) -> List[List[Dict]]:
+        """search_similar_chunks_batch on the vector store executor"""
+        with span("vector_search_batch"):
+            return await self._run(self.search_similar_chunks_batch, *args, **kwargs)
+    
+    async def search_lexical_async(self, *args, **kwargs) -> List[Dict]:
+        """search_lexical on the vector store executor"""
+        with span("lexical_search"):
+            return await self._run(self.search_lexical, *args, **kwargs)
+    
+    async def search_hybrid_async(self, *args, **kwargs) -> List[Dict]:
+        """search_hybrid on the vector store executor"""
+        with span("hybrid_search"):
+            return await self._run(self.search_hybrid, *args, **kwargs)
+    
+    async def search_hybrid_batch_async(self, *args, **kwargs) -> List[List[Dict]]:
+        """search_hybrid_batch on the vector store executor"""
+        with span("hybrid_search_batch"):
+            return await self._run(self.search_hybrid_batch, *args, **kwargs)
+    
+    async def warm_resource_async(self, *args, **kwargs) -> bool:
+        """warm_resource on the vector store executor"""
+        with span("vector_warm"):
+            return await self._run(self.warm_resource, *args, **kwargs)
+    
+    async def get_chunk_hashes_async(self, *args, **kwargs) -> List[Optional[Dict]]:
+        """get_chunk_hashes on the vector store executor"""
+        return await self._run(self.get_chunk_hashes, *args, **kwargs)
+    
+    async def get_chunk_embeddings_async(self, *args, **kwargs) -> List[List[float]]:
+        """get_chunk_embeddings on the vector store executor"""
+        return await self._run(self.get_chunk_embeddings, *args, **kwargs)
+    
+    async def apply_reindex_async(self, *args, **kwargs) -> int:
+        """apply_reindex on the vector store executor"""
+        with span("vector_upsert"):
+            return await self._run(self.apply_reindex, *args, **kwargs)
+    
+    async def delete_document_async(self, *args, **kwargs) -> bool:
+        """delete_document on the vector store executor"""
+        with span("vector_delete"):
+            return await self._run(self.delete_document, *args, **kwargs)
+    
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+class ChromaVectorStore(VectorStore):
+    """
+    Service for storing and retrieving document chunks using ChromaDB
+    
+    In "shared" partition mode every resource lives in one collection and
+    each call filters on resource_id metadata, so cost grows with the whole
+    corpus. In "resource" mode (the default) each resource gets its own
+    collection, tracked in a PartitionRegistry, and queries, counts and
+    deletes only touch that resource's chunks.
+    
+    Data is persisted under persist_directory and survives restarts. A
+    partition's HNSW index is loaded on its first query and only the
+    max_loaded most recently used partitions are kept open. Chroma itself
+    keeps every segment it has loaded for the life of its client, so once
+    max_loaded partitions have been evicted the embedded client is dropped
+    and re-created, at the first moment no call is using a partition.
+    
+    With server_url the collections live in a Chroma server process
+    (`chroma run`) instead, so several app worker processes can share
+    them; the partition registry and lexical index stay in
+    persist_directory.
+    """
+    
+    PARTITION_MODES = ("shared", "resource")
+    
+    def __init__(
+        self,
+        persist_directory: str,
+        collection_name: str,
+        max_workers: int = 4,
+        partition_mode: str = "resource",
+        lexical_index: Optional[LexicalIndex] = None,
+        max_loaded: int = 128,
+        server_url: Optional[str] = None
+    ):
+        super().__init__(max_workers, lexical_index)
+        if partition_mode not in self.PARTITION_MODES:
+            raise ValueError(f"Unknown partition mode: {partition_mode}")
+        
+        self.persist_directory = persist_directory
+        self.server_url = server_url
+        self.client = self._connect()
+        self.collection_name = collection_name
+        self.partition_mode = partition_mode
+        self.max_loaded = max_loaded
+        self._collection = None
         
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}  # Use cosine similarity
+        self.registry = PartitionRegistry(os.path.join(persist_directory, "partitions.sqlite"))
+        self._partitions: "OrderedDict[str, object]" = OrderedDict()
+        self._partitions_lock = threading.Lock()
+        # Resource id -> calls using its partition, and partitions evicted
+        # since the client was last re-created
+        self._in_use: Dict[str, int] = {}
+        self._evictions = 0
+        # Forget partitions whose collections are gone (e.g. a store written by
+        # the old in-memory client, or a crash between create and register)
+        self.registry.retain(c.name for c in self.client.list_collections())
+    
+    def _connect(self):
+        """A Chroma client for server_url, or an embedded one on persist_directory"""
+        if self.server_url:
+            url = urlparse(self.server_url)
+            return chromadb.HttpClient(
+                host=url.hostname,
+                port=str(url.port or (443 if url.scheme == "https" else 8000)),
+                ssl=url.scheme == "https",
+                settings=Settings(anonymized_telemetry=False)
+            )
+        # chromadb.Client is in-memory on this Chroma version; PersistentClient writes to disk
+        return chromadb.PersistentClient(
+            path=self.persist_directory,
+            settings=Settings(anonymized_telemetry=False)
         )
     
+    @property
+    def collection(self):
+        """The shared collection (created on first use)"""
+        if self._collection is None:
+            self._collection = self.client.get_or_create_collection(
+                name=self.collection_name,
+                metadata={"hnsw:space": "cosine"}  # Use cosine similarity
+            )
+        return self._collection
+    
+    @contextmanager
+    def _partition(self, resource_id: str, create: bool = False):
+        """
+        A resource's own collection, or None if it has none and create is
+        False; its segments stay loaded until the block exits
+        """
+        with self._partitions_lock:
+            collection = self._load_partition(resource_id, create)
+            if collection is not None:
+                self._in_use[resource_id] = self._in_use.get(resource_id, 0) + 1
+        try:
+            yield collection
+        finally:
+            if collection is not None:
+                with self._partitions_lock:
+                    self._in_use[resource_id] -= 1
+                    if not self._in_use[resource_id]:
+                        del self._in_use[resource_id]
+                        self._maybe_reconnect()
+    
+    def _load_partition(self, resource_id: str, create: bool):
+        """Open a resource's collection into the LRU (under the partitions lock)"""
+        collection = self._partitions.get(resource_id)
+        if collection is not None:
+            self._partitions.move_to_end(resource_id)
+            return collection
+        
+        entry = self.registry.get(resource_id)
+        if entry is None and not create:
+            return None
+        name = entry["collection"] if entry else PartitionRegistry.collection_name(
+            self.collection_name, resource_id
+        )
+        collection = self.client.get_or_create_collection(
+            name=name,
+            metadata={"hnsw:space": "cosine", "resource_id": resource_id}
+        )
+        if entry is None:
+            self.registry.register(resource_id, name)
+        self._partitions[resource_id] = collection
+        while len(self._partitions) > self.max_loaded:
+            self._partitions.popitem(last=False)
+            self._evictions += 1
+        return collection
+    
+    def _maybe_reconnect(self):
+        """
+        Re-create the embedded client once max_loaded partitions have been
+        evicted and no call is using one (under the partitions lock)
+        
+        Dropping the client, and Chroma's cached system behind it, is the
+        only public way to release the segments Chroma 0.4 keeps loaded.
+        Vectors not yet flushed to the HNSW files are replayed from Chroma's
+        write log on next load. A Chroma server manages its own memory.
+        """
+        if self.server_url or self._in_use or self._evictions < self.max_loaded:
+            return
+        SharedSystemClient.clear_system_cache()
+        self.client = self._connect()
+        self._partitions.clear()
+        self._collection = None
+        self._evictions = 0
+    
+    def warm_resource(self, resource_id: str) -> bool:
+        """Open a resource's partition and load its HNSW index with a one-result query"""
+        super().warm_resource(resource_id)
+        if self.partition_mode != "resource":
+            return False
+        try:
+            with self._partition(resource_id) as collection:
+                if collection is None:
+                    return False
+                sample = collection.get(limit=1, include=["embeddings"])
+                if sample['embeddings']:
+                    collection.query(query_embeddings=sample['embeddings'], n_results=1)
+                return True
+        except Exception as e:
+            raise Exception(f"Failed to warm resource: {str(e)}")
+    
     def add_document_chunks(
         self, 
         resource_id: str,
@@ -39,39 +440,144 @@ class VectorStore:
             Number of chunks added
         """
         try:
-            ids = []
-            texts = []
-            chunk_metadata = []
-            
-            for i, chunk in enumerate(chunks):
-                # Create unique ID for each chunk
-                chunk_id = f"{resource_id}_chunk_{i}"
-                ids.append(chunk_id)
-                texts.append(chunk['text'])
-                
-                # Combine chunk metadata with document metadata
-                meta = {
-                    'resource_id': resource_id,
-                    'chunk_id': chunk['chunk_id'],
-                    'page': chunk['page'],
-                    'word_count': chunk['word_count'],
-                    'filename': metadata.get('filename', ''),
-                }
-                chunk_metadata.append(meta)
-            
-            # Add to ChromaDB
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=chunk_metadata
-            )
+            ids, texts, chunk_metadata = self._chunk_records(resource_id, chunks, metadata)
+            
+            if self.partition_mode == "resource":
+                with self._partition(resource_id, create=True) as collection:
+                    collection.add(
+                        ids=ids,
+                        embeddings=embeddings,
+                        documents=texts,
+                        metadatas=chunk_metadata
+                    )
+                self.registry.add_chunks(resource_id, len(ids))
+            else:
+                self.collection.add(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=texts,
+                    metadatas=chunk_metadata
+                )
+            self._index_lexical(resource_id, chunks, metadata)
             
             return len(chunks)
             
         except Exception as e:
             raise Exception(f"Failed to add chunks to vector store: {str(e)}")
     
+    @staticmethod
+    def _chunk_records(resource_id: str, chunks: List[Dict], metadata: Dict):
+        """Chroma ids, documents and metadatas for chunks"""
+        ids = []
+        texts = []
+        chunk_metadata = []
+        
+        for chunk in chunks:
+            # Create unique ID for each chunk (stable across batches)
+            ids.append(f"{resource_id}_chunk_{chunk['chunk_id']}")
+            texts.append(chunk['text'])
+            
+            # Combine chunk metadata with document metadata
+            meta = {
+                'resource_id': resource_id,
+                'chunk_id': chunk['chunk_id'],
+                'page': chunk['page'],
+                'page_end': chunk.get('page_end', chunk['page']),
+                'word_count': chunk['word_count'],
+                'filename': metadata.get('filename', ''),
+                'hash': chunk.get('hash') or chunk_hash(chunk['text']),
+            }
+            chunk_metadata.append(meta)
+        return ids, texts, chunk_metadata
+    
+    @contextmanager
+    def _resource_collection(self, resource_id: str, create: bool = False):
+        """(collection, where filter) holding a resource's chunks, or (None, None)"""
+        if self.partition_mode == "resource":
+            with self._partition(resource_id, create=create) as collection:
+                yield collection, None
+        else:
+            yield self.collection, {"resource_id": resource_id}
+    
+    def get_chunk_hashes(self, resource_id: str) -> List[Optional[Dict]]:
+        """Hash, page and page_end of each stored chunk, by chunk_id"""
+        try:
+            with self._resource_collection(resource_id) as (collection, where):
+                if collection is None:
+                    return []
+                results = collection.get(where=where, include=["metadatas", "documents"])
+            
+            hashes: List[Optional[Dict]] = []
+            for meta, document in zip(results['metadatas'], results['documents']):
+                position = meta['chunk_id']
+                hashes.extend([None] * (position + 1 - len(hashes)))
+                hashes[position] = {
+                    'hash': meta.get('hash') or chunk_hash(document),
+                    'page': meta['page'],
+                    'page_end': meta.get('page_end', meta['page']),
+                }
+            return hashes
+            
+        except Exception as e:
+            raise Exception(f"Failed to read chunk hashes: {str(e)}")
+    
+    def get_chunk_embeddings(self, resource_id: str, chunk_ids: List[int]) -> List[List[float]]:
+        """Stored vectors of a resource's chunks, in the order of chunk_ids"""
+        if not chunk_ids:
+            return []
+        try:
+            ids = [f"{resource_id}_chunk_{chunk_id}" for chunk_id in chunk_ids]
+            with self._resource_collection(resource_id) as (collection, _):
+                results = collection.get(ids=ids, include=["embeddings"])
+            by_id = dict(zip(results['ids'], results['embeddings']))
+            return [list(by_id[chunk_id]) for chunk_id in ids]
+            
+        except Exception as e:
+            raise Exception(f"Failed to read chunk embeddings: {str(e)}")
+    
+    def upsert_document_chunks(
+        self,
+        resource_id: str,
+        chunks: List[Dict],
+        embeddings: List[List[float]],
+        metadata: Dict
+    ) -> int:
+        """Write chunks by chunk_id, replacing stored chunks with the same id"""
+        if not chunks:
+            return 0
+        try:
+            ids, texts, chunk_metadata = self._chunk_records(resource_id, chunks, metadata)
+            with self._resource_collection(resource_id, create=True) as (collection, _):
+                collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=texts,
+                    metadatas=chunk_metadata
+                )
+                if self.partition_mode == "resource":
+                    self.registry.set_chunks(resource_id, collection.count())
+            return len(chunks)
+            
+        except Exception as e:
+            raise Exception(f"Failed to upsert chunks: {str(e)}")
+    
+    def truncate_document(self, resource_id: str, chunk_count: int) -> int:
+        """Delete a resource's chunks with chunk_id >= chunk_count"""
+        try:
+            with self._resource_collection(resource_id) as (collection, where):
+                if collection is None:
+                    return 0
+                beyond = {"chunk_id": {"$gte": chunk_count}}
+                results = collection.get(where={"$and": [where, beyond]} if where else beyond, include=[])
+                if results['ids']:
+                    collection.delete(ids=results['ids'])
+                if self.partition_mode == "resource":
+                    self.registry.set_chunks(resource_id, collection.count())
+                return len(results['ids'])
+            
+        except Exception as e:
+            raise Exception(f"Failed to delete chunks: {str(e)}")
+    
     def search_similar_chunks(
         self, 
         query_embedding: List[float],
@@ -89,33 +595,76 @@ class VectorStore:
         Returns:
             List of similar chunks with metadata and relevance scores
         """
+        return self.search_similar_chunks_batch([query_embedding], resource_id, top_k)[0]
+    
+    def search_similar_chunks_batch(
+        self,
+        query_embeddings: List[List[float]],
+        resource_id: str,
+        top_k: int = 5
+    ) -> List[List[Dict]]:
+        """Top-k chunks of a resource for each query, in one Chroma query"""
+        if not query_embeddings:
+            return []
         try:
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k,
-                where={"resource_id": resource_id}
-            )
-            
-            # Format results
-            chunks = []
-            if results['ids'] and len(results['ids'][0]) > 0:
-                for i in range(len(results['ids'][0])):
-                    chunk = {
-                        'text': results['documents'][0][i],
-                        'page': results['metadatas'][0][i]['page'],
-                        'chunk_id': results['metadatas'][0][i]['chunk_id'],
-                        'relevance_score': 1 - results['distances'][0][i],  # Convert distance to similarity
-                    }
-                    chunks.append(chunk)
-            
-            return chunks
+            if self.partition_mode == "resource":
+                with self._partition(resource_id) as collection:
+                    count = self.get_resource_chunk_count(resource_id) if collection else 0
+                    if not count:
+                        return [[] for _ in query_embeddings]
+                    results = collection.query(
+                        query_embeddings=query_embeddings,
+                        n_results=min(top_k, count)
+                    )
+            else:
+                results = self.collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=top_k,
+                    where={"resource_id": resource_id}
+                )
+            return self._format_results(results, resource_id)
             
         except Exception as e:
             raise Exception(f"Failed to search vector store: {str(e)}")
     
+    @staticmethod
+    def _format_results(results: Dict, resource_id: str) -> List[List[Dict]]:
+        """Chunks with similarity scores for each query of a Chroma query result"""
+        return [
+            [
+                {
+                    'text': document,
+                    'page': meta['page'],
+                    'page_end': meta.get('page_end', meta['page']),
+                    'chunk_id': meta['chunk_id'],
+                    'resource_id': resource_id,
+                    'filename': meta.get('filename', ''),
+                    'relevance_score': 1 - distance,  # Convert distance to similarity
+                }
+                for document, meta, distance in zip(documents, metadatas, distances)
+            ]
+            for documents, metadatas, distances in zip(
+                results['documents'], results['metadatas'], results['distances']
+            )
+        ]
+    
     def delete_document(self, resource_id: str) -> bool:
         """Delete all chunks for a specific resource"""
         try:
+            self._delete_lexical(resource_id)
+            if self.partition_mode == "resource":
+                with self._partitions_lock:
+                    self._partitions.pop(resource_id, None)
+                    entry = self.registry.get(resource_id)
+                    if entry is None:
+                        return False
+                    try:
+                        self.client.delete_collection(entry["collection"])
+                    except ValueError:
+                        pass  # collection already gone
+                    self.registry.remove(resource_id)
+                    return entry["chunk_count"] > 0
+            
             # Get all chunks for this resource
             results = self.collection.get(
                 where={"resource_id": resource_id}
@@ -133,10 +682,62 @@ class VectorStore:
     def get_resource_chunk_count(self, resource_id: str) -> int:
         """Get the number of chunks for a specific resource"""
         try:
+            if self.partition_mode == "resource":
+                entry = self.registry.get(resource_id)
+                return entry["chunk_count"] if entry else 0
+            
             results = self.collection.get(
                 where={"resource_id": resource_id}
             )
             return len(results['ids']) if results['ids'] else 0
         except:
             return 0
-
+    
+    def migrate_to_partitions(self, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Move every chunk of the shared collection into per-resource collections
+        
+        Chunks are copied batch by batch (ids, vectors, documents and metadata
+        unchanged) and deleted from the shared collection once copied, so an
+        interrupted migration can simply be re-run.
+        
+        Returns:
+            Number of chunks moved per resource
+        """
+        moved: Dict[str, int] = {}
+        while True:
+            batch = self.collection.get(
+                limit=batch_size,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            if not batch['ids']:
+                break
+            
+            groups: Dict[str, Dict[str, list]] = {}
+            for i, chunk_id in enumerate(batch['ids']):
+                resource_id = batch['metadatas'][i]['resource_id']
+                group = groups.setdefault(
+                    resource_id, {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+                )
+                group["ids"].append(chunk_id)
+                group["embeddings"].append(batch['embeddings'][i])
+                group["documents"].append(batch['documents'][i])
+                group["metadatas"].append(batch['metadatas'][i])
+            
+            for resource_id, group in groups.items():
+                # upsert keeps a re-run after a crash from duplicating chunks
+                with self._partition(resource_id, create=True) as collection:
+                    collection.upsert(**group)
+                moved[resource_id] = moved.get(resource_id, 0) + len(group["ids"])
+            self.collection.delete(ids=batch['ids'])
+        
+        # Counts are taken from the collections since a re-run may upsert
+        for resource_id in moved:
+            entry = self.registry.get(resource_id)
+            with self._partition(resource_id) as collection:
+                self.registry.add_chunks(resource_id, collection.count() - entry["chunk_count"])
+        return moved
+    
+    def close(self):
+        super().close()
+        self.registry.close()
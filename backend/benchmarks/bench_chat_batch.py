@@ -0,0 +1,96 @@
+"""
+Answering a practice-question list: one /api/chat call per question vs /api/chat/batch
+
+Ingests a synthetic PDF into the real app (fake Mistral API, answer cache
+off), then answers the same number of distinct questions two ways:
+
+- sequential: /api/chat one question after another, as a client script would
+- batch: one /api/chat/batch request, reading the NDJSON lines as they arrive
+
+and reports wall time, time to the first answer, and embeddings requests
+sent to the provider.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chat_batch --questions 200 --concurrency 8
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from .common import configure_backend_env, upload_and_wait
+from .fake_mistral import FakeMistralServer, ThreadedServer
+from .suite import make_questions
+from .synthetic_pdf import make_study_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="batch_llm_concurrency")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--embed-latency-ms", type=float, default=30.0)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--token-interval-ms", type=float, default=5.0)
+    parser.add_argument("--backend", default="numpy")
+    args = parser.parse_args()
+
+    server = FakeMistralServer(
+        latency_ms=args.embed_latency_ms,
+        first_token_ms=args.first_token_ms,
+        token_interval_ms=args.token_interval_ms
+    )
+    with tempfile.TemporaryDirectory() as data_dir, server as mistral_url:
+        configure_backend_env(
+            data_dir, mistral_url,
+            vector_store_backend=args.backend,
+            answer_cache_enabled="false",
+            batch_llm_concurrency=args.concurrency,
+            batch_max_questions=max(500, args.questions)
+        )
+        from app.main import app
+
+        results = {"questions": args.questions, "batch_llm_concurrency": args.concurrency}
+        with ThreadedServer(app) as base_url, httpx.Client(base_url=base_url, timeout=600) as client:
+            pdf = make_study_pdf(os.path.join(data_dir, "notes.pdf"), args.pages, seed=0)
+            resource_id = upload_and_wait(client, pdf)["resource_id"]
+
+            for mode, seed in (("sequential", 1), ("batch", 2)):
+                questions = make_questions(args.questions, seed)
+                requests_before = server.stats["requests"]
+                start = time.perf_counter()
+                first = None
+                answered = 0
+                if mode == "sequential":
+                    for question in questions:
+                        response = client.post("/api/chat", json={"question": question, "resource_id": resource_id})
+                        response.raise_for_status()
+                        answered += 1
+                        first = first or time.perf_counter() - start
+                else:
+                    body = {"resource_id": resource_id, "questions": questions}
+                    with client.stream("POST", "/api/chat/batch", json=body) as response:
+                        response.raise_for_status()
+                        for line in response.iter_lines():
+                            if line and "answer" in json.loads(line):
+                                answered += 1
+                                first = first or time.perf_counter() - start
+                elapsed = time.perf_counter() - start
+                results[mode] = {
+                    "answered": answered,
+                    "seconds": round(elapsed, 2),
+                    "questions_per_second": round(answered / elapsed, 1),
+                    "first_answer_ms": round(first * 1000, 1),
+                    "embed_requests": server.stats["requests"] - requests_before,
+                }
+
+    results["speedup"] = round(results["sequential"]["seconds"] / results["batch"]["seconds"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Citations latency and abandoned-generation cost of the SSE chat stream
+
+Starts the fake Mistral API and the real FastAPI app on local ports,
+ingests a synthetic PDF and, for --questions distinct questions (answer
+cache off), measures:
+
+- citations: time until the client has the citations, from the
+  `citations` event of /api/chat/stream?format=sse vs the full
+  /api/chat response the text stream had to be paired with
+- first_token: time to the first `token` event
+- disconnect: the client reads --read-tokens token events and closes the
+  connection; reports how many of the --answer-tokens tokens the provider
+  still generated and whether it saw the stream cancelled
+
+Usage (from backend/):
+    python -m benchmarks.bench_chat_sse --questions 20
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from .common import configure_backend_env, summarize_ms, upload_and_wait
+from .fake_mistral import FakeMistralServer, ThreadedServer
+from .synthetic_pdf import make_study_pdf
+
+
+def sse_timings(base_url: str, resource_id: str, question: str):
+    """(seconds to the citations event, seconds to the first token event)"""
+    start = time.perf_counter()
+    citations = first_token = None
+    # A client per stream, so closing it really drops the connection
+    with httpx.Client(base_url=base_url, timeout=120) as client, client.stream(
+        "POST", "/api/chat/stream", params={"format": "sse"},
+        json={"question": question, "resource_id": resource_id}
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line == "event: citations" and citations is None:
+                citations = time.perf_counter() - start
+            elif line == "event: token" and first_token is None:
+                first_token = time.perf_counter() - start
+    return citations, first_token
+
+
+def read_and_disconnect(base_url: str, resource_id: str, question: str, read_tokens: int):
+    with httpx.Client(base_url=base_url, timeout=120) as client, client.stream(
+        "POST", "/api/chat/stream", params={"format": "sse"},
+        json={"question": question, "resource_id": resource_id}
+    ) as response:
+        response.raise_for_status()
+        seen = 0
+        for line in response.iter_lines():
+            seen += line == "event: token"
+            if seen >= read_tokens:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--token-interval-ms", type=float, default=20.0)
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    parser.add_argument("--read-tokens", type=int, default=5, help="tokens read before disconnecting")
+    args = parser.parse_args()
+
+    server = FakeMistralServer(
+        latency_ms=10,
+        first_token_ms=args.first_token_ms,
+        token_interval_ms=args.token_interval_ms,
+        answer_tokens=args.answer_tokens
+    )
+    with tempfile.TemporaryDirectory() as data_dir, server as mistral_url:
+        configure_backend_env(data_dir, mistral_url, answer_cache_enabled="false")
+        from app.main import app
+
+        with ThreadedServer(app) as base_url:
+            with httpx.Client(base_url=base_url, timeout=120) as client:
+                pdf = make_study_pdf(os.path.join(data_dir, "notes.pdf"), args.pages, seed=0)
+                resource_id = upload_and_wait(client, pdf)["resource_id"]
+
+                chat_seconds = []
+                for i in range(args.questions):
+                    start = time.perf_counter()
+                    client.post(
+                        "/api/chat", json={"question": f"Question {i}: explain osmosis", "resource_id": resource_id}
+                    ).raise_for_status()
+                    chat_seconds.append(time.perf_counter() - start)
+
+            timings = [
+                sse_timings(base_url, resource_id, f"Question {i}: explain the enzyme")
+                for i in range(args.questions)
+            ]
+
+            tokens_before = server.stats["chat_tokens"]
+            cancelled_before = server.stats["chat_cancelled"]
+            start = time.perf_counter()
+            for i in range(args.questions):
+                read_and_disconnect(base_url, resource_id, f"Question {i}: explain the catalyst", args.read_tokens)
+            # Let the provider notice the last disconnect
+            deadline = time.monotonic() + 5
+            while server.stats["chat_cancelled"] - cancelled_before < args.questions and time.monotonic() < deadline:
+                time.sleep(0.05)
+            disconnect_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "questions": args.questions,
+        "citations_ms": {
+            "sse_citations_event": summarize_ms([citations for citations, _ in timings]),
+            "full_chat_response": summarize_ms(chat_seconds),
+        },
+        "first_token_ms": summarize_ms([first_token for _, first_token in timings]),
+        "disconnect": {
+            "read_tokens": args.read_tokens,
+            "answer_tokens": args.answer_tokens,
+            "provider_tokens_per_stream": round(
+                (server.stats["chat_tokens"] - tokens_before) / args.questions, 1
+            ),
+            "provider_streams_cancelled": server.stats["chat_cancelled"] - cancelled_before,
+            "seconds": round(disconnect_seconds, 2),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
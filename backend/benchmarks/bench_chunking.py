@@ -0,0 +1,100 @@
+"""
+Word-window chunker vs the structured (sentence/heading, cross-page) chunker
+
+On a synthetic set of course notes with uneven page lengths, reports chunk
+count, token sizes (counted with the same TokenCounter for all), chunks
+ending mid-sentence, chunking time, and end-to-end ingestion time with
+embeddings from the local fake API (vectors are discarded).
+
+The word chunker is run twice: as configured (chunk_size counted in words,
+so chunks overshoot the token budget) and with chunk_size scaled by the
+corpus' tokens-per-word so its chunks fit the same token budget.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunking --pages 300 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.chunker import TokenCounter
+from app.services.embeddings import EmbeddingService
+from app.services.pdf_processor import PDFProcessor
+from .bench_ingest_memory import DiscardingVectorStore, streaming
+from .fake_mistral import FakeMistralServer
+from .synthetic_pdf import make_study_pdf
+
+
+
+def chunk_stats(processor, page_texts, counter, budget):
+    start = time.perf_counter()
+    chunks = processor.chunk_text(page_texts)
+    seconds = time.perf_counter() - start
+
+    tokens = np.array(counter.count_many([chunk["text"] for chunk in chunks]))
+    return {
+        "chunks": len(chunks),
+        "chunk_seconds": round(seconds, 3),
+        "tokens_mean": round(float(tokens.mean()), 1),
+        "tokens_max": int(tokens.max()),
+        "tokens_total": int(tokens.sum()),
+        "under_100_tokens": int((tokens < 100).sum()),
+        "over_budget": int((tokens > budget).sum()),
+        "mid_sentence_ends": sum(not chunk["text"].rstrip().endswith((".", "!", "?")) for chunk in chunks),
+        "multi_page": sum(chunk["page_end"] != chunk["page"] for chunk in chunks),
+    }
+
+
+async def ingest(processor, url, pdf_path, batch_items):
+    embedding_service = EmbeddingService(api_key="fake", server_url=url, max_batch_items=batch_items)
+    start = time.perf_counter()
+    await streaming(processor, embedding_service, DiscardingVectorStore(), pdf_path, 64)
+    return {
+        "ingest_seconds": round(time.perf_counter() - start, 2),
+        "embed_requests": embedding_service.stats["requests"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--batch-items", type=int, default=32)
+    args = parser.parse_args()
+
+    counter = TokenCounter()
+    results = {"pages": args.pages}
+
+    with tempfile.TemporaryDirectory() as tmp, FakeMistralServer(latency_ms=args.latency_ms) as url:
+        pdf_path = make_study_pdf(os.path.join(tmp, "notes.pdf"), args.pages)
+        page_texts = PDFProcessor().extract_text_from_pdf(pdf_path)
+
+        words = sum(len(text.split()) for text in page_texts.values())
+        tokens_per_word = sum(counter.count_many(list(page_texts.values()))) / words
+        budget = PDFProcessor().chunk_size
+        results["tokens_per_word"] = round(tokens_per_word, 2)
+
+        processors = {
+            "words": PDFProcessor(chunker="words"),
+            "words_token_matched": PDFProcessor(
+                chunk_size=int(budget / tokens_per_word),
+                chunk_overlap=int(PDFProcessor().chunk_overlap / tokens_per_word),
+                chunker="words"
+            ),
+            "structured": PDFProcessor(chunker="structured"),
+        }
+        for name, processor in processors.items():
+            results[name] = chunk_stats(processor, page_texts, counter, budget)
+            results[name].update(asyncio.run(ingest(processor, url, pdf_path, args.batch_items)))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
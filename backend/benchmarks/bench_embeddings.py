@@ -0,0 +1,69 @@
+"""
+Embedding client throughput against the local fake API
+
+Checks that batched, concurrent requests come back in input order and
+reports texts/sec, request count and retries.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embeddings --texts 2000 --latency-ms 100 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.services.embeddings import EmbeddingService
+from .fake_mistral import FakeMistralServer, fake_embedding
+
+
+async def run(url: str, texts, args):
+    service = EmbeddingService(
+        api_key="fake",
+        server_url=url,
+        max_batch_items=args.batch_items,
+        max_concurrency=args.concurrency,
+        retry_base_delay=0.05
+    )
+    start = time.perf_counter()
+    embeddings = await service.generate_embeddings(texts)
+    elapsed = time.perf_counter() - start
+
+    for i in (0, len(texts) // 2, len(texts) - 1):
+        expected = fake_embedding(texts[i])
+        assert max(abs(a - b) for a, b in zip(embeddings[i], expected)) < 1e-6, "results out of order"
+
+    return elapsed, service.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.05)
+    parser.add_argument("--batch-items", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    texts = [f"chunk {i}: " + "lorem ipsum dolor sit amet " * 20 for i in range(args.texts)]
+
+    results = {}
+    for label, concurrency in (("sequential", 1), ("concurrent", args.concurrency)):
+        with FakeMistralServer(
+            latency_ms=args.latency_ms, rate_limit_ratio=args.rate_limit_ratio
+        ) as url:
+            args_for_run = argparse.Namespace(**{**vars(args), "concurrency": concurrency})
+            elapsed, stats = asyncio.run(run(url, texts, args_for_run))
+        results[label] = {
+            "concurrency": concurrency,
+            "seconds": round(elapsed, 2),
+            "texts_per_second": round(len(texts) / elapsed, 1),
+            "requests": stats["requests"],
+            "retries": stats["retries"],
+        }
+
+    print(json.dumps({"texts": args.texts, "latency_ms": args.latency_ms, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Peak Python heap of whole-document vs streaming ingestion
+
+Embeddings are faked (1024-dim, like mistral-embed) and indexed chunks are
+discarded, so the numbers isolate the memory held by the pipeline itself.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ingest_memory --pages 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.services.pdf_processor import PDFProcessor
+from app.services.ingestion import IngestionManager
+from .synthetic_pdf import make_pdf
+
+EMBED_DIM = 1024
+
+
+class FakeEmbeddingService:
+    async def generate_embeddings(self, texts):
+        # Distinct float objects, like a decoded JSON response
+        return [[(len(text) + i) / EMBED_DIM for i in range(EMBED_DIM)] for text in texts]
+
+
+class DiscardingVectorStore:
+    def __init__(self):
+        self.chunks = 0
+
+    def add_document_chunks(self, resource_id, chunks, embeddings, metadata):
+        self.chunks += len(chunks)
+        return len(chunks)
+
+    def delete_document(self, resource_id):
+        return False
+
+    async def add_document_chunks_async(self, *args):
+        return self.add_document_chunks(*args)
+
+    async def delete_document_async(self, resource_id):
+        return self.delete_document(resource_id)
+
+
+async def whole_document(processor, embedding_service, vector_store, pdf_path):
+    """The pre-streaming pipeline: every stage materialised in full"""
+    with open(pdf_path, "rb") as f:
+        content = f.read()  # the old `await file.read()`, held for the whole request
+    page_texts = processor.extract_text_from_pdf(pdf_path)
+    chunks = processor.chunk_text(page_texts)
+    embeddings = await embedding_service.generate_embeddings([c["text"] for c in chunks])
+    added = vector_store.add_document_chunks("bench", chunks, embeddings, {})
+    del content
+    return added
+
+
+async def streaming(processor, embedding_service, vector_store, pdf_path, batch_size):
+    manager = IngestionManager(
+        pdf_processor=processor,
+        embedding_service=embedding_service,
+        vector_store=vector_store,
+        num_workers=1,
+        process_workers=1,
+        embed_batch_size=batch_size
+    )
+    await manager.start()
+    try:
+        job = await manager.submit("bench", "bench.pdf", pdf_path)
+        while job.status not in ("completed", "failed"):
+            await asyncio.sleep(0.01)
+        if job.status == "failed":
+            raise RuntimeError(job.error)
+        return job.chunk_count
+    finally:
+        await manager.stop()
+
+
+def measure(coro_factory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = asyncio.run(coro_factory())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"chunks": chunks, "seconds": round(elapsed, 2), "peak_mb": round(peak / 2**20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    processor = PDFProcessor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(os.path.join(tmp, "bench.pdf"), args.pages)
+        results = {
+            "pages": args.pages,
+            "file_mb": round(os.path.getsize(pdf_path) / 2**20, 2),
+            "whole_document": measure(lambda: whole_document(
+                processor, FakeEmbeddingService(), DiscardingVectorStore(), pdf_path
+            )),
+            "streaming": measure(lambda: streaming(
+                processor, FakeEmbeddingService(), DiscardingVectorStore(), pdf_path, args.batch_size
+            )),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
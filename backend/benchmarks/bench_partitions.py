@@ -0,0 +1,74 @@
+"""
+Chroma query latency as the number of resources grows: shared vs partitioned
+
+Resources of a fixed size are added in steps; after each step the same
+per-resource queries are timed against a single shared collection
+(filtered by resource_id) and against one collection per resource.
+
+Usage (from backend/):
+    python -m benchmarks.bench_partitions --steps 1,10,50,100 --chunks 200
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.vector_store import ChromaVectorStore
+from .bench_vector_search import fill, make_resource
+from .common import summarize_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", default="1,10,50,100", help="resource counts to measure at")
+    parser.add_argument("--chunks", type=int, default=200, help="chunks per resource")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    steps = [int(step) for step in args.steps.split(",")]
+    rng = np.random.default_rng(0)
+    results = {"chunks_per_resource": args.chunks, "dim": args.dim, "steps": []}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            mode: ChromaVectorStore(f"{tmp}/chroma", f"bench_{mode}", partition_mode=mode)
+            for mode in ChromaVectorStore.PARTITION_MODES
+        }
+        resources = 0
+        for target in steps:
+            new = {
+                f"res-{r}": make_resource(rng, args.chunks, args.dim)
+                for r in range(resources, target)
+            }
+            resources = target
+            for store in stores.values():
+                fill(store, new)
+
+            queries = [
+                (f"res-{rng.integers(resources)}", rng.standard_normal(args.dim).tolist())
+                for _ in range(args.queries)
+            ]
+            step = {"resources": resources, "total_chunks": resources * args.chunks}
+            for mode, store in stores.items():
+                latencies = []
+                for resource_id, query in queries:
+                    start = time.perf_counter()
+                    store.search_similar_chunks(query, resource_id, args.top_k)
+                    latencies.append(time.perf_counter() - start)
+                step[mode] = summarize_ms(latencies)
+            results["steps"].append(step)
+            print(json.dumps(step))
+
+        for store in stores.values():
+            store.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
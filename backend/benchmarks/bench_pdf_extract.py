@@ -0,0 +1,65 @@
+"""
+Compare serial and process-pool PDF text extraction
+
+Usage (from backend/):
+    python -m benchmarks.bench_pdf_extract --pages 300 --workers 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.pdf_processor import PDFProcessor
+from .synthetic_pdf import make_pdf
+
+
+def _timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = PDFProcessor(pages_per_task=args.pages_per_task)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(os.path.join(tmp, "bench.pdf"), args.pages)
+
+        serial_time, serial_pages = _timed(
+            lambda: processor.extract_text_from_pdf(pdf_path), args.repeat
+        )
+
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            # Warm the pool so process start-up is not counted
+            list(pool.map(abs, range(args.workers)))
+            parallel_time, parallel_pages = _timed(
+                lambda: processor.extract_text_from_pdf(pdf_path, executor=pool), args.repeat
+            )
+
+    assert parallel_pages == serial_pages, "parallel extraction changed the output"
+
+    print(json.dumps({
+        "pages": args.pages,
+        "workers": args.workers,
+        "serial_pages_per_sec": round(args.pages / serial_time, 1),
+        "parallel_pages_per_sec": round(args.pages / parallel_time, 1),
+        "speedup": round(serial_time / parallel_time, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
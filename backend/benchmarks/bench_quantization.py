@@ -0,0 +1,99 @@
+"""
+Memory and recall of quantized vectors in the NumPy store
+
+The same synthetic embeddings (topic clusters on a low-dimensional
+manifold, like real sentence embeddings) are indexed with each
+quantization and queried through NumpyVectorStore. Recall@k is measured
+against exact float32 top-k, for each re-rank factor (candidates
+re-scored in float32 = top_k * factor). "memory" is the resident index
+size per vector and extrapolated to a million chunks (plus PQ's fixed
+codebooks per resource); with quantization
+the float32 rows stay on disk and only candidates are read.
+
+Usage (from backend/):
+    python -m benchmarks.bench_quantization --chunks 20000 --dim 1024
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.numpy_store import NumpyVectorStore
+from app.services.quantization import quantization_kinds
+from .bench_vector_search import fill
+from .common import summarize_ms
+
+
+def make_embeddings(rng, rows: int, dim: int, latent: int = 64, topics: int = 50):
+    """Clustered points in a latent space, projected up and normalized"""
+    projection = rng.standard_normal((latent, dim)).astype(np.float32)
+    centers = rng.standard_normal((topics, latent)).astype(np.float32)
+    points = centers[rng.integers(0, topics, rows)] + 0.7 * rng.standard_normal((rows, latent)).astype(np.float32)
+    vectors = points @ projection + 0.3 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), projection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000, help="chunks in the benchmark resource")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rerank-factors", default="1,4,16")
+    parser.add_argument("--pq-subvectors", type=int, default=64)
+    parser.add_argument("--kinds", default=",".join(quantization_kinds()))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors, _ = make_embeddings(rng, args.chunks, args.dim)
+    queries = vectors[rng.integers(0, args.chunks, args.queries)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = [set(np.argsort(-(vectors @ q))[:args.top_k].tolist()) for q in queries]
+
+    results = {"chunks": args.chunks, "dim": args.dim, "top_k": args.top_k}
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in args.kinds.split(","):
+            store = NumpyVectorStore(f"{tmp}/{kind}", quantization=kind, pq_subvectors=args.pq_subvectors)
+            fill(store, {"res": vectors})
+
+            start = time.perf_counter()
+            store.warm_resource("res")  # builds the quantized vectors
+            build_seconds = time.perf_counter() - start
+            index = store._load("res")
+            arrays = index.quantized.arrays if index.quantized else {"matrix": index.matrix}
+            # Per-row arrays scale with the corpus; the rest (PQ codebooks) is fixed per resource
+            per_row = sum(a.nbytes for a in arrays.values() if len(a) == args.chunks) / args.chunks
+            fixed = sum(a.nbytes for a in arrays.values() if len(a) != args.chunks)
+
+            entry = {
+                "build_seconds": round(build_seconds, 2),
+                "bytes_per_vector": round(per_row, 1),
+                "fixed_bytes_per_resource": fixed,
+                "mb_per_million_chunks": round(per_row * 1e6 / 2**20, 1),
+            }
+            factors = [int(f) for f in args.rerank_factors.split(",")] if index.quantized else [1]
+            for factor in factors:
+                store.rerank_factor = factor
+                latencies, recalls = [], []
+                for query, expected in zip(queries, truth):
+                    began = time.perf_counter()
+                    found = store.search_similar_chunks(query.tolist(), "res", args.top_k)
+                    latencies.append(time.perf_counter() - began)
+                    recalls.append(len({r["chunk_id"] for r in found} & expected) / args.top_k)
+                key = f"rerank_x{factor}" if index.quantized else "exact"
+                entry[key] = {
+                    f"recall@{args.top_k}": round(float(np.mean(recalls)), 4),
+                    "latency_ms": summarize_ms(latencies),
+                }
+            results[kind] = entry
+            store.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
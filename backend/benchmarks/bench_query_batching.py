@@ -0,0 +1,86 @@
+"""
+Micro-batching of concurrent question embeddings against the local fake API
+
+Fires bursts of concurrent generate_single_embedding calls (distinct
+texts, no cache) with and without a batching window and reports provider
+requests, per-call latency and the batch size / queueing delay metrics.
+
+Usage (from backend/):
+    python -m benchmarks.bench_query_batching --concurrency 64 --rounds 5 --window-ms 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from app.services.embeddings import EmbeddingService
+from .fake_mistral import FakeMistralServer, fake_embedding
+
+
+async def run(url: str, args, window_ms: float):
+    service = EmbeddingService(
+        api_key="fake",
+        server_url=url,
+        max_concurrency=args.embed_concurrency,
+        single_batch_window_ms=window_ms,
+        single_batch_max_items=args.max_items
+    )
+
+    async def one(text: str):
+        start = time.perf_counter()
+        embedding = await service.generate_single_embedding(text)
+        assert max(abs(a - b) for a, b in zip(embedding, fake_embedding(text))) < 1e-6, "wrong vector"
+        return time.perf_counter() - start
+
+    latencies = []
+    start = time.perf_counter()
+    for round_num in range(args.rounds):
+        latencies += await asyncio.gather(*(
+            one(f"round {round_num} question {i}: what is osmosis?")
+            for i in range(args.concurrency)
+        ))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    result = {
+        "seconds": round(elapsed, 3),
+        "questions_per_second": round(len(latencies) / elapsed, 1),
+        "provider_requests": service.stats["requests"],
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies_ms, 50)), 1),
+            "p95": round(float(np.percentile(latencies_ms, 95)), 1),
+        },
+    }
+    if window_ms > 0:
+        result["micro_batching"] = service.micro_batch_stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-items", type=int, default=32)
+    parser.add_argument("--embed-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    results = {}
+    for label, window_ms in (("unbatched", 0.0), ("micro_batched", args.window_ms)):
+        with FakeMistralServer(latency_ms=args.latency_ms) as url:
+            results[label] = asyncio.run(run(url, args, window_ms))
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "rounds": args.rounds,
+        "latency_ms": args.latency_ms,
+        **results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Re-indexing a revised PDF: full re-ingestion vs PUT /api/resources/{id}
+
+Ingests a synthetic set of notes into the real app (fake Mistral API,
+embedding cache off so every embedded chunk reaches the provider), writes
+a revision with --edited-pages pages changed, and indexes it two ways:
+
+- full: uploaded as a new resource, so every chunk is embedded
+- incremental: replaces the original resource, so only chunks whose text
+  is not already stored are embedded
+
+and reports wall time until the job completes, chunks sent to the
+embeddings API and the reused/added/deleted counts of the incremental job.
+
+Usage (from backend/):
+    python -m benchmarks.bench_reindex --pages 200 --edited-pages 2
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from .common import configure_backend_env, upload_and_wait
+from .fake_mistral import FakeMistralServer, ThreadedServer
+from .synthetic_pdf import make_study_pdf
+
+
+def wait_for(client: httpx.Client, resource_id: str, timeout: float = 600.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/api/resources/{resource_id}/status").json()
+        if status["status"] == "completed":
+            return status
+        if status["status"] == "failed":
+            raise RuntimeError(f"Ingestion failed: {status['error']}")
+        time.sleep(0.05)
+    raise TimeoutError("Ingestion did not finish in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--edited-pages", type=int, default=2, help="pages of the revision that change")
+    parser.add_argument("--embed-latency-ms", type=float, default=250.0, help="per embeddings request (up to 64 chunks)")
+    parser.add_argument("--backend", default="numpy")
+    args = parser.parse_args()
+
+    server = FakeMistralServer(latency_ms=args.embed_latency_ms)
+    with tempfile.TemporaryDirectory() as data_dir, server as mistral_url:
+        configure_backend_env(
+            data_dir, mistral_url,
+            vector_store_backend=args.backend,
+            embedding_cache_enabled="false"
+        )
+        from app.main import app
+
+        original = make_study_pdf(os.path.join(data_dir, "notes.pdf"), args.pages, seed=0)
+        # Spread the edits over the document
+        step = max(1, args.pages // (args.edited_pages + 1))
+        edited = [step * (i + 1) for i in range(args.edited_pages)]
+        revision = make_study_pdf(os.path.join(data_dir, "notes-v2.pdf"), args.pages, seed=0, edited_pages=edited)
+
+        results = {"pages": args.pages, "edited_pages": edited, "backend": args.backend}
+        with ThreadedServer(app) as base_url, httpx.Client(base_url=base_url, timeout=600) as client:
+            resource_id = upload_and_wait(client, original)["resource_id"]
+
+            for mode in ("full", "incremental"):
+                inputs_before = server.stats["inputs"]
+                start = time.perf_counter()
+                if mode == "full":
+                    status = upload_and_wait(client, revision)
+                else:
+                    with open(revision, "rb") as f:
+                        response = client.put(
+                            f"/api/resources/{resource_id}",
+                            files={"file": ("notes.pdf", f, "application/pdf")}
+                        )
+                    response.raise_for_status()
+                    status = wait_for(client, resource_id)
+                results[mode] = {
+                    "seconds": round(time.perf_counter() - start, 3),
+                    "chunks": status["chunk_count"],
+                    "chunks_embedded": server.stats["inputs"] - inputs_before,
+                }
+                if status["changes"]:
+                    results[mode]["changes"] = status["changes"]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
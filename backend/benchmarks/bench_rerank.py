@@ -0,0 +1,114 @@
+"""
+Prompt tokens and answer-chunk recall with and without the reranker
+
+Uses the labelled synthetic corpus of bench_retrieval_relevance (exact and
+paraphrase queries with one known answer chunk) and hybrid retrieval, and
+compares what would reach the prompt:
+
+- top5: the top_k_results=5 hybrid chunks (the default)
+- top3: the top 3 hybrid chunks, no reranking
+- rerank: --candidates hybrid chunks rescored by the Reranker, best 3 kept
+
+For each: hit rate of the answer chunk, mean prompt context tokens (after
+context packing) and, for rerank, the added latency per query. The
+latency is also measured on realistic candidates (--candidates chunks of
+~375 words, about 500 tokens) since the corpus chunks are short, both
+cold and with the chunks' term counts cached.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rerank --candidates 20
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.context_packer import ContextPacker
+from app.services.lexical_index import LexicalIndex
+from app.services.numpy_store import NumpyVectorStore
+from app.services.reranker import Reranker
+
+from .bench_retrieval_relevance import build_corpus
+from .common import summarize_ms
+from .synthetic_pdf import VOCABULARY
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=12)
+    parser.add_argument("--chunks", type=int, default=25, help="chunks per topic")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--keep", type=int, default=3)
+    parser.add_argument("--mmr-lambda", type=float, default=0.7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embedder, chunks, query_sets = build_corpus(rng, args.topics, args.chunks, 30, 256)
+    queries = [query for queries in query_sets.values() for query in queries]
+    reranker = Reranker(candidates=args.candidates, keep=args.keep, mmr_lambda=args.mmr_lambda)
+    packer = ContextPacker()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NumpyVectorStore(f"{tmp}/vectors", lexical_index=LexicalIndex(f"{tmp}/lexical"))
+        store.add_document_chunks(
+            "bench", chunks, [embedder.embed(chunk["text"]) for chunk in chunks], {"filename": "bench.pdf"}
+        )
+
+        results = {"queries": len(queries), "candidates": args.candidates, "keep": args.keep}
+        selections = {"top5": [], "top3": [], "rerank": []}
+        rerank_seconds = []
+        for query, expected in queries:
+            retrieved = store.search_hybrid(embedder.embed(query), query, "bench", args.candidates)
+            selections["top5"].append((retrieved[:5], expected))
+            selections["top3"].append((retrieved[:3], expected))
+            start = time.perf_counter()
+            reranked = reranker.rerank(query, retrieved)
+            rerank_seconds.append(time.perf_counter() - start)
+            selections["rerank"].append((reranked, expected))
+        store.close()
+
+    for name, selected in selections.items():
+        tokens = [packer.pack_chunks(chosen)[1]["tokens_out"] for chosen, _ in selected]
+        results[name] = {
+            "hit_rate": round(float(np.mean([
+                expected in [chunk["chunk_id"] for chunk in chosen] for chosen, expected in selected
+            ])), 3),
+            "prompt_tokens": round(float(np.mean(tokens)), 1),
+        }
+    results["rerank"]["tokens_saved_vs_top5"] = round(
+        results["top5"]["prompt_tokens"] - results["rerank"]["prompt_tokens"], 1
+    )
+    results["rerank"]["latency_ms"] = summarize_ms(rerank_seconds)
+
+    rnd = random.Random(0)
+    long_candidates = [
+        {
+            "chunk_id": i,
+            "page": i // 2 + 1,
+            "text": " ".join(rnd.choice(VOCABULARY) for _ in range(375)),
+            "relevance_score": 1 - i / args.candidates,
+        }
+        for i in range(args.candidates)
+    ]
+    # cold: chunk texts not yet tokenized; warm: their term counts are cached
+    long_seconds = {"cold": [], "warm": []}
+    for _ in range(200):
+        for state in ("cold", "warm"):
+            if state == "cold":
+                reranker = Reranker(candidates=args.candidates, keep=args.keep, mmr_lambda=args.mmr_lambda)
+            start = time.perf_counter()
+            reranker.rerank("explain osmosis and the role of the catalyst", long_candidates)
+            long_seconds[state].append(time.perf_counter() - start)
+    results["rerank"]["latency_ms_500_token_chunks"] = {
+        state: summarize_ms(seconds) for state, seconds in long_seconds.items()
+    }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Offline relevance of vector-only, BM25-only and hybrid (RRF) retrieval
+
+Builds a synthetic corpus where the right answer is known, embedded with a
+toy semantic model: words of a topic share a direction, synonyms share a
+word's vector, and exact identifiers (section numbers, codes) carry little
+weight, as they do in dense embeddings. Two query sets:
+
+- exact: mention one identifier ("section 4.12") -> its chunk
+- paraphrase: synonyms of a chunk's key words (no shared surface form)
+
+Usage (from backend/):
+    python -m benchmarks.bench_retrieval_relevance --topics 12 --chunks 25
+"""
+
+import argparse
+import json
+import tempfile
+
+import numpy as np
+
+from app.services.lexical_index import LexicalIndex, tokenize
+from app.services.numpy_store import NumpyVectorStore
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pha", "dro", "gen", "lyt", "mor", "quin"]
+
+
+class ToyEmbedder:
+    """Sum of word vectors; synonyms map to the same vector"""
+
+    def __init__(self, rng, dim: int):
+        self.rng = rng
+        self.dim = dim
+        self.vectors = {}
+
+    def add_word(self, words, topic_vector, weight: float = 1.0):
+        vector = 0.8 * topic_vector + 0.6 * self.rng.standard_normal(self.dim)
+        for word in words:
+            self.vectors[word] = weight * vector
+
+    def embed(self, text: str):
+        vector = np.zeros(self.dim)
+        for term in tokenize(text):
+            vector += self.vectors.get(term, 0)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+
+def make_word(rng, used):
+    while True:
+        word = "".join(rng.choice(SYLLABLES, size=3))
+        if word not in used:
+            used.add(word)
+            return word
+
+
+def build_corpus(rng, topics: int, chunks_per_topic: int, words_per_topic: int, dim: int):
+    embedder = ToyEmbedder(rng, dim)
+    used = set()
+    chunks, exact_queries, paraphrase_queries = [], [], []
+
+    for t in range(topics):
+        topic_vector = rng.standard_normal(dim)
+        words = [make_word(rng, used) for _ in range(words_per_topic)]
+        synonyms = {word: make_word(rng, used) for word in words}
+        for word in words:
+            embedder.add_word([word, synonyms[word]], topic_vector)
+
+        for j in range(chunks_per_topic):
+            chunk_id = len(chunks)
+            identifier = f"{t + 1}.{j + 1}"
+            embedder.add_word([identifier], rng.standard_normal(dim), weight=0.15)
+
+            focus = list(rng.choice(words, size=6, replace=False))
+            body = list(rng.choice(focus, size=30)) + list(rng.choice(words, size=15))
+            rng.shuffle(body)
+            text = f"Section {identifier}. " + " ".join(body) + f" (see section {identifier})"
+            chunks.append({"chunk_id": chunk_id, "page": t + 1, "word_count": len(body), "text": text})
+
+            exact_queries.append((f"what does section {identifier} say about {rng.choice(words)}", chunk_id))
+            paraphrase_queries.append((" ".join(synonyms[w] for w in focus[:4]), chunk_id))
+
+    return embedder, chunks, {"exact": exact_queries, "paraphrase": paraphrase_queries}
+
+
+def evaluate(search, queries, k: int = 5):
+    hits, reciprocal_ranks = 0, []
+    for query, expected in queries:
+        ranked = [chunk["chunk_id"] for chunk in search(query)]
+        rank = ranked.index(expected) + 1 if expected in ranked else None
+        hits += bool(rank and rank <= k)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    return {f"hit@{k}": round(hits / len(queries), 3), "mrr@10": round(float(np.mean(reciprocal_ranks)), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, default=12)
+    parser.add_argument("--chunks", type=int, default=25, help="chunks per topic")
+    parser.add_argument("--words", type=int, default=30, help="vocabulary per topic")
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embedder, chunks, query_sets = build_corpus(rng, args.topics, args.chunks, args.words, args.dim)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NumpyVectorStore(f"{tmp}/vectors", lexical_index=LexicalIndex(f"{tmp}/lexical"))
+        store.add_document_chunks(
+            "bench", chunks, [embedder.embed(chunk["text"]) for chunk in chunks], {"filename": "bench.pdf"}
+        )
+
+        modes = {
+            "vector": lambda q: store.search_similar_chunks(embedder.embed(q), "bench", 10),
+            "lexical": lambda q: store.search_lexical(q, "bench", 10),
+            "hybrid": lambda q: store.search_hybrid(embedder.embed(q), q, "bench", 10),
+        }
+        results = {"chunks": len(chunks)}
+        for mode, search in modes.items():
+            results[mode] = {name: evaluate(search, queries) for name, queries in query_sets.items()}
+            results[mode]["all"] = evaluate(search, [q for queries in query_sets.values() for q in queries])
+        store.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Startup and first-query latency of the real app over a large persisted store
+
+Builds a store holding --resources resources (catalog records, vectors and
+BM25 index) in one process, then starts the FastAPI app on it in a fresh
+process and reports:
+
+- startup_seconds: until the server accepts requests
+- ready_seconds: until /ready answers 200 (recent resources preloaded)
+- rss_mb after ready
+- retrieve_ms from the Server-Timing header of /api/chat for a resource
+  preloaded at startup, a cold one (first query) and the same one again
+
+Chroma gives every resource its own collection, and on this Chroma version
+each collection's HNSW files preallocate room for 1000 vectors, so keep
+--dim small for the Chroma store (64 dims is about 0.4 MB per resource).
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup --resources 10000 --backends numpy,chroma
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+from .common import configure_backend_env
+from .synthetic_pdf import VOCABULARY
+
+
+def resource_ids(count: int):
+    rnd = random.Random(0)
+    return [str(uuid.UUID(int=rnd.getrandbits(128), version=4)) for _ in range(count)]
+
+
+def build(args):
+    """Write the store directly through the app's own store and catalog classes"""
+    from app.config import get_settings
+    from app.main import create_vector_store
+    from app.services.catalog import ResourceCatalog
+
+    settings = get_settings()
+    store = create_vector_store(settings)
+    catalog = ResourceCatalog(settings.catalog_path)
+    rng = np.random.default_rng(0)
+    rnd = random.Random(0)
+
+    for i, resource_id in enumerate(resource_ids(args.resources)):
+        chunks = [
+            {
+                "chunk_id": j,
+                "page": j + 1,
+                "page_end": j + 1,
+                "word_count": 60,
+                "text": " ".join(rnd.choice(VOCABULARY) for _ in range(60)),
+            }
+            for j in range(args.chunks)
+        ]
+        vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+        store.add_document_chunks(resource_id, chunks, vectors.tolist(), {"filename": f"notes-{i}.pdf"})
+        catalog.add(resource_id, f"notes-{i}.pdf", fingerprint=resource_id)
+        catalog.update(resource_id, status="completed", page_count=args.chunks, chunk_count=args.chunks)
+        if (i + 1) % 1000 == 0:
+            print(f"built {i + 1} resources", file=sys.stderr, flush=True)
+
+    store.close()
+    catalog.close()
+
+
+def start(args):
+    from .fake_mistral import FakeMistralServer, ThreadedServer
+    from .common import RssSampler
+
+    ids = resource_ids(args.resources)
+    with FakeMistralServer(dim=args.dim, first_token_ms=0, token_interval_ms=0, answer_tokens=5) as url:
+        os.environ["MISTRAL_SERVER_URL"] = url
+
+        begin = time.perf_counter()
+        from app.main import app
+        with RssSampler() as rss, ThreadedServer(app) as base_url:
+            startup = time.perf_counter() - begin
+            with httpx.Client(base_url=base_url, timeout=120) as client:
+                while client.get("/ready").status_code != 200:
+                    time.sleep(0.01)
+                ready = time.perf_counter() - begin
+                readiness = client.get("/ready").json()
+
+                def retrieve_ms(resource_id: str, question: str) -> float:
+                    response = client.post("/api/chat", json={"question": question, "resource_id": resource_id})
+                    response.raise_for_status()
+                    timings = dict(
+                        item.split(";dur=") for item in response.headers["server-timing"].split(", ")
+                    )
+                    return float(timings["retrieve"])
+
+                # The catalog's most recent resources are the last ones built
+                warmed = retrieve_ms(ids[-1], "explain osmosis")
+                cold = retrieve_ms(ids[0], "explain enzyme")
+                hot = retrieve_ms(ids[0], "explain catalyst")
+
+    print(json.dumps({
+        "startup_seconds": round(startup, 3),
+        "ready_seconds": round(ready, 3),
+        "warmup": readiness["warmup"],
+        "rss_mb": rss.result().get("peak_mb"),
+        "retrieve_ms": {"preloaded": warmed, "cold": cold, "hot": hot},
+    }))
+
+
+def run_phase(phase: str, args, data_dir: str, backend: str) -> str:
+    command = [
+        sys.executable, "-m", "benchmarks.bench_startup", "--phase", phase,
+        "--resources", str(args.resources), "--chunks", str(args.chunks), "--dim", str(args.dim),
+        "--data-dir", data_dir, "--backends", backend,
+    ]
+    # stderr (progress, app logs) passes through
+    result = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+    if result.returncode:
+        raise RuntimeError(f"{phase} phase failed")
+    return result.stdout
+
+
+def disk_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return round(total / 2**20, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resources", type=int, default=10000)
+    parser.add_argument("--chunks", type=int, default=8, help="chunks per resource")
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--backends", default="numpy,chroma")
+    parser.add_argument("--phase", choices=("build", "start"), help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        configure_backend_env(args.data_dir, "http://127.0.0.1:9", vector_store_backend=args.backends)
+        if args.phase == "build":
+            build(args)
+        else:
+            start(args)
+        return
+
+    results = {"resources": args.resources, "chunks_per_resource": args.chunks, "dim": args.dim}
+    for backend in args.backends.split(","):
+        with tempfile.TemporaryDirectory() as data_dir:
+            began = time.perf_counter()
+            run_phase("build", args, data_dir, backend)
+            build_seconds = time.perf_counter() - began
+            results[backend] = {
+                "build_seconds": round(build_seconds, 1),
+                "disk_mb": disk_mb(data_dir),
+                **json.loads(run_phase("start", args, data_dir, backend).strip().splitlines()[-1]),
+            }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Per-resource search latency and recall: NumPy exact backend vs Chroma
+
+All stores receive the same synthetic clustered vectors for R resources;
+Chroma is measured in both partition modes (one shared collection filtered
+by resource_id, and one collection per resource). Recall@k is measured
+against exact brute-force top-k.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_search --resources 10 --chunks 1000
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.vector_store import ChromaVectorStore
+from app.services.numpy_store import NumpyVectorStore
+from .common import summarize_ms
+
+
+def make_resource(rng, chunks: int, dim: int, clusters: int = 20):
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, chunks)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((chunks, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def fill(store, resource_vectors):
+    for resource_id, vectors in resource_vectors.items():
+        for start in range(0, len(vectors), 500):
+            batch = vectors[start:start + 500]
+            chunks = [
+                {"chunk_id": start + i, "page": 1, "word_count": 1, "text": f"{resource_id}-{start + i}"}
+                for i in range(len(batch))
+            ]
+            store.add_document_chunks(resource_id, chunks, batch.tolist(), {"filename": "bench.pdf"})
+
+
+def measure(store, queries, truth, top_k):
+    latencies, recalls = [], []
+    for resource_id, query, expected in zip(queries["resource_ids"], queries["vectors"], truth):
+        start = time.perf_counter()
+        results = store.search_similar_chunks(query.tolist(), resource_id, top_k)
+        latencies.append(time.perf_counter() - start)
+        found = {r["chunk_id"] for r in results}
+        recalls.append(len(found & expected) / len(expected))
+    return {"latency_ms": summarize_ms(latencies), f"recall@{top_k}": round(float(np.mean(recalls)), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resources", type=int, default=10)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    resource_vectors = {f"res-{r}": make_resource(rng, args.chunks, args.dim) for r in range(args.resources)}
+
+    resource_ids, vectors, truth = [], [], []
+    names = list(resource_vectors)
+    for _ in range(args.queries):
+        resource_id = names[rng.integers(len(names))]
+        matrix = resource_vectors[resource_id]
+        query = matrix[rng.integers(len(matrix))] + 0.5 * rng.standard_normal(args.dim).astype(np.float32)
+        query /= np.linalg.norm(query)
+        resource_ids.append(resource_id)
+        vectors.append(query)
+        truth.append(set(np.argsort(-(matrix @ query))[:args.top_k].tolist()))
+    queries = {"resource_ids": resource_ids, "vectors": vectors}
+
+    results = {"resources": args.resources, "chunks_per_resource": args.chunks, "dim": args.dim}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, store in (
+            ("numpy", NumpyVectorStore(f"{tmp}/numpy")),
+            ("chroma_shared", ChromaVectorStore(f"{tmp}/chroma", "bench_shared", partition_mode="shared")),
+            ("chroma_resource", ChromaVectorStore(f"{tmp}/chroma", "bench_resource", partition_mode="resource")),
+        ):
+            start = time.perf_counter()
+            fill(store, resource_vectors)
+            build_seconds = time.perf_counter() - start
+            store.search_similar_chunks(vectors[0].tolist(), resource_ids[0], args.top_k)  # warm up
+            results[name] = {"build_seconds": round(build_seconds, 2), **measure(store, queries, truth, args.top_k)}
+            store.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
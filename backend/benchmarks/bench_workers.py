@@ -0,0 +1,144 @@
+"""
+Chat throughput with 1 to N app worker processes sharing one store
+
+Runs the fake Mistral API in its own process, ingests a synthetic PDF once
+into a numpy store, then for each --workers count starts
+`uvicorn app.main:app --workers N` (multi_worker mode) over the same data
+directory and sends --requests /api/chat requests with distinct questions
+(answer cache off) from --concurrency concurrent clients, each on a fresh
+connection so the requests spread over the workers. Reranking is on, so
+every request does CPU work beyond waiting for the model.
+
+Per worker count: QPS, latency percentiles, speedup over one worker, and
+the share of answers with citations (every worker must see the resource
+ingested through another). Scaling is bounded by os.cpu_count(), which
+is reported too; this process generating the load also needs CPU.
+
+Usage (from backend/):
+    python -m benchmarks.bench_workers --workers 1,2,4 --requests 400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .common import configure_backend_env, summarize_ms, upload_and_wait
+from .fake_mistral import _free_port
+from .synthetic_pdf import VOCABULARY, make_study_pdf
+
+
+def wait_until_up(url: str, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=5).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up")
+
+
+async def run_load(base_url: str, resource_id: str, requests: int, concurrency: int, offset: int):
+    """(latencies, answers with citations, wall seconds)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, cited = [], 0
+
+    async def ask(client: httpx.AsyncClient, i: int):
+        nonlocal cited
+        words = " ".join(VOCABULARY[(i * 7 + k) % len(VOCABULARY)] for k in range(3))
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/chat", json={
+                "question": f"Question {offset + i}: explain {words}",
+                "resource_id": resource_id,
+            })
+            latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        cited += bool(response.json()["citations"])
+
+    # No keep-alive: each request opens a connection any worker may accept
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(ask(client, i) for i in range(requests)))
+        return latencies, cited, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--first-token-ms", type=float, default=20.0, help="fake model latency per answer")
+    args = parser.parse_args()
+
+    fake_port = _free_port()
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_mistral", "--port", str(fake_port),
+         "--first-token-ms", str(args.first_token_ms), "--token-interval-ms", "0"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    results = {"cpu_count": os.cpu_count(), "requests": args.requests, "concurrency": args.concurrency, "runs": {}}
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            mistral_url = f"http://127.0.0.1:{fake_port}"
+            wait_until_up(f"{mistral_url}/docs")
+            configure_backend_env(
+                data_dir, mistral_url,
+                vector_store_backend="numpy",
+                multi_worker="true",
+                answer_cache_enabled="false",
+                rerank_enabled="true"
+            )
+            pdf = make_study_pdf(os.path.join(data_dir, "notes.pdf"), args.pages, seed=0)
+
+            resource_id = None
+            for run, workers in enumerate(int(n) for n in args.workers.split(",")):
+                port = _free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                app = subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                     "--workers", str(workers), "--log-level", "warning"],
+                    stdout=subprocess.DEVNULL
+                )
+                try:
+                    wait_until_up(f"{base_url}/ready")
+                    if resource_id is None:
+                        with httpx.Client(base_url=base_url, timeout=300) as client:
+                            resource_id = upload_and_wait(client, pdf)["resource_id"]
+                    # Warm up every worker (loads the resource's index in each)
+                    asyncio.run(run_load(base_url, resource_id, workers * 8, args.concurrency, -10_000 * (run + 1)))
+                    latencies, cited, wall = asyncio.run(
+                        run_load(base_url, resource_id, args.requests, args.concurrency, run * args.requests)
+                    )
+                finally:
+                    app.terminate()
+                    app.wait()
+
+                results["runs"][str(workers)] = {
+                    "qps": round(args.requests / wall, 1),
+                    "latency_ms": summarize_ms(latencies),
+                    "answers_with_citations": round(cited / args.requests, 3),
+                }
+    finally:
+        fake.terminate()
+        fake.wait()
+
+    runs = results["runs"]
+    baseline = runs.get("1", next(iter(runs.values())))["qps"]
+    for run in runs.values():
+        run["speedup"] = round(run["qps"] / baseline, 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
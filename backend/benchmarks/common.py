@@ -0,0 +1,147 @@
+"""Helpers shared by the benchmarks that drive the real FastAPI app"""
+
+import os
+import resource
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize_ms(seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max of a list of durations, in milliseconds"""
+    return {
+        f"p{pct}": round(percentile(seconds, pct) * 1000, 1)
+        for pct in (50, 95, 99)
+    } | {"max": round(max(seconds, default=0.0) * 1000, 1)}
+
+
+def configure_backend_env(data_dir: str, mistral_url: str, **overrides):
+    """
+    Point app settings at a scratch directory and the fake Mistral server
+
+    Must run before `app.main` is imported, since settings are read at import.
+    """
+    env = {
+        "MISTRAL_API_KEY": "fake",
+        "MISTRAL_SERVER_URL": mistral_url,
+        "UPLOAD_DIR": os.path.join(data_dir, "uploads"),
+        "CHROMA_PERSIST_DIR": os.path.join(data_dir, "chroma_db"),
+        "CATALOG_PATH": os.path.join(data_dir, "chroma_db", "catalog.sqlite"),
+        "INGEST_QUEUE_PATH": os.path.join(data_dir, "chroma_db", "ingest_queue.sqlite"),
+        "ANSWER_CACHE_PATH": os.path.join(data_dir, "cache", "answers.sqlite"),
+        "EMBEDDING_CACHE_PATH": os.path.join(data_dir, "cache", "embeddings.sqlite"),
+        "NUMPY_STORE_DIR": os.path.join(data_dir, "vector_data"),
+    }
+    env.update({name.upper(): str(value) for name, value in overrides.items()})
+    os.environ.update(env)
+
+
+def upload_and_wait(
+    client: httpx.Client,
+    pdf_path: str,
+    timeout: float = 300.0,
+    params: Optional[Dict] = None
+) -> Dict:
+    """Upload a PDF (query params e.g. exam_tag) and poll its status until ingestion finishes"""
+    with open(pdf_path, "rb") as f:
+        response = client.post(
+            "/api/resources/upload",
+            params=params,
+            files={"file": (os.path.basename(pdf_path), f, "application/pdf")}
+        )
+    response.raise_for_status()
+    resource_id = response.json()["resource_id"]
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/api/resources/{resource_id}/status").json()
+        if status["status"] == "completed":
+            return status
+        if status["status"] == "failed":
+            raise RuntimeError(f"Ingestion failed: {status['error']}")
+        time.sleep(0.1)
+    raise TimeoutError("Ingestion did not finish in time")
+
+
+def _rss_bytes(pid: str = "self") -> int:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _child_pids() -> List[str]:
+    pids = []
+    for task in os.listdir("/proc/self/task"):
+        try:
+            with open(f"/proc/self/task/{task}/children") as f:
+                pids.extend(f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+class RssSampler:
+    """
+    Peak resident memory while a block runs, sampled every `interval`
+    seconds: this process plus its child processes (e.g. the PDF process
+    pool). Uses /proc, so on other platforms only the process's lifetime
+    ru_maxrss is reported.
+
+        with RssSampler() as rss:
+            ...
+        rss.result()  # {"start_mb", "peak_mb", "peak_children_mb"}
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.available = os.path.exists("/proc/self/statm")
+        self.start = self.peak = self.peak_children = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        children = 0
+        for pid in _child_pids():
+            try:
+                children += _rss_bytes(pid)
+            except OSError:
+                pass  # exited between listing and reading
+        self.peak = max(self.peak, _rss_bytes())
+        self.peak_children = max(self.peak_children, children)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self.available:
+            self.start = _rss_bytes()
+            self._sample()
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.available:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    def result(self) -> Dict[str, float]:
+        if not self.available:
+            # No /proc (macOS): ru_maxrss is the lifetime peak, in bytes there
+            return {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20, 1)}
+        return {
+            "start_mb": round(self.start / 2**20, 1),
+            "peak_mb": round(self.peak / 2**20, 1),
+            "peak_children_mb": round(self.peak_children / 2**20, 1),
+        }
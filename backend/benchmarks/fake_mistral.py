@@ -0,0 +1,244 @@
+"""
+Local stand-in for the Mistral embeddings and chat completions API
+
+Vectors are deterministic per input text, so results can be checked for
+ordering. Latency and rate-limit injection are configurable to exercise
+batching, concurrency and retries without network access. Chat answers
+are canned text streamed at a configurable token rate.
+
+Run standalone (from backend/):
+    python -m benchmarks.fake_mistral --port 8900 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EMBED_DIM = 1024
+
+
+def fake_embedding(text: str, dim: int = EMBED_DIM) -> List[float]:
+    """Deterministic unit vector for a text"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def create_app(
+    latency_ms: float = 0.0,
+    rate_limit_ratio: float = 0.0,
+    max_inputs: int = 512,
+    dim: int = EMBED_DIM,
+    first_token_ms: float = 200.0,
+    token_interval_ms: float = 20.0,
+    answer_tokens: int = 50
+) -> FastAPI:
+    """
+    Build the fake API
+
+    Args:
+        latency_ms: Added delay per embeddings request
+        rate_limit_ratio: Fraction of embeddings requests answered with 429
+        max_inputs: Embeddings requests with more inputs are rejected with 400
+        dim: Embedding dimension
+        first_token_ms: Chat delay before the first token
+        token_interval_ms: Chat delay between streamed tokens
+        answer_tokens: Tokens per chat answer
+    """
+    app = FastAPI()
+    app.state.stats = {
+        "requests": 0, "rate_limited": 0, "inputs": 0, "max_in_flight": 0,
+        "chat_requests": 0, "chat_tokens": 0, "chat_cancelled": 0,
+    }
+    in_flight = 0
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        nonlocal in_flight
+        body = await request.json()
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        stats = app.state.stats
+        stats["requests"] += 1
+        in_flight += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], in_flight)
+        try:
+            if latency_ms:
+                await asyncio.sleep(latency_ms / 1000)
+
+            if random.random() < rate_limit_ratio:
+                stats["rate_limited"] += 1
+                return JSONResponse(
+                    {"message": "Requests rate limit exceeded"},
+                    status_code=429,
+                    headers={"Retry-After": "0.05"}
+                )
+            if len(inputs) > max_inputs:
+                return JSONResponse({"message": "Too many inputs"}, status_code=400)
+
+            stats["inputs"] += len(inputs)
+            tokens = sum(len(text) // 4 + 1 for text in inputs)
+            return {
+                "id": uuid.uuid4().hex,
+                "object": "list",
+                "model": body.get("model", "mistral-embed"),
+                "data": [
+                    {"object": "embedding", "embedding": fake_embedding(text, dim), "index": i}
+                    for i, text in enumerate(inputs)
+                ],
+                "usage": {"prompt_tokens": tokens, "completion_tokens": 0, "total_tokens": tokens},
+            }
+        finally:
+            in_flight -= 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats = app.state.stats
+        stats["chat_requests"] += 1
+
+        prompt_tokens = sum(len(m.get("content") or "") // 4 + 1 for m in body.get("messages", []))
+        max_tokens = body.get("max_tokens") or answer_tokens
+        tokens = _answer_tokens(min(answer_tokens, max_tokens))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        completion_id = uuid.uuid4().hex
+        model = body.get("model", "mistral-large-latest")
+
+        if not body.get("stream"):
+            await asyncio.sleep((first_token_ms + token_interval_ms * len(tokens)) / 1000)
+            stats["chat_tokens"] += len(tokens)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "model": model,
+                "created": int(time.time()),
+                "usage": usage,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+            }
+
+        async def events():
+            sent = 0
+            try:
+                await asyncio.sleep(first_token_ms / 1000)
+                for i, token in enumerate(tokens):
+                    if i:
+                        await asyncio.sleep(token_interval_ms / 1000)
+                    last = i == len(tokens) - 1
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "model": model,
+                        "created": int(time.time()),
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"role": "assistant", "content": token},
+                            "finish_reason": "stop" if last else None,
+                        }],
+                    }
+                    if last:
+                        chunk["usage"] = usage
+                    sent += 1
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["chat_tokens"] += sent
+                if sent < len(tokens):
+                    stats["chat_cancelled"] += 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def _answer_tokens(count: int) -> List[str]:
+    words = ["Photosynthesis", " converts", " light", " energy", " into", " chemical", " energy", " [Page 1]."]
+    return [words[i % len(words)] for i in range(count)]
+
+
+class ThreadedServer:
+    """Serve an ASGI app from a background thread: `with ThreadedServer(app) as url: ...`"""
+
+    def __init__(self, app, port: Optional[int] = None):
+        self.app = app
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(
+            self.app, host="127.0.0.1", port=self.port, log_level="warning"
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self.url
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
+
+
+class FakeMistralServer(ThreadedServer):
+    """Run the fake API on a background thread: `with FakeMistralServer() as url: ...`"""
+
+    def __init__(self, port: Optional[int] = None, **app_options):
+        super().__init__(create_app(**app_options), port)
+
+    @property
+    def stats(self):
+        return self.app.state.stats
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--token-interval-ms", type=float, default=20.0)
+    parser.add_argument("--answer-tokens", type=int, default=50)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(
+            latency_ms=args.latency_ms,
+            rate_limit_ratio=args.rate_limit_ratio,
+            first_token_ms=args.first_token_ms,
+            token_interval_ms=args.token_interval_ms,
+            answer_tokens=args.answer_tokens
+        ),
+        host="127.0.0.1",
+        port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Time-to-first-token under concurrent streaming chats
+
+Starts the fake Mistral API and the real FastAPI app on local ports,
+ingests a synthetic PDF, then opens N concurrent /api/chat/stream requests
+with distinct questions (so the answer cache does not short-circuit them).
+
+Usage (from backend/):
+    python -m benchmarks.load_chat_stream --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from .common import configure_backend_env, summarize_ms, upload_and_wait
+from .fake_mistral import FakeMistralServer, ThreadedServer
+from .synthetic_pdf import make_pdf
+
+
+async def stream_chat(client: httpx.AsyncClient, resource_id: str, question: str):
+    start = time.perf_counter()
+    ttft = None
+    async with client.stream(
+        "POST", "/api/chat/stream",
+        json={"question": question, "resource_id": resource_id}
+    ) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_text():
+            if chunk and ttft is None:
+                ttft = time.perf_counter() - start
+    return ttft, time.perf_counter() - start
+
+
+async def run_load(base_url: str, resource_id: str, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            stream_chat(client, resource_id, f"Question {i}: explain topic {i} from the notes")
+            for i in range(concurrency)
+        ))
+        wall = time.perf_counter() - start
+    return [ttft for ttft, _ in results], [total for _, total in results], wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--token-interval-ms", type=float, default=20.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir, FakeMistralServer(
+        latency_ms=args.embed_latency_ms,
+        first_token_ms=args.first_token_ms,
+        token_interval_ms=args.token_interval_ms
+    ) as mistral_url:
+        configure_backend_env(data_dir, mistral_url, answer_cache_enabled="false")
+        from app.main import app
+
+        with ThreadedServer(app) as base_url:
+            with httpx.Client(base_url=base_url, timeout=60) as client:
+                status = upload_and_wait(client, make_pdf(os.path.join(data_dir, "notes.pdf"), args.pages))
+            ttfts, totals, wall = asyncio.run(run_load(base_url, status["resource_id"], args.concurrency))
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "fake_first_token_ms": args.first_token_ms,
+        "ttft_ms": summarize_ms(ttfts),
+        "total_ms": summarize_ms(totals),
+        "wall_seconds": round(wall, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
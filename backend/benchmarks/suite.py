@@ -0,0 +1,279 @@
+"""
+End-to-end benchmark suite, fully offline
+
+Starts the fake Mistral API and the real FastAPI app on local ports, then:
+
+1. ingestion: uploads synthetic course-note PDFs concurrently and reports
+   pages/sec, chunks/sec and peak RSS (this process, which also hosts the
+   app, plus the PDF process pool)
+2. chat: closed-loop /api/chat load, reporting QPS and p50/p95/p99 latency
+3. stream: the same load on /api/chat/stream, adding time-to-first-token
+
+PDFs, questions and fake vectors are seeded, so two runs of the same
+commit differ only by timing noise. Results are printed as JSON; save
+them with --output and diff against an earlier run with --compare.
+
+Usage (from backend/):
+    python -m benchmarks.suite --output benchmarks/results/main.json
+    python -m benchmarks.suite --compare benchmarks/results/main.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+from .common import RssSampler, configure_backend_env, summarize_ms
+from .fake_mistral import FakeMistralServer, ThreadedServer
+from .synthetic_pdf import VOCABULARY, make_study_pdf
+
+# Metrics --compare reports, with the direction that counts as better
+KEY_METRICS = {
+    "ingestion.pages_per_second": "higher",
+    "ingestion.chunks_per_second": "higher",
+    "ingestion.rss.peak_mb": "lower",
+    "chat.qps": "higher",
+    "chat.latency_ms.p50": "lower",
+    "chat.latency_ms.p95": "lower",
+    "chat.latency_ms.p99": "lower",
+    "stream.qps": "higher",
+    "stream.ttft_ms.p50": "lower",
+    "stream.ttft_ms.p95": "lower",
+    "stream.ttft_ms.p99": "lower",
+    "stream.total_ms.p95": "lower",
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def make_questions(count: int, seed: int) -> List[str]:
+    """Distinct questions, so caches cannot answer repeats"""
+    rnd = random.Random(seed)
+    return [
+        f"Question {i}: explain {' '.join(rnd.choice(VOCABULARY) for _ in range(4))}"
+        for i in range(count)
+    ]
+
+
+async def ingest(base_url: str, pdf_paths: List[str], timeout: float) -> Dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        async def upload(path: str) -> str:
+            with open(path, "rb") as f:
+                response = await client.post(
+                    "/api/resources/upload",
+                    files={"file": (os.path.basename(path), f.read(), "application/pdf")}
+                )
+            response.raise_for_status()
+            return response.json()["resource_id"]
+
+        start = time.perf_counter()
+        resource_ids = await asyncio.gather(*(upload(path) for path in pdf_paths))
+
+        statuses = {}
+        deadline = time.monotonic() + timeout
+        while len(statuses) < len(resource_ids):
+            if time.monotonic() > deadline:
+                raise TimeoutError("Ingestion did not finish in time")
+            for resource_id in resource_ids:
+                if resource_id in statuses:
+                    continue
+                status = (await client.get(f"/api/resources/{resource_id}/status")).json()
+                if status["status"] == "failed":
+                    raise RuntimeError(f"Ingestion failed: {status['error']}")
+                if status["status"] == "completed":
+                    statuses[resource_id] = status
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+
+    pages = sum(status["page_count"] for status in statuses.values())
+    chunks = sum(status["chunk_count"] for status in statuses.values())
+    return {
+        "resource_ids": resource_ids,
+        "documents": len(resource_ids),
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": round(elapsed, 2),
+        "pages_per_second": round(pages / elapsed, 1),
+        "chunks_per_second": round(chunks / elapsed, 1),
+    }
+
+
+async def chat_load(
+    base_url: str,
+    resource_ids: List[str],
+    questions: List[str],
+    concurrency: int,
+    stream: bool
+) -> Dict:
+    """Closed loop: `concurrency` workers send the questions one after another"""
+    latencies, ttfts = [], []
+    queue = list(enumerate(questions))
+    queue.reverse()
+
+    async def worker(client: httpx.AsyncClient):
+        while queue:
+            i, question = queue.pop()
+            body = {"question": question, "resource_id": resource_ids[i % len(resource_ids)]}
+            start = time.perf_counter()
+            if stream:
+                ttft = None
+                async with client.stream("POST", "/api/chat/stream", json=body) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_text():
+                        if chunk and ttft is None:
+                            ttft = time.perf_counter() - start
+                ttfts.append(ttft)
+            else:
+                response = await client.post("/api/chat", json=body)
+                response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result = {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "qps": round(len(latencies) / elapsed, 1),
+    }
+    if stream:
+        result["ttft_ms"] = summarize_ms(ttfts)
+        result["total_ms"] = summarize_ms(latencies)
+    else:
+        result["latency_ms"] = summarize_ms(latencies)
+    return result
+
+
+def lookup(results: Dict, dotted: str):
+    value = results
+    for key in dotted.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(baseline: Dict, current: Dict, tolerance_pct: float) -> Dict:
+    """Change of each key metric against a baseline run; worse by more than tolerance_pct is a regression"""
+    changes = {}
+    for metric, better in KEY_METRICS.items():
+        before, after = lookup(baseline, metric), lookup(current, metric)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        worse = -change if better == "higher" else change
+        changes[metric] = {
+            "baseline": before,
+            "current": after,
+            "change_pct": round(change, 1),
+            "better": better,
+            "regressed": worse > tolerance_pct,
+        }
+    return {"baseline_commit": lookup(baseline, "meta.git_commit"), "metrics": changes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=60, help="pages per document")
+    parser.add_argument("--chat-requests", type=int, default=200)
+    parser.add_argument("--chat-concurrency", type=int, default=16)
+    parser.add_argument("--embed-latency-ms", type=float, default=30.0)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--token-interval-ms", type=float, default=20.0)
+    parser.add_argument("--answer-tokens", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ingest-timeout", type=float, default=600.0)
+    parser.add_argument(
+        "--setting", action="append", default=[], metavar="NAME=VALUE",
+        help="override an app setting, e.g. --setting vector_store_backend=numpy"
+    )
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline results JSON to report changes against")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="percent change treated as noise")
+    args = parser.parse_args()
+
+    overrides = {"answer_cache_enabled": "false"}
+    overrides.update(setting.split("=", 1) for setting in args.setting)
+    questions = make_questions(args.chat_requests, args.seed)
+
+    results = {
+        "meta": {
+            "git_commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {**vars(args), "settings": overrides},
+    }
+
+    with tempfile.TemporaryDirectory() as data_dir, FakeMistralServer(
+        latency_ms=args.embed_latency_ms,
+        first_token_ms=args.first_token_ms,
+        token_interval_ms=args.token_interval_ms,
+        answer_tokens=args.answer_tokens
+    ) as mistral_url:
+        configure_backend_env(data_dir, mistral_url, **overrides)
+        from app.main import app
+
+        pdf_paths = [
+            make_study_pdf(os.path.join(data_dir, f"notes-{i}.pdf"), args.pages, seed=args.seed + i)
+            for i in range(args.documents)
+        ]
+
+        with ThreadedServer(app) as base_url:
+            with RssSampler() as rss:
+                ingestion = asyncio.run(ingest(base_url, pdf_paths, args.ingest_timeout))
+            ingestion["rss"] = rss.result()
+            resource_ids = ingestion.pop("resource_ids")
+
+            results["ingestion"] = ingestion
+            results["chat"] = asyncio.run(chat_load(
+                base_url, resource_ids, questions, args.chat_concurrency, stream=False
+            ))
+            # Fresh questions for the streaming pass so the query cache stays cold
+            stream_questions = make_questions(args.chat_requests, args.seed + 1)
+            results["stream"] = asyncio.run(chat_load(
+                base_url, resource_ids, stream_questions, args.chat_concurrency, stream=True
+            ))
+
+    if args.compare:
+        with open(args.compare) as f:
+            results["comparison"] = compare(json.load(f), results, args.tolerance)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.compare and any(m["regressed"] for m in results["comparison"]["metrics"].values()):
+        print(f"⚠️ Some metrics are more than {args.tolerance}% worse than the baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Generate text-only PDFs for benchmarks without any extra dependencies"""
+
+import random
+from typing import List, Sequence
+
+VOCABULARY = [
+    "photosynthesis", "chlorophyll", "mitochondria", "enzyme", "osmosis",
+    "velocity", "acceleration", "momentum", "newton", "friction",
+    "oxidation", "reduction", "equilibrium", "catalyst", "molecule",
+    "integral", "derivative", "matrix", "vector", "theorem",
+    "constitution", "parliament", "federalism", "amendment", "judiciary",
+    "empire", "revolution", "treaty", "monsoon", "plateau",
+    "the", "of", "and", "is", "in", "a", "to", "which", "that", "by",
+]
+
+
+def _wrap(words: List[str], line_width: int = 90) -> List[str]:
+    lines, line = [], []
+    for word in words:
+        if line and len(" ".join(line + [word])) > line_width:
+            lines.append(" ".join(line))
+            line = []
+        line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def _page_stream(lines: List[str]) -> str:
+    body = " ".join(f"({text}) '" for text in lines)
+    return f"BT /F1 10 Tf 40 800 Td 12 TL {body} ET"
+
+
+def _write_pdf(path: str, pages: List[List[str]]) -> str:
+    """Write a PDF with one page per list of text lines"""
+    offsets: List[int] = []
+    parts: List[bytes] = [b"%PDF-1.4\n"]
+    size = len(parts[0])
+
+    def add(obj: str):
+        nonlocal size
+        offsets.append(size)
+        data = f"{len(offsets)} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+        parts.append(data)
+        size += len(data)
+
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    add("<< /Type /Catalog /Pages 2 0 R >>")
+    add(f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(pages)} >>")
+    add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for i, lines in enumerate(pages):
+        stream = _page_stream(lines)
+        add(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        add(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    xref = [f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n"]
+    xref += [f"{offset:010d} 00000 n \n" for offset in offsets]
+    xref.append(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{size}\n%%EOF\n")
+    parts.append("".join(xref).encode("latin-1"))
+
+    with open(path, "wb") as f:
+        f.write(b"".join(parts))
+    return path
+
+
+def make_pdf(path: str, pages: int, words_per_page: int = 400, seed: int = 0) -> str:
+    """Write a PDF with `pages` pages of pseudo-random study text"""
+    rnd = random.Random(seed)
+    return _write_pdf(path, [
+        _wrap([rnd.choice(VOCABULARY) for _ in range(words_per_page)])
+        for _ in range(pages)
+    ])
+
+
+def _sentence(rnd: random.Random) -> str:
+    words = [rnd.choice(VOCABULARY) for _ in range(rnd.randint(6, 28))]
+    return " ".join(words).capitalize() + "."
+
+
+def make_study_pdf(path: str, pages: int, seed: int = 0, edited_pages: Sequence[int] = ()) -> str:
+    """
+    Write a PDF that looks like course notes: numbered section headings,
+    sentences that run across lines and pages of very uneven length
+    (slide-like pages of a few lines next to full pages of prose)
+
+    edited_pages get one extra sentence each and are otherwise identical
+    to the notes written without them (a small revision of the notes).
+    """
+    rnd = random.Random(seed)
+    section = 0
+    page_lines = []
+    for _ in range(pages):
+        lines = []
+        if rnd.random() < 0.5:
+            section += 1
+            lines.append(f"{section // 5 + 1}.{section % 5 + 1} {rnd.choice(VOCABULARY[:30]).capitalize()}")
+        words_on_page = rnd.choice([30, 60, 120, 400, 600])
+        text = []
+        while sum(len(sentence.split()) for sentence in text) < words_on_page:
+            text.append(_sentence(rnd))
+        if len(page_lines) in edited_pages:
+            text.append(_sentence(random.Random(f"{seed}-{len(page_lines)}")))
+        lines.extend(_wrap(" ".join(text).split()))
+        page_lines.append(lines)
+    return _write_pdf(path, page_lines)
@@ -22,13 +22,69 @@ export const uploadPDF = async (file) => {
       throw new Error(error.detail || 'Failed to upload PDF');
     }
 
-    return await response.json();
+    const upload = await response.json();
+    const status = await waitForResource(upload.resource_id);
+
+    return { ...upload, page_count: status.page_count, status: status.status };
   } catch (error) {
     console.error('PDF Upload Error:', error);
     throw error;
   }
 };
 
+/**
+ * Get ingestion progress for an uploaded resource
+ * @param {string} resourceId - ID of the uploaded resource
+ * @returns {Promise<Object>} Status with per-stage progress
+ */
+export const getResourceStatus = async (resourceId) => {
+  const response = await fetch(`${API_URL}/api/resources/${resourceId}/status`);
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to get resource status');
+  }
+
+  return await response.json();
+};
+
+/**
+ * Poll until a resource has finished processing
+ * @param {string} resourceId - ID of the uploaded resource
+ * @param {number} intervalMs - Delay before the second poll, doubled after each poll
+ * @param {number} maxIntervalMs - Longest delay between polls
+ * @param {number} timeoutMs - Give up after this long
+ * @returns {Promise<Object>} Final resource status
+ */
+const waitForResource = async (
+  resourceId,
+  intervalMs = 1000,
+  maxIntervalMs = 5000,
+  timeoutMs = 10 * 60 * 1000
+) => {
+  const deadline = Date.now() + timeoutMs;
+  let delay = intervalMs;
+
+  while (true) {
+    const status = await getResourceStatus(resourceId);
+
+    if (status.status === 'completed') {
+      return status;
+    }
+    if (status.status === 'failed') {
+      throw new Error(status.error || 'Failed to process PDF');
+    }
+
+    const remaining = deadline - Date.now();
+    if (remaining <= 0) {
+      throw new Error('Timed out waiting for the PDF to finish processing');
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, Math.min(delay, remaining)));
+    delay = Math.min(delay * 2, maxIntervalMs);
+  }
+};
+
 /**
  * Chat with PDF using RAG
  * @param {string} question - User's question
@@ -158,6 +214,7 @@ export const deleteResource = async (resourceId) => {
 
 export default {
   uploadPDF,
+  getResourceStatus,
   chatWithPDF,
   chatWithPDFStream,
   getResourceInfo,